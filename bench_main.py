@@ -0,0 +1,194 @@
+"""Offline throughput benchmark for the scraping pipeline.
+
+Replays a recording (see lib/replay.py for the layout) through
+process_single_company at several concurrency levels, with site snapshots
+served from a local HTTP server and LLM calls answered by ReplayChatModel.
+
+    python bench_main.py --record bench_data --limit 5    # one live run to capture a recording
+    python bench_main.py bench_data --concurrency 1 2 4 8 # offline benchmark
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+import urllib.request
+from datetime import datetime
+
+import lib.main as pipeline
+from lib.replay import (
+    SnapshotServer,
+    ReplayChatModel,
+    RecordingChatModel,
+    load_manifest,
+    recorded_urls,
+    snapshot_path,
+)
+from lib.result_store import InMemoryCollection
+from lib.fetcher import TieredFetcher
+from lib.runtime import Runtime, DEFAULT_BROWSER_ARGS, get_runtime, set_runtime
+from lib.autoscaler import process_tree_usage, psutil
+
+
+class ResourceSampler:
+    """Samples RSS of this process tree and the number of running browsers"""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_browsers = 0
+        self._task = None
+
+    def sample(self):
+        usage = process_tree_usage()
+        if usage is None:  # no psutil: peak RSS / browser count are reported as unavailable
+            return
+        rss, browsers, _ = usage
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_browsers = max(self.peak_browsers, browsers)
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+        self.sample()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_level(companies, concurrency):
+    """Process every company once with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    collection = InMemoryCollection(f'bench_c{concurrency}')
+    latencies = []
+
+    async def timed(company):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await pipeline.process_single_company(collection, company)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+    with ResourceSampler() as sampler:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(timed(c) for c in companies), return_exceptions=True)
+        wall = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'companies': len(companies),
+        'errors': sum(1 for r in results if isinstance(r, Exception)),
+        'wall_s': round(wall, 2),
+        'companies_per_s': round(len(companies) / wall, 3) if wall else 0.0,
+        'p50_s': round(percentile(latencies, 50), 2),
+        'p95_s': round(percentile(latencies, 95), 2),
+        'peak_rss_mb': round(sampler.peak_rss / 2**20, 1) if psutil else None,
+        'peak_browsers': sampler.peak_browsers if psutil else None,
+    }
+
+
+async def benchmark(recording_dir, levels, latency_scale, limit=None):
+    companies = load_manifest(recording_dir)[:limit]
+    replay_llm = ReplayChatModel(recording_dir, latency_scale=latency_scale)
+    reports = []
+
+    with SnapshotServer(recording_dir) as server:
+        print(f"📼 Serving {recording_dir} on {server.address}")
+        # No agent checkpoints or page archive: replays must not touch production state or wait on MongoDB
+        runtime = set_runtime(Runtime(llm=replay_llm, browser_args=DEFAULT_BROWSER_ARGS + server.browser_args(),
+                                      checkpoints=None, archive_dir=None))
+        local_companies = [{**c, 'url': server.local_url(c['url'])} for c in companies]
+
+        for level in levels:
+            print(f"\n{'='*80}")
+            print(f"Benchmark: {len(local_companies)} companies at concurrency {level}")
+            print(f"{'='*80}")
+            replay_llm.cursors.clear()
+            # Fresh fetcher per level so per-domain tier decisions don't carry over
+            runtime.fetcher = TieredFetcher(runtime, tiers_path=None, transport=server.http_transport())
+            reports.append(await run_level(local_companies, level))
+            await runtime.aclose()
+
+    print(f"\n{'='*80}")
+    print("📈 Benchmark results")
+    print(f"{'='*80}")
+    print(f"{'conc':>5} {'co/s':>8} {'p50 s':>8} {'p95 s':>8} {'wall s':>8} {'rss MB':>8} {'browsers':>9} {'errors':>7}")
+    for r in reports:
+        print(f"{r['concurrency']:>5} {r['companies_per_s']:>8} {r['p50_s']:>8} {r['p95_s']:>8} {r['wall_s']:>8} "
+              f"{str(r['peak_rss_mb']):>8} {str(r['peak_browsers']):>9} {r['errors']:>7}")
+    if psutil is None:
+        print("⚠️  psutil not installed: peak RSS and browser count not measured")
+    return reports
+
+
+async def record(recording_dir, limit):
+    """Run the live pipeline once, capturing LLM responses and page snapshots"""
+    companies = pipeline.read_companies_list()[:limit]
+    os.makedirs(recording_dir, exist_ok=True)
+    with open(os.path.join(recording_dir, 'manifest.json'), 'w', encoding='utf-8') as file:
+        json.dump({'recorded_at': datetime.utcnow().isoformat(), 'companies': companies}, file, indent=2)
+
+    set_runtime(Runtime(llm=RecordingChatModel(get_runtime().llm, recording_dir), checkpoints=None, archive_dir=None))
+    for company in companies:
+        await pipeline.process_single_company(None, company)
+
+    urls = recorded_urls(recording_dir) | {c['url'] for c in companies}
+    print(f"\n📸 Snapshotting {len(urls)} pages")
+    for url in sorted(urls):
+        path = snapshot_path(recording_dir, url)
+        if os.path.exists(path):
+            continue
+        try:
+            request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+            with urllib.request.urlopen(request, timeout=20) as response:
+                body = response.read()
+        except Exception as e:
+            print(f"   ⚠️  {url}: {e}")
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(body)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording', help='Recording directory')
+    parser.add_argument('--record', action='store_true', help='Capture a new recording from live sites')
+    parser.add_argument('--limit', type=int, default=None, help='Only use the first N companies')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help='Multiplier on recorded LLM latency (0 = replay instantly)')
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if args.record:
+        await record(args.recording, args.limit)
+        return
+
+    reports = await benchmark(args.recording, args.concurrency, args.latency_scale, args.limit)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(reports, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,4 @@
 import json
-import time
 from deepeval.dataset import EvaluationDataset
 from deepeval.test_case import LLMTestCase
 from deepeval.metrics import AnswerRelevancyMetric
@@ -9,46 +8,33 @@ import asyncio
 import os
 from dotenv import load_dotenv
 from lib.main import extract_job_listings, find_jobs_page
+from lib.eval_dataset import DEFAULT_DATASET_PATH, iter_dataset
+from lib.runtime import Runtime, set_runtime
 
 # Load environment variables
 load_dotenv()
 
-# Set the environment variable so Playwright uses your custom browser path
-os.environ["PLAYWRIGHT_BROWSERS_PATH"] = "/media/mats/3c24094c-800b-4576-a390-d23a6d7a02291/workspace/test_ai_gen/browser_use/.playwright-browsers"
-
 # Configuration for rate limiting
 ENABLE_THROTTLING = True  # Set to False to use parallel evaluation
 THROTTLE_DELAY_SECONDS = 5  # Delay between evaluations in seconds
 
-def create_test_dataset():
-    """Create a simple test dataset for job scraping evaluation"""
-    test_cases = [
-        {
-            "has_job_page_input": "https://www.google.com/careers",
-            "extract_jobs_listings_input": "https://www.google.com/careers",
-            "has_job_page_expected_output": "Should find if the site has a jobs / careers page",
-            "extract_jobs_listings_output": "Should return a list of jobs with url, location and title fields",
-            "description": "Test Google careers page for job listings"
-        },
-        {   
-            "has_job_page_input": "https://www.datarobot.com",    
-            "extract_jobs_listings_input": "https://www.datarobot.com/careers/open-positions/",
+def create_test_dataset(path=DEFAULT_DATASET_PATH):
+    """Create a simple test dataset for job scraping evaluation from the ground-truth dataset"""
+    test_cases = []
+    for record in iter_dataset(path):
+        test_cases.append({
+            "has_job_page_input": record.input_url,
+            "extract_jobs_listings_input": record.expected_jobs_url or record.input_url,
             "has_job_page_expected_output": "Should find if the site has a jobs / careers page",
             "extract_jobs_listings_output": "Should return a list of jobs with url, location and title fields",
-            "description": "Test datarobot careers page for job listings"
-        },
-        # {
-        #     "has_job_page_input": "https://www.cencora.com",    
-        #     "extract_jobs_listings_input": "https://careers.cencora.com/us/en",
-        #     "has_job_page_expected_output": "Should find if the site has a jobs / careers page",
-        #     "extract_jobs_listings_output": "Should return a list of jobs with url, location and title fields",
-        #     "description": "Test Apple jobs page for job listings"
-        # }
-    ]
+            "description": f"Test {record.name} careers page for job listings"
+        })
     return test_cases
 
 async def main():
     print("🚀 Starting LLM Evaluation for Job Scraping")
+    # Eval runs never touch production agent checkpoints or the page archive
+    set_runtime(Runtime(checkpoints=None, archive_dir=None))
     
     # Step 1: Create a dataset
     print("\n1. Creating test dataset...")
@@ -163,7 +149,7 @@ async def main():
                 # Add delay between evaluations
                 if i < len(dataset.test_cases) - 1:  # Don't delay after the last one
                     print(f"   ⏳ Waiting {THROTTLE_DELAY_SECONDS} seconds before next evaluation...")
-                    time.sleep(THROTTLE_DELAY_SECONDS)
+                    await asyncio.sleep(THROTTLE_DELAY_SECONDS)
             
             # Filter out failed evaluations
             results = [r for r in results if r is not None]
@@ -1,5 +1,7 @@
+import argparse
 import json
 import asyncio
+import copy
 import os
 import time
 from datetime import datetime
@@ -8,32 +10,75 @@ from deepeval.dataset import EvaluationDataset
 from deepeval.test_case import LLMTestCase
 from deepeval.metrics import AnswerRelevancyMetric, FaithfulnessMetric
 from deepeval.models import LocalModel
-from deepeval import evaluate
 import traceback
-from pymongo import MongoClient
 from lib.main import (
     extract_job_listings, 
     find_jobs_page, 
     process_single_company,
     process_batch,
     init_mongodb,
-    read_companies_list
+    read_companies_list,
+    FIND_JOBS_PAGE_TASK,
+    EXTRACT_JOB_LISTINGS_TASK,
+    EXTRACT_JOB_LISTINGS_FROM_TEXT_PROMPT,
 )
+from lib.eval_cache import JsonCache, RateLimiter, fingerprint, test_case_hash
+from lib.eval_metrics import score_company, summarize
+from lib.eval_dataset import DEFAULT_DATASET_PATH, load_companies
+from lib.locations import LOCATION_TAGGING_VERSION
+from lib.result_store import InMemoryCollection, new_run_id, eval_collection_name
+from lib.role_classifier import ROLE_TAGGING_VERSION
+from lib.runtime import Runtime, get_runtime, set_runtime
 
 # Load environment variables
 load_dotenv()
 
-# Set the environment variable so Playwright uses your custom browser path
-os.environ["PLAYWRIGHT_BROWSERS_PATH"] = "/media/mats/3c24094c-800b-4576-a390-d23a6d7a02291/workspace/test_ai_gen/browser_use/.playwright-browsers"
+# Scraper outputs and metric scores are cached here between runs
+EVAL_CACHE_DIR = os.getenv('EVAL_CACHE_DIR', '.eval_cache')
+# Limits for concurrent metric scoring against the judge LLM
+METRIC_MAX_CONCURRENCY = 4
+METRIC_MIN_INTERVAL_SECONDS = 1.0
+# Statuses that mean the scraper did not produce a usable answer; never cached. Agent crashes and
+# timeouts end up as *_failed (run_agent_stage raises), not as *_not_found / *_no_jobs_found
+UNCACHEABLE_STATUSES = ('in_progress', 'find_jobs_page_progress', 'extract_job_listings_progress',
+                        'find_jobs_page_failed', 'extract_job_listings_failed')
 
 class DeepEvalJobScrapingEvaluator:
     """LLM-based evaluator for parallel job scraping implementation using DeepEval"""
     
-    def __init__(self):
-        self.collection = init_mongodb()
+    def __init__(self, dataset_path=DEFAULT_DATASET_PATH, shard_index=0, num_shards=1, per_category=None, seed=0,
+                 results_store='mongo', run_id=None):
+        self.run_id = run_id or new_run_id()
+        self.dataset_path = dataset_path
+        self.shard_index = shard_index
+        self.num_shards = num_shards
+        self.per_category = per_category
+        self.seed = seed
+        self.collection = self._setup_results_collection(results_store)
         self.eval_llm = self._setup_evaluation_llm()
         self.metrics = self._setup_metrics()
+        self.scraper_cache = JsonCache(os.path.join(EVAL_CACHE_DIR, 'scraper'))
+        self.metric_cache = JsonCache(os.path.join(EVAL_CACHE_DIR, 'metrics'))
+        self.rate_limiter = RateLimiter(METRIC_MAX_CONCURRENCY, METRIC_MIN_INTERVAL_SECONDS)
         
+    def _setup_results_collection(self, results_store):
+        """Each eval run writes to its own namespace, never to the live company_jobs collection"""
+        if results_store == 'memory':
+            print(f"🗂️  Eval run {self.run_id}: results kept in memory")
+            return InMemoryCollection(eval_collection_name(self.run_id))
+        collection_name = eval_collection_name(self.run_id)
+        collection = init_mongodb(collection_name)
+        if collection is None:
+            print(f"⚠️  MongoDB unavailable, keeping eval run {self.run_id} results in memory")
+            return InMemoryCollection(collection_name)
+        print(f"🗂️  Eval run {self.run_id}: results stored in collection {collection_name}")
+        return collection
+
+    def drop_results(self):
+        """Remove this run's results namespace"""
+        self.collection.drop()
+        print(f"🧹 Dropped results for eval run {self.run_id}")
+
     def _setup_evaluation_llm(self):
         """Setup the evaluation LLM"""
         try:
@@ -64,54 +109,39 @@ class DeepEvalJobScrapingEvaluator:
             print(f"⚠️  Warning: Could not configure metrics: {e}")
             metrics = [AnswerRelevancyMetric()]  # Fallback to basic metric
         return metrics
+
+    def _judge_model_name(self):
+        """Name of the judge model, part of every metric cache key"""
+        if self.eval_llm is not None:
+            return self.eval_llm.get_model_name()
+        return 'default'
+
+    def _scraper_cache_key(self, company):
+        """Scraper output depends on the company, the agent prompts, the agent model and the local job tagging"""
+        return fingerprint(company['name'], company['url'], FIND_JOBS_PAGE_TASK, EXTRACT_JOB_LISTINGS_TASK,
+                           EXTRACT_JOB_LISTINGS_FROM_TEXT_PROMPT, get_runtime().llm_model,
+                           ROLE_TAGGING_VERSION, LOCATION_TAGGING_VERSION)
+
+    def _cacheable_result(self, company_result):
+        """Subset of a company_jobs document that the evaluation reads"""
+        return {
+            'has_job_page': company_result.get('has_job_page', False),
+            'jobs_page_url': company_result.get('jobs_page_url', None),
+            'status': company_result.get('status', 'unknown'),
+            'jobs': company_result.get('jobs', []),
+        }
     
     def create_test_companies(self):
-        """Create a test dataset of companies for evaluation"""
-        test_companies = [
-            {
-                "name": "Google",
-                "url": "https://www.google.com/careers",
-                "expected_has_jobs": True,
-                "expected_jobs_url": "https://www.google.com/careers/jobs/results/",
-                "category": "large_tech"
-            },
-            {
-                "name": "DataRobot",
-                "url": "https://www.datarobot.com",
-                "expected_has_jobs": True,
-                "expected_jobs_url": "https://www.datarobot.com/careers/",
-                "category": "ai_company"
-            },
-            {
-                "name": "GitHub",
-                "url": "https://github.com",
-                "expected_has_jobs": True,
-                "expected_jobs_url": "https://github.com/about/careers",
-                "category": "dev_platform"
-            },
-            {
-                "name": "cencora",
-                "url": "https://www.cencora.com",
-                "expected_has_jobs": True,
-                "expected_jobs_url": "https://careers.cencora.com/us/en",
-                "category": "dev_platform"
-            },
-            {
-                "name": "brainstormforce",
-                "url": "https://brainstormforce.com",
-                "expected_has_jobs": True,
-                "expected_jobs_url": "https://brainstormforce.com/join/",
-                "category": "dev_platform"
-            },
-                        {
-                "name": "buffer",
-                "url": "https://buffer.com",
-                "expected_has_jobs": True,
-                "expected_jobs_url": "https://buffer.com/journey",
-                "category": "dev_platform"
-            }
-
-        ]
+        """Load this worker's shard (and optional per-category sample) of the eval dataset"""
+        test_companies = load_companies(
+            self.dataset_path,
+            shard_index=self.shard_index,
+            num_shards=self.num_shards,
+            per_category=self.per_category,
+            seed=self.seed,
+        )
+        print(f"📂 Loaded {len(test_companies)} companies from {self.dataset_path} "
+              f"(shard {self.shard_index + 1}/{self.num_shards})")
         return test_companies
 
     async def create_llm_evaluation_dataset_using_main_functions(self):
@@ -121,24 +151,27 @@ class DeepEvalJobScrapingEvaluator:
         
         # Get test companies
         test_companies = self.create_test_companies()
+        self.test_companies = test_companies
         print(f"Found {len(test_companies)} test companies")
-        
-        # Clear previous evaluation results for these companies
-        if self.collection is not None:
-            for company in test_companies:
-                self.collection.delete_many({
-                    'company_name': company['name'], 
-                    'company_url': company['url']
-                })
-            print("🧹 Cleared previous evaluation results")
+
+        # Reuse scraper outputs produced with the same prompts and model
+        cached_results = {}
+        to_scrape = []
+        for company in test_companies:
+            cached = self.scraper_cache.get(self._scraper_cache_key(company))
+            if cached is not None:
+                cached_results[company['name']] = cached
+            else:
+                to_scrape.append(company)
+        print(f"♻️  {len(cached_results)} companies cached, {len(to_scrape)} to scrape")
         
         # Use the existing batch processing from main.py
         batch_size = 3  # Small batches for evaluation
-        batches = [test_companies[i:i + batch_size] for i in range(0, len(test_companies), batch_size)]
+        batches = [to_scrape[i:i + batch_size] for i in range(0, len(to_scrape), batch_size)]
         total_batches = len(batches)
         
         print(f"\nStarting batch processing using main.py functions:")
-        print(f"📊 Total companies: {len(test_companies)}")
+        print(f"📊 Total companies: {len(to_scrape)}")
         print(f"📦 Batch size: {batch_size}")
         print(f"🔢 Total batches: {total_batches}")
         print(f"⚡ Using existing process_batch and process_single_company functions")
@@ -176,18 +209,20 @@ class DeepEvalJobScrapingEvaluator:
         print(f"📈 Summary:")
         print(f"   ✅ Total successful: {total_successful}")
         print(f"   ❌ Total failed: {total_failed}")
-        print(f"   📊 Success rate: {(total_successful/(total_successful+total_failed)*100):.1f}%")
+        if total_successful + total_failed:
+            print(f"   📊 Success rate: {(total_successful/(total_successful+total_failed)*100):.1f}%")
         print(f"   ⏱️  Total time: {total_duration:.1f} seconds")
         
         # Now read the results from MongoDB to create evaluation dataset
-        return await self._create_dataset_from_mongodb_results(test_companies)
+        return await self._create_dataset_from_mongodb_results(test_companies, cached_results)
     
-    async def _create_dataset_from_mongodb_results(self, test_companies):
-        """Create DeepEval dataset from MongoDB results"""
+    async def _create_dataset_from_mongodb_results(self, test_companies, cached_results=None):
+        """Create DeepEval dataset from cached scraper outputs and MongoDB results"""
         print("\n📋 Creating DeepEval Dataset from MongoDB Results")
         print("-" * 60)
         
-        if self.collection is None:
+        cached_results = cached_results or {}
+        if self.collection is None and not cached_results:
             print("❌ No MongoDB collection available")
             return EvaluationDataset(), []
         
@@ -195,15 +230,21 @@ class DeepEvalJobScrapingEvaluator:
         all_results = []
         
         for company in test_companies:
-            # Query MongoDB for this company's results
-            company_result = self.collection.find_one({
-                'company_name': company['name'],
-                'company_url': company['url']
-            })
+            company_result = cached_results.get(company['name'])
+            if company_result is None and self.collection is not None:
+                # Query MongoDB for this company's results
+                company_result = self.collection.find_one({
+                    'company_name': company['name'],
+                    'company_url': company['url']
+                })
+                if company_result:
+                    company_result = self._cacheable_result(company_result)
+                    if company_result['status'] not in UNCACHEABLE_STATUSES:
+                        self.scraper_cache.set(self._scraper_cache_key(company), company_result)
             
             if company_result:
                 print(f"📊 Processing results for {company['name']}")
-                all_results.append(company_result)
+                all_results.append({**company_result, 'company_name': company['name']})
                 
                 # Create test case for find_jobs_page functionality
                 fjp_test_case = LLMTestCase(
@@ -226,7 +267,7 @@ class DeepEvalJobScrapingEvaluator:
                             'jobs': company_result['jobs'][:3] if len(company_result['jobs']) > 3 else company_result['jobs'],  # Limit to first 3 for readability
                             'status': company_result.get('status', 'unknown')
                         }),
-                        expected_output=f"Should extract job listings with title, location, and URL fields for {company['name']}. Should focus on tech roles like Web, Fullstack, Backend, Software Engineer/Developer. Found {len(company_result['jobs'])} jobs."
+                        expected_output=f"Should extract job listings with title, location, and URL fields for {company['name']}. Should include all listed roles, not only engineering ones. Found {len(company_result['jobs'])} jobs."
                     )
                     dataset.add_test_case(ejl_test_case)
                     
@@ -236,8 +277,61 @@ class DeepEvalJobScrapingEvaluator:
         print(f"\n📋 Created {len(dataset.test_cases)} test cases for LLM evaluation")
         return dataset, all_results
     
+    def run_deterministic_evaluation(self, test_companies, processing_results):
+        """Score both stages against ground truth without an LLM judge"""
+        print("\n📏 Running Deterministic Evaluation")
+        print("=" * 60)
+
+        results_by_name = {result['company_name']: result for result in processing_results}
+        scores = [score_company(company, results_by_name.get(company['name'])) for company in test_companies]
+
+        for score in scores:
+            stage1 = score['find_jobs_page']
+            stage2 = score['extract_job_listings']
+            line = (f"  {score['name']:<24} has_jobs={'✅' if stage1['has_jobs_correct'] else '❌'} "
+                    f"url={'✅' if stage1['url_match'] else '❌'}")
+            if stage2 is not None:
+                line += f" titles P/R={stage2['title_precision']:.2f}/{stage2['title_recall']:.2f}"
+                if stage2['url_precision'] is not None:
+                    line += f" urls P/R={stage2['url_precision']:.2f}/{stage2['url_recall']:.2f}"
+            if not score['scraped']:
+                line += " (no scraper result)"
+            print(line)
+
+        summary = summarize(scores)
+        print(f"\n📈 Deterministic Summary:")
+        for field, value in summary.items():
+            print(f"  {field}: {value:.3f}" if isinstance(value, float) else f"  {field}: {value}")
+        return scores, summary
+
+    async def _measure(self, test_case, metric):
+        """Score one test case with one metric, memoised by (test case, metric, judge model)"""
+        metric_name = metric.__class__.__name__
+        key = fingerprint(test_case_hash(test_case), metric_name, self._judge_model_name())
+        cached = self.metric_cache.get(key)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        # Metrics keep score/reason on the instance, so each concurrent call gets its own copy
+        scorer = copy.copy(metric)
+        try:
+            async with self.rate_limiter:
+                await scorer.a_measure(test_case, _show_indicator=False)
+        except Exception as e:
+            print(f"   ❌ {metric_name} failed: {e}")
+            return {'metric': metric_name, 'score': None, 'success': False, 'reason': None, 'error': str(e), 'cached': False}
+
+        result = {
+            'metric': metric_name,
+            'score': scorer.score,
+            'success': scorer.is_successful(),
+            'reason': scorer.reason,
+        }
+        self.metric_cache.set(key, result)
+        return {**result, 'cached': False}
+
     async def run_llm_evaluation(self, dataset):
-        """Run LLM-based evaluation"""
+        """Run LLM-based evaluation, scoring test cases concurrently under the rate limiter"""
         print("\n🎯 Running LLM Evaluation with DeepEval")
         print("=" * 60)
         
@@ -251,33 +345,36 @@ class DeepEvalJobScrapingEvaluator:
         
         try:
             print(f"📊 Evaluating {len(dataset.test_cases)} test cases...")
-            results = evaluate(
-                test_cases=dataset.test_cases,
-                metrics=self.metrics
-            )
+            start_time = time.monotonic()
+            scores = await asyncio.gather(*[
+                asyncio.gather(*[self._measure(test_case, metric) for metric in self.metrics])
+                for test_case in dataset.test_cases
+            ])
+            duration = time.monotonic() - start_time
             
             print("✅ LLM Evaluation completed!")
             
             # Print detailed results
             print("\n📊 Detailed LLM Evaluation Results:")
             print("-" * 60)
-            for i, test_case in enumerate(dataset.test_cases):
+            results = []
+            for i, (test_case, test_case_scores) in enumerate(zip(dataset.test_cases, scores)):
                 print(f"\nTest Case {i+1}:")
                 print(f"  Input: {test_case.input[:80]}...")
                 print(f"  Expected: {test_case.expected_output[:80]}...")
                 print(f"  Actual: {test_case.actual_output[:80]}..." if test_case.actual_output else "  Actual: None")
-                
-                # Try to extract scores from results
-                try:
-                    if hasattr(test_case, 'score') and test_case.score is not None:
-                        print(f"  Score: {test_case.score}")
-                except:
-                    pass
+                for score in test_case_scores:
+                    cached = " (cached)" if score['cached'] else ""
+                    print(f"  {score['metric']}: {score['score']}{cached}")
+                results.append({'input': test_case.input, 'scores': test_case_scores})
             
             # Summary statistics
+            all_scores = [score for test_case_scores in scores for score in test_case_scores]
             print(f"\n📈 Evaluation Summary:")
             print(f"  Total test cases: {len(dataset.test_cases)}")
             print(f"  Metrics used: {len(self.metrics)}")
+            print(f"  Scores reused from cache: {sum(1 for score in all_scores if score['cached'])}/{len(all_scores)}")
+            print(f"  Scoring time: {duration:.1f} seconds")
             
             return results
             
@@ -286,19 +383,51 @@ class DeepEvalJobScrapingEvaluator:
             traceback.print_exc()
             return None
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate the job scraping pipeline")
+    parser.add_argument('--llm-judge', action='store_true',
+                        help='Also score test cases with the DeepEval LLM judge after the deterministic metrics')
+    parser.add_argument('--dataset', default=DEFAULT_DATASET_PATH, help='Ground-truth dataset (JSONL)')
+    parser.add_argument('--shard-index', type=int, default=0, help='Which shard this worker evaluates (0-based)')
+    parser.add_argument('--num-shards', type=int, default=1, help='Total number of eval workers')
+    parser.add_argument('--per-category', type=int, default=None,
+                        help='Sample at most N companies per category')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for per-category sampling')
+    parser.add_argument('--results-store', choices=['mongo', 'memory'], default='mongo',
+                        help='Where this run writes scraper results (a run-scoped collection or memory)')
+    parser.add_argument('--run-id', default=None, help='Reuse a results namespace instead of starting a new one')
+    parser.add_argument('--drop-results', action='store_true', help='Drop the run-scoped results when done')
+    return parser.parse_args()
+
 async def main():
     """Main evaluation function - uses existing main.py functions directly"""
+    args = parse_args()
+    # Eval runs never touch production agent checkpoints or the page archive
+    set_runtime(Runtime(checkpoints=None, archive_dir=None))
     print("🚀 Starting DeepEval LLM Evaluation Using Existing main.py Functions")
     print("=" * 80)
     
-    evaluator = DeepEvalJobScrapingEvaluator()
+    evaluator = DeepEvalJobScrapingEvaluator(
+        dataset_path=args.dataset,
+        shard_index=args.shard_index,
+        num_shards=args.num_shards,
+        per_category=args.per_category,
+        seed=args.seed,
+        results_store=args.results_store,
+        run_id=args.run_id,
+    )
     
     try:
         # Use existing main.py functions to process companies and create evaluation dataset
         print("\n🔄 Using existing process_batch and process_single_company functions...")
         dataset, processing_results = await evaluator.create_llm_evaluation_dataset_using_main_functions()
+
+        # Fast ground-truth scoring always runs; the LLM judge is an optional second pass
+        evaluator.run_deterministic_evaluation(evaluator.test_companies, processing_results)
         
-        if len(dataset.test_cases) > 0:
+        if not args.llm_judge:
+            print("\nℹ️  Skipping LLM judge (pass --llm-judge to enable)")
+        elif len(dataset.test_cases) > 0:
             # Run LLM evaluation
             await evaluator.run_llm_evaluation(dataset)
             
@@ -311,6 +440,10 @@ async def main():
     except Exception as e:
         print(f"❌ Evaluation failed: {e}")
         traceback.print_exc()
+    finally:
+        if args.drop_results:
+            evaluator.drop_results()
+        await get_runtime().aclose()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,209 @@
+"""Checkpoints of agent progress, so a crashed or timed-out agent run resumes where it stopped.
+
+After every agent step the CheckpointRecorder stores, per company and stage
+('find' or 'extract'): the page the agent is on, the pages it visited, the
+jobs its extractions produced so far and how many steps it took. A run that
+finishes clears the checkpoint, whatever it found; a crash or timeout marks
+the recorder interrupted and leaves the checkpoint, and the next attempt (the
+in-process retry or a later pipeline run) starts on the last page with a note
+of what was already done instead of at the homepage. Jobs collected before
+the interruption are merged into the final result.
+
+Checkpoints go to the `agent_checkpoints` collection when MONGO_DB_URI is set
+and the server answers, else to JSON files under AGENT_CHECKPOINT_DIR (or the
+default directory). Store calls run on the Mongo pool's executor, never on
+the event loop. Benchmarks and evals pass `Runtime(checkpoints=None)`.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+from pydantic import BaseModel, Field
+
+from lib.mongo_pool import get_mongo_pool
+from lib.result_recovery import parse_result
+
+CHECKPOINT_COLLECTION = 'agent_checkpoints'
+DEFAULT_CHECKPOINT_DIR = '.cache/agent_checkpoints'
+# Older checkpoints describe a site that may have changed since; start over instead
+MAX_CHECKPOINT_AGE = timedelta(hours=24)
+# Visited pages listed in the resume note
+MAX_NOTE_URLS = 15
+
+RESUME_NOTE = '''
+            An earlier attempt at this task was interrupted after {steps} steps; continue it, don't start over.
+            - It stopped on {current_url}, which is already open.
+            - Pages already visited: {visited}
+            - {job_count} jobs were already collected there; only look for jobs not collected yet and
+              include every job you find in the final answer.
+        '''
+
+
+class AgentCheckpoint(BaseModel):
+    company_url: str
+    stage: str
+    current_url: str | None = None
+    visited: list[str] = Field(default_factory=list)
+    jobs: list[dict] = Field(default_factory=list)
+    steps: int = 0
+    attempts: int = 1
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class FileCheckpointStore:
+    """One JSON file per company and stage"""
+
+    def __init__(self, root=DEFAULT_CHECKPOINT_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, company_url, stage):
+        key = hashlib.sha256(f'{stage}:{company_url}'.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.root, f'{key}.json')
+
+    def load(self, company_url, stage):
+        try:
+            with open(self._path(company_url, stage), 'r', encoding='utf-8') as file:
+                return AgentCheckpoint.model_validate_json(file.read())
+        except (OSError, ValueError):
+            return None
+
+    def save(self, checkpoint):
+        path = self._path(checkpoint.company_url, checkpoint.stage)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            file.write(checkpoint.model_dump_json())
+        os.replace(path + '.tmp', path)
+
+    def clear(self, company_url, stage):
+        try:
+            os.remove(self._path(company_url, stage))
+        except FileNotFoundError:
+            pass
+
+
+class MongoCheckpointStore:
+    """One document per company and stage in the agent_checkpoints collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def load(self, company_url, stage):
+        document = self.collection.find_one({'company_url': company_url, 'stage': stage}, {'_id': 0})
+        return AgentCheckpoint.model_validate(document) if document else None
+
+    def save(self, checkpoint):
+        self.collection.update_one({'company_url': checkpoint.company_url, 'stage': checkpoint.stage},
+                                   {'$set': checkpoint.model_dump()}, upsert=True)
+
+    def clear(self, company_url, stage):
+        self.collection.delete_one({'company_url': company_url, 'stage': stage})
+
+
+def open_checkpoint_store():
+    """File store under AGENT_CHECKPOINT_DIR if set, else MongoDB if configured and reachable, else files
+
+    Blocks for up to the server selection timeout the first time MongoDB is
+    probed; the pipeline's startup health check has usually answered already.
+    """
+    checkpoint_dir = os.getenv('AGENT_CHECKPOINT_DIR')
+    if not checkpoint_dir and os.getenv('MONGO_DB_URI'):
+        pool = get_mongo_pool()
+        if pool.reachable():
+            return MongoCheckpointStore(pool.collection(CHECKPOINT_COLLECTION))
+        print("⚠️  MongoDB unreachable, agent checkpoints go to local files")
+    return FileCheckpointStore(checkpoint_dir or DEFAULT_CHECKPOINT_DIR)
+
+
+def merge_jobs(jobs, earlier_jobs):
+    """Jobs from earlier attempts that the final answer doesn't already have (by url)"""
+    seen = {job.get('url') for job in jobs}
+    return [job for job in earlier_jobs if job.get('url') not in seen]
+
+
+class CheckpointRecorder:
+    """Resumes from the last checkpoint of a company stage and saves a new one after every agent step
+
+    Create it with `await CheckpointRecorder.open(...)`, which loads the last
+    checkpoint off the event loop.
+    """
+
+    def __init__(self, store, company_url, stage, output_model=None, resumed=None):
+        self.store = store
+        self.company_url = company_url
+        self.stage = stage
+        self.output_model = output_model
+        self.resumed = resumed
+        # Set by the caller when the run crashed or timed out, i.e. a retry could resume it
+        self.interrupted = False
+        self.checkpoint = AgentCheckpoint(
+            company_url=company_url, stage=stage,
+            attempts=self.resumed.attempts + 1 if self.resumed else 1,
+            jobs=list(self.resumed.jobs) if self.resumed else [],
+            visited=list(self.resumed.visited) if self.resumed else [])
+
+    @classmethod
+    async def open(cls, runtime, company_url, stage, output_model=None):
+        pool = get_mongo_pool()
+        # Resolving the store may probe MongoDB, so it happens off the event loop too
+        store = await pool.run(lambda: runtime.checkpoints)
+        resumed = None
+        if store is not None:
+            try:
+                checkpoint = await pool.run(store.load, company_url, stage)
+            except Exception as e:
+                print(f"Could not load checkpoint for {company_url}: {e}")
+                checkpoint = None
+            if checkpoint is not None and datetime.utcnow() - checkpoint.updated_at < MAX_CHECKPOINT_AGE:
+                resumed = checkpoint
+        return cls(store, company_url, stage, output_model, resumed)
+
+    @property
+    def start_url(self):
+        """Where the agent should begin: the page the last attempt stopped on, if any"""
+        return self.resumed.current_url if self.resumed and self.resumed.current_url else None
+
+    def resume_note(self):
+        if self.resumed is None:
+            return ''
+        visited = self.resumed.visited[-MAX_NOTE_URLS:]
+        return RESUME_NOTE.format(steps=self.resumed.steps, current_url=self.resumed.current_url,
+                                  visited=', '.join(visited) or 'none', job_count=len(self.resumed.jobs))
+
+    def _collect(self, history):
+        for url in history.urls():
+            if url and url not in self.checkpoint.visited:
+                self.checkpoint.visited.append(url)
+        if self.output_model is None or 'results' not in self.output_model.model_fields:
+            return
+        for content in history.extracted_content() or []:
+            parsed, _ = parse_result(content, self.output_model)
+            if parsed is not None:
+                found = [job.model_dump() for job in parsed.results]
+                self.checkpoint.jobs.extend(merge_jobs(self.checkpoint.jobs, found))
+
+    async def on_step_end(self, agent):
+        """Agent hook: snapshot progress; never fails the step"""
+        if self.store is None:
+            return
+        try:
+            history = agent.state.history
+            self._collect(history)
+            page = await agent.browser_session.get_current_page()
+            self.checkpoint.current_url = page.url
+            self.checkpoint.steps = (self.resumed.steps if self.resumed else 0) + len(history.history)
+            self.checkpoint.updated_at = datetime.utcnow()
+            await get_mongo_pool().run(self.store.save, self.checkpoint.model_copy(deep=True))
+        except Exception as e:
+            print(f"Could not checkpoint {self.company_url}: {e}")
+
+    def earlier_jobs(self, jobs):
+        """Jobs collected by this and earlier attempts that are missing from `jobs` (dicts)"""
+        return merge_jobs(jobs, self.checkpoint.jobs)
+
+    async def clear(self):
+        if self.store is None:
+            return
+        try:
+            await get_mongo_pool().run(self.store.clear, self.company_url, self.stage)
+        except Exception as e:
+            print(f"Could not clear checkpoint for {self.company_url}: {e}")
@@ -0,0 +1,204 @@
+"""Resource-aware autoscaling of how many companies (and so agent browsers) run at once.
+
+A ConcurrencyLimiter replaces the fixed per-batch semaphore; the Autoscaler
+samples host CPU, available memory and the RSS of the browsers this process
+started, and moves the limit between `min_workers` and `max_workers`:
+
+- memory below `drain_memory_mb`: drain, i.e. drop to `min_workers` and let
+  running companies finish without starting new ones beyond that
+- CPU above target or not enough memory for another browser: one worker less
+- CPU well below target, memory for another browser and work waiting: one more
+
+Lowering the limit never cancels a running company. psutil gives per-browser
+RSS; without it CPU comes from the load average, memory from /proc/meminfo and
+a browser is assumed to need `default_browser_mb`.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from pydantic import BaseModel
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class AutoscalerConfig(BaseModel):
+    min_workers: int = 1
+    max_workers: int = 8
+    initial_workers: int = 2
+    target_cpu_percent: float = 75.0
+    # Below this much available memory no new browsers start until it recovers
+    drain_memory_mb: float = 1024
+    default_browser_mb: float = 500
+    interval_s: float = 5.0
+    # Samples to wait after a change before scaling up again, so a new browser shows up in the numbers
+    cooldown_samples: int = 2
+
+
+class ResourceSample(BaseModel):
+    cpu_percent: float
+    available_memory_mb: float
+    tree_rss_mb: float | None = None
+    browsers: int | None = None
+    browser_rss_mb: float | None = None  # average per top-level browser, renderers included
+
+
+def process_tree_usage():
+    """(RSS bytes of this process tree, browsers, RSS bytes of those browsers); None without psutil"""
+    if psutil is None:
+        return None
+    root = psutil.Process()
+    rss = 0
+    browsers = 0
+    browser_rss = 0
+    for proc in [root] + root.children(recursive=True):
+        try:
+            proc_rss = proc.memory_info().rss
+            rss += proc_rss
+            if 'chrom' in proc.name().lower():
+                browser_rss += proc_rss
+                # One browser == one top-level chrome process, not its renderers
+                if not any('--type=' in arg for arg in proc.cmdline()):
+                    browsers += 1
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return rss, browsers, browser_rss
+
+
+def _available_memory_mb():
+    if psutil is not None:
+        return psutil.virtual_memory().available / 2**20
+    try:
+        with open('/proc/meminfo', 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float('inf')
+
+
+def _cpu_percent():
+    if psutil is not None:
+        return psutil.cpu_percent(interval=None)
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+    except OSError:
+        return 0.0
+
+
+def sample_resources():
+    sample = ResourceSample(cpu_percent=_cpu_percent(), available_memory_mb=_available_memory_mb())
+    usage = process_tree_usage()
+    if usage is not None:
+        rss, browsers, browser_rss = usage
+        sample.tree_rss_mb = rss / 2**20
+        sample.browsers = browsers
+        sample.browser_rss_mb = browser_rss / browsers / 2**20 if browsers else None
+    return sample
+
+
+class ConcurrencyLimiter:
+    """Semaphore whose limit can be changed while tasks hold it"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self.active < self.limit)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.active -= 1
+                self._condition.notify_all()
+
+    async def set_limit(self, limit):
+        async with self._condition:
+            self.limit = limit
+            self._condition.notify_all()
+
+
+class Autoscaler:
+    """Background task that resizes a ConcurrencyLimiter from resource samples"""
+
+    def __init__(self, config=None, limiter=None, sampler=sample_resources):
+        self.config = config or AutoscalerConfig()
+        self.limiter = limiter or ConcurrencyLimiter(
+            min(max(self.config.initial_workers, self.config.min_workers), self.config.max_workers))
+        self.sampler = sampler
+        self.history = []  # (limit, sample) per decision, for the run summary
+        self._cooldown = 0
+        self._task = None
+
+    def decide(self, sample):
+        """(new worker limit, reason) for one resource sample"""
+        config = self.config
+        limit = self.limiter.limit
+        browser_mb = sample.browser_rss_mb or config.default_browser_mb
+        headroom_mb = sample.available_memory_mb - config.drain_memory_mb
+
+        if headroom_mb < 0:
+            return config.min_workers, 'draining, memory low'
+        if sample.cpu_percent > config.target_cpu_percent or headroom_mb < browser_mb:
+            return max(config.min_workers, limit - 1), 'under pressure'
+        saturated = self.limiter.active >= limit and self.limiter.waiting > 0
+        if (saturated and self._cooldown == 0 and sample.cpu_percent < config.target_cpu_percent - 15
+                and headroom_mb > 2 * browser_mb):
+            return min(config.max_workers, limit + 1), 'spare capacity'
+        return limit, None
+
+    async def step(self):
+        sample = await asyncio.to_thread(self.sampler)
+        limit, reason = self.decide(sample)
+        self._cooldown = max(0, self._cooldown - 1)
+        if limit != self.limiter.limit:
+            browsers = '?' if sample.browsers is None else sample.browsers
+            print(f"⚖️  Workers {self.limiter.limit} -> {limit} ({reason}: CPU {sample.cpu_percent:.0f}%, "
+                  f"{sample.available_memory_mb:.0f} MB free, {browsers} browsers)")
+            self._cooldown = self.config.cooldown_samples
+            await self.limiter.set_limit(limit)
+        self.history.append((limit, sample))
+        return limit
+
+    async def _run(self):
+        # Prime psutil's CPU counter, its first reading is meaningless
+        await asyncio.to_thread(self.sampler)
+        while True:
+            await asyncio.sleep(self.config.interval_s)
+            try:
+                await self.step()
+            except Exception as e:
+                print(f"Autoscaler sample failed: {e}")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
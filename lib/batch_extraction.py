@@ -0,0 +1,164 @@
+"""Batched structured-output extraction over jobs pages that were already fetched and pruned.
+
+One LLM call per page pays the prompt overhead and round trip every time. The
+BatchExtractor collects pages submitted by concurrently running companies for
+up to `max_wait_s`, packs them into calls under `max_input_tokens` (estimated
+from characters) and `max_pages`, and asks for one ExtractJobListingsOp per
+page id. Each page's jobs are validated separately: jobs without a title or
+url are dropped, relative urls resolved, duplicates removed. Pages missing
+from the answer, or every page of a call that failed, go through the single
+page prompt instead.
+
+Chat models with `batch_prompts = False` (the replay and recording models in
+lib.replay, which key responses on the one task url of a prompt) get every
+page through the single page prompt, so batching never reaches a recording.
+
+    runtime.batch_extractor = BatchExtractor(runtime)
+    jobs = await runtime.batch_extractor.extract(url, content.pruned_text())
+"""
+import asyncio
+from urllib.parse import urljoin
+
+from pydantic import BaseModel
+
+from lib.main import ResultJob, extract_job_listings_from_text
+
+DEFAULT_MAX_INPUT_TOKENS = 24000
+DEFAULT_MAX_PAGES = 8
+DEFAULT_MAX_WAIT_S = 1.0
+# Rough tokens per character of pruned page text, and per page for its header
+CHARS_PER_TOKEN = 4
+PAGE_OVERHEAD_TOKENS = 20
+
+BATCH_EXTRACT_PROMPT = '''
+            Goal: extract the open jobs listed on each of the {count} pages below.
+            - Every page starts with a line "=== PAGE <id>: <url> ===". Links are written as [text](url).
+            - Extract all job listings, whatever the role (roles are filtered locally afterwards).
+            - For each job return the job title, location and the job url.
+            - Return exactly one entry per page id, with an empty list for a page without jobs.
+            - Never put a job under a page it is not listed on.
+
+            {pages}
+        '''
+
+
+class PageJobs(BaseModel):
+    page_id: int
+    results: list[ResultJob]
+
+
+class BatchExtractJobListingsOp(BaseModel):
+    pages: list[PageJobs]
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + PAGE_OVERHEAD_TOKENS
+
+
+def clean_jobs(page_url, jobs):
+    """Jobs of one page with a title and an absolute url, first occurrence of each url kept"""
+    cleaned = {}
+    for job in jobs:
+        title = (job.job_title or '').strip()
+        url = (job.url or '').strip()
+        if not title or not url:
+            continue
+        url = urljoin(page_url, url)
+        if url not in cleaned:
+            cleaned[url] = job.model_copy(update={'job_title': title, 'url': url})
+    return list(cleaned.values())
+
+
+async def extract_batch(pages, runtime):
+    """{index: jobs} for a list of (url, page_text); pages the model left out are missing"""
+    from browser_use.llm.messages import UserMessage
+
+    sections = '\n\n'.join(f'=== PAGE {index}: {url} ===\n{text}' for index, (url, text) in enumerate(pages))
+    prompt = BATCH_EXTRACT_PROMPT.format(count=len(pages), pages=sections)
+    response = await runtime.llm.ainvoke([UserMessage(content=prompt)], output_format=BatchExtractJobListingsOp)
+
+    results = {}
+    for page in response.completion.pages:
+        if 0 <= page.page_id < len(pages):
+            results.setdefault(page.page_id, []).extend(page.results)
+    return {index: clean_jobs(pages[index][0], jobs) for index, jobs in results.items()}
+
+
+class BatchExtractor:
+    """Micro-batches extraction requests from concurrent companies into token-budgeted LLM calls"""
+
+    def __init__(self, runtime, max_input_tokens=DEFAULT_MAX_INPUT_TOKENS, max_pages=DEFAULT_MAX_PAGES,
+                 max_wait_s=DEFAULT_MAX_WAIT_S):
+        self.runtime = runtime
+        self.max_input_tokens = max_input_tokens
+        self.max_pages = max_pages
+        self.max_wait_s = max_wait_s
+        self.pending = []  # (url, page_text, future)
+        self.pending_tokens = 0
+        self.counters = {'pages': 0, 'calls': 0, 'batched_pages': 0, 'fallbacks': 0, 'failed_calls': 0}
+        self._timer = None
+        self._tasks = set()
+
+    async def extract(self, url, page_text):
+        """Jobs on one page, extracted together with whatever else is pending"""
+        if not getattr(self.runtime.llm, 'batch_prompts', True):
+            self.counters['pages'] += 1
+            self.counters['calls'] += 1
+            return clean_jobs(url, await extract_job_listings_from_text(url, page_text, self.runtime))
+        tokens = estimate_tokens(page_text)
+        if self.pending and self.pending_tokens + tokens > self.max_input_tokens:
+            self._flush()
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((url, page_text, future))
+        self.pending_tokens += tokens
+        self.counters['pages'] += 1
+        if len(self.pending) >= self.max_pages or self.pending_tokens >= self.max_input_tokens:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait_s, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending, self.pending_tokens = self.pending, [], 0
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        results = {}
+        if len(batch) > 1:
+            self.counters['calls'] += 1
+            try:
+                results = await extract_batch([(url, text) for url, text, _ in batch], self.runtime)
+                self.counters['batched_pages'] += len(results)
+                self.counters['fallbacks'] += len(batch) - len(results)
+            except Exception as e:
+                self.counters['failed_calls'] += 1
+                self.counters['fallbacks'] += len(batch)
+                print(f"Batched extraction of {len(batch)} pages failed, extracting one by one: {e}")
+        await asyncio.gather(*(self._resolve(url, text, future, results.get(index))
+                               for index, (url, text, future) in enumerate(batch)))
+
+    async def _resolve(self, url, page_text, future, jobs):
+        if future.done():
+            return
+        if jobs is None:
+            self.counters['calls'] += 1
+            try:
+                jobs = clean_jobs(url, await extract_job_listings_from_text(url, page_text, self.runtime))
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+        if not future.done():
+            future.set_result(jobs)
+
+    async def aclose(self):
+        """Extract whatever is still pending and wait for running calls"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
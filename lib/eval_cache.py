@@ -0,0 +1,73 @@
+"""On-disk caches and rate limiting for the evaluation pipeline"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+
+def fingerprint(*parts):
+    """Stable hash of any JSON-serialisable parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def test_case_hash(test_case):
+    """Hash of the fields a metric actually looks at"""
+    return fingerprint(
+        test_case.input,
+        test_case.actual_output,
+        test_case.expected_output,
+        getattr(test_case, 'retrieval_context', None),
+    )
+
+
+class JsonCache:
+    """One JSON file per key under a cache directory
+
+    Separate files keep concurrent writers from clobbering each other and let a
+    single stale entry be deleted by hand.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def set(self, key, value):
+        # Write-then-rename so a crash never leaves a half-written entry behind
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(value, file, default=str)
+        os.replace(tmp_path, self._path(key))
+
+
+class RateLimiter:
+    """Caps concurrent calls and spaces out call starts by `min_interval` seconds"""
+
+    def __init__(self, max_concurrent=4, min_interval=0.0):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._last_start = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        async with self._lock:
+            wait = self._last_start + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_start = time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
@@ -0,0 +1,113 @@
+"""Versioned JSONL ground-truth dataset for the eval harness.
+
+The first line of a dataset file is a header, every following line one company:
+
+    {"format": "job-scraper-eval", "version": 1}
+    {"name": "Buffer", "input_url": "https://buffer.com", "expected_has_jobs": true,
+     "expected_jobs_url": "https://buffer.com/journey", "category": "dev_platform",
+     "expected_jobs": [{"job_title": "...", "url": "...", "location": "..."}]}
+
+`expected_jobs` is the set of open jobs the company lists, the ground truth for
+stage 2 (extract_job_listings). Each job needs a `job_title`; `url` and
+`location` are optional. It is optional per company: null (or missing) means
+no stage 2 ground truth, an empty list means the jobs page lists no jobs.
+Loading is streaming: sharding and sampling happen record by record, so only
+the selected companies are ever held in memory.
+"""
+import hashlib
+import json
+import random
+from collections import defaultdict
+
+from pydantic import BaseModel
+
+DATASET_FORMAT = 'job-scraper-eval'
+DATASET_VERSION = 1
+DEFAULT_DATASET_PATH = 'eval_data/companies.v1.jsonl'
+
+
+class ExpectedJob(BaseModel):
+    job_title: str
+    url: str | None = None
+    location: str | None = None
+
+
+class EvalCompany(BaseModel):
+    name: str
+    input_url: str
+    expected_has_jobs: bool
+    expected_jobs_url: str | None = None
+    alternate_jobs_urls: list[str] = []
+    expected_jobs: list[ExpectedJob] | None = None
+    category: str = 'uncategorized'
+
+    def to_company(self):
+        """Dict in the shape process_batch and the evaluators use"""
+        company = self.model_dump(exclude={'input_url'})
+        company['url'] = self.input_url
+        return company
+
+
+def iter_dataset(path=DEFAULT_DATASET_PATH):
+    """Stream validated records from a dataset file"""
+    with open(path, 'r', encoding='utf-8') as file:
+        header = json.loads(file.readline())
+        if header.get('format') != DATASET_FORMAT:
+            raise ValueError(f"{path} is not a {DATASET_FORMAT} dataset")
+        if header.get('version') != DATASET_VERSION:
+            raise ValueError(f"{path} has dataset version {header.get('version')}, expected {DATASET_VERSION}")
+
+        for line_number, line in enumerate(file, 2):
+            if not line.strip():
+                continue
+            try:
+                yield EvalCompany.model_validate_json(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: invalid record: {e}") from e
+
+
+def in_shard(record, shard_index, num_shards):
+    """Stable assignment by company name, so shards don't move when records are added"""
+    digest = hashlib.sha1(record.name.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % num_shards == shard_index
+
+
+def shard(records, shard_index=0, num_shards=1):
+    for record in records:
+        if num_shards <= 1 or in_shard(record, shard_index, num_shards):
+            yield record
+
+
+def stratified_sample(records, per_category, seed=0):
+    """Up to `per_category` records from each category (reservoir sampling per category)"""
+    rng = random.Random(seed)
+    reservoirs = defaultdict(list)
+    seen = defaultdict(int)
+    for record in records:
+        seen[record.category] += 1
+        reservoir = reservoirs[record.category]
+        if len(reservoir) < per_category:
+            reservoir.append(record)
+        else:
+            slot = rng.randrange(seen[record.category])
+            if slot < per_category:
+                reservoir[slot] = record
+    return [record for category in sorted(reservoirs) for record in reservoirs[category]]
+
+
+def load_companies(path=DEFAULT_DATASET_PATH, shard_index=0, num_shards=1, per_category=None, seed=0):
+    """Companies for one eval worker: shard first, then optionally sample per category"""
+    records = shard(iter_dataset(path), shard_index, num_shards)
+    if per_category is not None:
+        records = stratified_sample(records, per_category, seed)
+    return [record.to_company() for record in records]
+
+
+def write_dataset(path, records):
+    """Write records (EvalCompany or dicts) with the current header"""
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(json.dumps({'format': DATASET_FORMAT, 'version': DATASET_VERSION}) + '\n')
+        for record in records:
+            if not isinstance(record, EvalCompany):
+                record = EvalCompany.model_validate(record)
+            file.write(record.model_dump_json(exclude_defaults=True) + '\n')
@@ -0,0 +1,131 @@
+"""Deterministic accuracy metrics for the two scraping stages.
+
+Stage 1 (find_jobs_page) is scored by exact and normalised URL match against
+the expected jobs page; stage 2 (extract_job_listings) by precision/recall over
+normalised job titles and job URLs. Everything here is pure Python set
+arithmetic, so thousands of cases score in milliseconds and the LLM judge in
+eval_parallel_main.py becomes an optional second pass.
+"""
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|gh_src|ref|source|src|lever-source|trk|fbclid|gclid)$', re.IGNORECASE)
+
+
+@lru_cache(maxsize=65536)
+def normalize_url(url):
+    """Canonical form of a URL for comparison (scheme, www., ports, slashes, tracking params ignored)"""
+    if not url:
+        return ''
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f'{host}:{parts.port}'
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not TRACKING_PARAMS.match(k)))
+    return f'{host}{path}' + (f'?{query}' if query else '')
+
+
+@lru_cache(maxsize=65536)
+def normalize_title(title):
+    """Case, punctuation and whitespace insensitive job title"""
+    if not title:
+        return ''
+    title = re.sub(r'[^\w\s+#]', ' ', title.casefold())
+    return ' '.join(title.split())
+
+
+def precision_recall(expected, actual):
+    """Precision, recall and F1 of two sets; empty-vs-empty counts as perfect"""
+    if not expected and not actual:
+        return 1.0, 1.0, 1.0
+    true_positives = len(expected & actual)
+    precision = true_positives / len(actual) if actual else 0.0
+    recall = true_positives / len(expected) if expected else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def score_find_jobs_page(company, result):
+    """Stage 1: did we find a jobs page, and is it the expected one"""
+    result = result or {}
+    actual_has_jobs = bool(result.get('has_job_page'))
+    actual_url = result.get('jobs_page_url') or ''
+    expected_url = company.get('expected_jobs_url') or ''
+
+    expected_urls = {normalize_url(expected_url)} if expected_url else set()
+    expected_urls.update(normalize_url(u) for u in company.get('alternate_jobs_urls', []))
+
+    return {
+        'has_jobs_correct': actual_has_jobs == bool(company.get('expected_has_jobs')),
+        'url_exact': bool(expected_url) and actual_url == expected_url,
+        'url_match': bool(expected_urls) and normalize_url(actual_url) in expected_urls,
+    }
+
+
+def score_extract_job_listings(company, result):
+    """Stage 2: precision/recall of extracted jobs against the stored ground truth
+
+    Returns None when the company has no `expected_jobs` ground truth; the url
+    scores are None when none of its expected jobs has a url.
+    """
+    expected_jobs = company.get('expected_jobs')
+    if expected_jobs is None:
+        return None
+    actual_jobs = (result or {}).get('jobs') or []
+
+    expected_titles = {normalize_title(job.get('job_title')) for job in expected_jobs} - {''}
+    actual_titles = {normalize_title(job.get('job_title')) for job in actual_jobs} - {''}
+    expected_urls = {normalize_url(job.get('url')) for job in expected_jobs} - {''}
+    actual_urls = {normalize_url(job.get('url')) for job in actual_jobs} - {''}
+
+    title_p, title_r, title_f1 = precision_recall(expected_titles, actual_titles)
+    url_p, url_r, url_f1 = precision_recall(expected_urls, actual_urls) if expected_urls else (None, None, None)
+    return {
+        'title_precision': title_p,
+        'title_recall': title_r,
+        'title_f1': title_f1,
+        'url_precision': url_p,
+        'url_recall': url_r,
+        'url_f1': url_f1,
+    }
+
+
+def score_company(company, result):
+    """Both stages for one company"""
+    return {
+        'name': company['name'],
+        'category': company.get('category'),
+        'scraped': result is not None,
+        'find_jobs_page': score_find_jobs_page(company, result),
+        'extract_job_listings': score_extract_job_listings(company, result),
+    }
+
+
+def _mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else None
+
+
+def summarize(scores):
+    """Aggregate per-company scores into overall stage 1 accuracy and stage 2 means"""
+    stage1 = [s['find_jobs_page'] for s in scores]
+    stage2 = [s['extract_job_listings'] for s in scores if s['extract_job_listings'] is not None]
+    summary = {
+        'companies': len(scores),
+        'scraped': sum(1 for s in scores if s['scraped']),
+        'has_jobs_accuracy': _mean(float(s['has_jobs_correct']) for s in stage1),
+        'url_exact_accuracy': _mean(float(s['url_exact']) for s in stage1),
+        'url_match_accuracy': _mean(float(s['url_match']) for s in stage1),
+        'companies_with_job_ground_truth': len(stage2),
+    }
+    for field in ('title_precision', 'title_recall', 'title_f1', 'url_precision', 'url_recall', 'url_f1'):
+        summary[field] = _mean(s[field] for s in stage2 if s[field] is not None)
+    return summary
@@ -0,0 +1,223 @@
+"""Incremental columnar export of company_jobs to Parquet (or Arrow IPC) for analytics.
+
+Documents are streamed from MongoDB with a projected, batched cursor and
+flattened into two datasets partitioned by run date (the day of `updated_at`):
+
+    exports/companies/run_date=2026-10-18/part-20261018T120000.parquet   one row per company
+    exports/jobs/run_date=2026-10-18/part-20261018T120000.parquet        one row per job
+    exports/_watermark.json                                              last exported updated_at
+
+Each run only exports documents changed since the watermark, so a company
+re-scraped on several days has one snapshot per run date. Repetitive string
+columns (company, title, location, status) are dictionary-encoded. The arrow
+format writes IPC streams (`.arrows`): the IPC file format allows only one
+dictionary per column for the whole file, and every batch brings its own.
+Needs pyarrow:
+
+    python -m lib.exporter --out exports
+    python -m lib.exporter --out exports --format arrow --full
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+DEFAULT_EXPORT_DIR = 'exports'
+WATERMARK_FILE = '_watermark.json'
+# Documents written in the last few seconds may still be in flight; the next run picks them up
+SETTLE_SECONDS = 5
+
+PROJECTION = {
+    'company_name': 1, 'company_url': 1, 'status': 1, 'updated_at': 1, 'processed_at': 1, 'job_count': 1,
+    'target_job_count': 1, 'has_job_page': 1, 'jobs_page_url': 1, 'region': 1, 'error_message': 1,
+    'jobs.job_title': 1, 'jobs.url': 1, 'jobs.location': 1, 'jobs.role_tags': 1, 'jobs.is_target_role': 1,
+    'jobs.location_info.countries': 1, 'jobs.location_info.regions': 1, 'jobs.location_info.remote': 1,
+}
+
+COMPANY_COLUMNS = ['company_name', 'company_url', 'status', 'updated_at', 'processed_at', 'job_count',
+                   'target_job_count', 'has_job_page', 'jobs_page_url', 'region', 'error_message']
+# Low-cardinality strings stored once per row group
+DICTIONARY_COLUMNS = {'company_name', 'company_url', 'status', 'region', 'job_title', 'location'}
+FILE_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrows'}
+
+
+def load_watermark(out_dir):
+    try:
+        with open(os.path.join(out_dir, WATERMARK_FILE), 'r', encoding='utf-8') as file:
+            return datetime.fromisoformat(json.load(file)['updated_at'])
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+
+
+def save_watermark(out_dir, watermark):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump({'updated_at': watermark.isoformat()}, file)
+    os.replace(path + '.tmp', path)
+
+
+def flatten(document):
+    """One company row and its job rows"""
+    company = {column: document.get(column) for column in COMPANY_COLUMNS}
+    jobs = []
+    for job in document.get('jobs') or []:
+        location = job.get('location_info') or {}
+        jobs.append({
+            'company_name': company['company_name'],
+            'company_url': company['company_url'],
+            'updated_at': company['updated_at'],
+            'job_title': job.get('job_title'),
+            'url': job.get('url'),
+            'location': job.get('location'),
+            'role_tags': job.get('role_tags') or [],
+            'is_target_role': job.get('is_target_role'),
+            'countries': location.get('countries') or [],
+            'regions': location.get('regions') or [],
+            'remote': location.get('remote'),
+        })
+    return company, jobs
+
+
+def _schemas():
+    import pyarrow as pa
+
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    string_list = pa.list_(pa.string())
+    companies = pa.schema([
+        ('company_name', dictionary), ('company_url', dictionary), ('status', dictionary),
+        ('updated_at', pa.timestamp('ms')), ('processed_at', pa.timestamp('ms')), ('job_count', pa.int32()),
+        ('target_job_count', pa.int32()), ('has_job_page', pa.bool_()), ('jobs_page_url', pa.string()),
+        ('region', dictionary), ('error_message', pa.string()),
+    ])
+    jobs = pa.schema([
+        ('company_name', dictionary), ('company_url', dictionary), ('updated_at', pa.timestamp('ms')),
+        ('job_title', dictionary), ('url', pa.string()), ('location', dictionary), ('role_tags', string_list),
+        ('is_target_role', pa.bool_()), ('countries', string_list), ('regions', string_list),
+        ('remote', pa.bool_()),
+    ])
+    return {'companies': companies, 'jobs': jobs}
+
+
+class PartitionedWriter:
+    """Appends record batches to one open file per (dataset, run date) for the duration of an export"""
+
+    def __init__(self, out_dir, file_format='parquet', compression='zstd'):
+        self.out_dir = out_dir
+        self.file_format = file_format
+        self.compression = compression
+        self.schemas = _schemas()
+        self.part = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        self.writers = {}
+        self.paths = []
+        self.rows = {'companies': 0, 'jobs': 0}
+
+    def _writer(self, dataset, run_date):
+        key = (dataset, run_date)
+        if key not in self.writers:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            directory = os.path.join(self.out_dir, dataset, f'run_date={run_date}')
+            os.makedirs(directory, exist_ok=True)
+            schema = self.schemas[dataset]
+            path = os.path.join(directory, f'part-{self.part}.{FILE_EXTENSIONS[self.file_format]}')
+            self.paths.append(path)
+            # Written under a temporary name so readers never see a half-written part
+            if self.file_format == 'parquet':
+                self.writers[key] = pq.ParquetWriter(
+                    path + '.tmp', schema, compression=self.compression,
+                    use_dictionary=[name for name in schema.names if name in DICTIONARY_COLUMNS])
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                # A stream may replace a column's dictionary between batches, a file may not
+                self.writers[key] = pa.ipc.new_stream(path + '.tmp', schema, options=options)
+        return self.writers[key]
+
+    def write(self, dataset, rows):
+        """Write rows of one dataset, split by the run date of their updated_at"""
+        import pyarrow as pa
+
+        by_date = {}
+        for row in rows:
+            run_date = row['updated_at'].strftime('%Y-%m-%d') if row['updated_at'] else 'unknown'
+            by_date.setdefault(run_date, []).append(row)
+        schema = self.schemas[dataset]
+        for run_date, date_rows in by_date.items():
+            batch = pa.RecordBatch.from_pylist(date_rows, schema=schema)
+            writer = self._writer(dataset, run_date)
+            if self.file_format == 'parquet':
+                writer.write_batch(batch)
+            else:
+                writer.write(batch)
+            self.rows[dataset] += len(date_rows)
+
+    def close(self, commit=True):
+        """Close every part file, publishing them if `commit` and deleting them otherwise"""
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+        for path in self.paths:
+            if commit:
+                os.replace(path + '.tmp', path)
+            else:
+                os.remove(path + '.tmp')
+        self.paths = []
+
+
+def export(collection, out_dir=DEFAULT_EXPORT_DIR, file_format='parquet', batch_size=5000, full=False):
+    """Export documents changed since the last watermark; returns row counts per dataset"""
+    watermark = None if full else load_watermark(out_dir)
+    cutoff = datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+    query = {'updated_at': {'$lte': cutoff}}
+    if watermark is not None:
+        query['updated_at']['$gt'] = watermark
+
+    writer = PartitionedWriter(out_dir, file_format)
+    companies, jobs = [], []
+    committed = False
+    try:
+        cursor = collection.find(query, PROJECTION, batch_size=batch_size)
+        for document in cursor:
+            company, company_jobs = flatten(document)
+            companies.append(company)
+            jobs.extend(company_jobs)
+            if len(companies) >= batch_size:
+                writer.write('companies', companies)
+                writer.write('jobs', jobs)
+                companies, jobs = [], []
+        if companies:
+            writer.write('companies', companies)
+            writer.write('jobs', jobs)
+        committed = True
+    finally:
+        writer.close(commit=committed)
+
+    # Only advance once every batch is on disk; a failed run is simply redone
+    save_watermark(out_dir, cutoff)
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export company_jobs to partitioned Parquet/Arrow files")
+    parser.add_argument('--out', default=DEFAULT_EXPORT_DIR, help='Export directory')
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Documents per cursor batch / record batch')
+    parser.add_argument('--full', action='store_true', help='Ignore the watermark and export everything')
+    args = parser.parse_args()
+
+    from lib.runtime import get_runtime
+
+    collection = get_runtime().collection
+    if collection is None:
+        print("MongoDB collection not available")
+        return
+    start = time.monotonic()
+    rows = export(collection, args.out, args.format, args.batch_size, args.full)
+    print(f"✅ Exported {rows['companies']} companies and {rows['jobs']} jobs to {args.out} "
+          f"in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
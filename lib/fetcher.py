@@ -0,0 +1,231 @@
+"""Tiered page fetcher: pooled async HTTP first, a shared headless browser only when needed.
+
+Most careers pages are server-rendered, so a keep-alive HTTP/2 client gets
+them for a fraction of the CPU and memory of a Chromium session. Pages that
+come back empty, as an SPA shell, with a "please enable JavaScript" notice or
+behind bot protection are re-fetched through BrowserPool. Domains whose HTML
+turned out to be a JavaScript shell are remembered for a while, so later
+fetches go straight to the browser; errors and bot-protection statuses are
+retried over HTTP every time.
+"""
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+import httpx
+from pydantic import BaseModel
+
+from lib.page_content import PageContent
+
+try:
+    import h2  # noqa: F401  (httpx only speaks HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIERS_PATH = '.cache/fetch_tiers.json'
+USER_AGENT = ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/126.0.0.0 Safari/537.36')
+# Statuses that usually mean bot protection rather than a missing page
+ESCALATE_STATUSES = {403, 429, 503}
+# How long a domain found to need JavaScript skips the http tier before it is re-checked
+BROWSER_TIER_TTL_SECONDS = 7 * 86400
+
+
+class FetchResult(BaseModel):
+    url: str
+    final_url: str
+    status: int | None = None
+    html: str = ''
+    tier: str  # 'http' or 'browser'
+    js_reason: str | None = None  # why the http tier was not enough
+    bytes: int = 0
+    elapsed_s: float = 0.0
+
+    def content(self):
+        return PageContent(self.html, self.final_url)
+
+
+def domain_of(url):
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class BrowserPool:
+    """One shared browser whose tabs render JavaScript-only pages for the fetcher"""
+
+    def __init__(self, runtime, max_pages=4):
+        self.runtime = runtime
+        self.semaphore = asyncio.Semaphore(max_pages)
+        self._session = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_started(self):
+        async with self._lock:
+            if self._session is None:
+                from lib.main import create_browser_session
+
+                self._session = await create_browser_session(self.runtime, 'render')
+        return self._session
+
+    async def render(self, url, timeout_ms=20000):
+        session = await self._ensure_started()
+        async with self.semaphore:
+            page = await session.browser_context.new_page()
+            try:
+                response = await page.goto(url, wait_until='domcontentloaded', timeout=timeout_ms)
+                try:
+                    await page.wait_for_load_state('networkidle', timeout=3000)
+                except Exception:
+                    pass  # long-polling sites never go idle; the DOM is usually there already
+                return page.url, response.status if response else None, await page.content()
+            finally:
+                await page.close()
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.kill()
+            self._session = None
+
+
+class TieredFetcher:
+    """Fetch pages over HTTP, escalating to the browser pool only for pages that need JavaScript"""
+
+    def __init__(self, runtime, tiers_path=DEFAULT_TIERS_PATH, max_connections=64, timeout=15.0,
+                 max_browser_pages=4, transport=None):
+        self.runtime = runtime
+        self.tiers_path = tiers_path
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.transport = transport
+        self.browser_pool = BrowserPool(runtime, max_browser_pages)
+        self.tiers = self._load_tiers()  # domain -> {'reason': js_reason, 'expires_at': epoch seconds}
+        # needs_js: http HTML was a JavaScript shell (or the domain is remembered as one);
+        # error_fallbacks: rendered because http failed or hit bot protection
+        self.counters = {'http': 0, 'browser': 0, 'needs_js': 0, 'error_fallbacks': 0, 'errors': 0}
+        self._client = None
+
+    def _load_tiers(self):
+        if not self.tiers_path:
+            return {}
+        try:
+            with open(self.tiers_path, 'r', encoding='utf-8') as file:
+                tiers = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        # Older files stored a bare 'http'/'browser' per domain with no reason or expiry; those are re-learned
+        return {domain: entry for domain, entry in tiers.items() if isinstance(entry, dict)}
+
+    def requires_browser(self, domain, now=None):
+        """Whether the domain was recently found to serve a JavaScript shell; expired entries are dropped"""
+        entry = self.tiers.get(domain)
+        if entry is None:
+            return False
+        if entry['expires_at'] <= (now or time.time()):
+            del self.tiers[domain]
+            return False
+        return True
+
+    def remember_browser(self, domain, js_reason, now=None):
+        self.tiers[domain] = {'reason': js_reason,
+                              'expires_at': round((now or time.time()) + BROWSER_TIER_TTL_SECONDS)}
+
+    def save_tiers(self):
+        if not self.tiers_path:
+            return
+        now = time.time()
+        self.tiers = {domain: entry for domain, entry in self.tiers.items() if entry['expires_at'] > now}
+        os.makedirs(os.path.dirname(self.tiers_path) or '.', exist_ok=True)
+        with open(self.tiers_path, 'w', encoding='utf-8') as file:
+            json.dump(self.tiers, file, indent=2, sort_keys=True)
+
+    @property
+    def client(self):
+        """Shared keep-alive client; compression is negotiated by httpx automatically"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                headers={'User-Agent': USER_AGENT, 'Accept': 'text/html,application/xhtml+xml,*/*;q=0.8'},
+                transport=self.transport,
+            )
+        return self._client
+
+    async def _fetch_http(self, url):
+        start = time.monotonic()
+        response = await self.client.get(url)
+        return FetchResult(
+            url=url,
+            final_url=str(response.url),
+            status=response.status_code,
+            html=response.text if 'html' in response.headers.get('content-type', 'text/html') else '',
+            tier='http',
+            bytes=len(response.content),
+            elapsed_s=round(time.monotonic() - start, 3),
+        )
+
+    async def _fetch_browser(self, url, js_reason):
+        start = time.monotonic()
+        final_url, status, html = await self.browser_pool.render(url)
+        return FetchResult(
+            url=url,
+            final_url=final_url,
+            status=status,
+            html=html,
+            tier='browser',
+            js_reason=js_reason,
+            bytes=len(html.encode('utf-8')),
+            elapsed_s=round(time.monotonic() - start, 3),
+        )
+
+    async def fetch(self, url, allow_browser=True):
+        """Fetch a page with the cheapest tier that works; None if every tier failed"""
+        domain = domain_of(url)
+        result = None
+        js_reason = 'domain_requires_browser'
+        needs_js = True
+
+        if not self.requires_browser(domain):
+            try:
+                result = await self._fetch_http(url)
+                self.counters['http'] += 1
+            except httpx.HTTPError as e:
+                self.counters['errors'] += 1
+                js_reason, needs_js = f'http_error: {type(e).__name__}', False
+            else:
+                if result.status in ESCALATE_STATUSES:
+                    js_reason, needs_js = f'http_status_{result.status}', False
+                elif result.status >= 400 or not result.html:
+                    return result  # a real 404 / non-HTML response, a browser won't help
+                else:
+                    js_reason = result.content().needs_javascript()
+                    if js_reason is None:
+                        return result
+
+        if not allow_browser:
+            return result
+
+        self.counters['needs_js' if needs_js else 'error_fallbacks'] += 1
+        print(f"🌐 Rendering {url} in browser ({js_reason})")
+        try:
+            browser_result = await self._fetch_browser(url, js_reason)
+        except Exception as e:
+            print(f"Browser render failed for {url}: {e}")
+            return result
+        self.counters['browser'] += 1
+        # Only a JavaScript shell says something lasting about the domain; errors may be transient
+        if needs_js and result is not None:
+            self.remember_browser(domain, js_reason)
+        return browser_result
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        await self.browser_pool.aclose()
+        self.save_tiers()
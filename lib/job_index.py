@@ -0,0 +1,223 @@
+"""In-memory inverted index over the jobs stored in company_jobs.
+
+Title search over the embedded `jobs` arrays is a collection scan in MongoDB.
+JobIndex keeps one posting set per title token and per facet value (company,
+country, region, role, remote, ...), so a search is a handful of set
+intersections. It is filled incrementally from `updated_at`: each refresh
+only reads companies saved since the last one (less a settle lag, so writes
+that commit late with an older timestamp are still picked up) and replaces
+their jobs.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from lib.locations import parse_location
+
+# Facet name -> how to read its values from an indexed job
+FACETS = {
+    'company': lambda job: [job['company_name']],
+    'country': lambda job: job['countries'],
+    'region': lambda job: job['regions'],
+    'role': lambda job: job['role_tags'],
+    'remote': lambda job: [] if job['remote'] is None else [str(job['remote']).lower()],
+    'target': lambda job: [str(job['is_target_role']).lower()],
+}
+
+# Each refresh re-reads this far behind the watermark: updated_at is stamped by the
+# crawler before the write commits, so a save can land after a newer one was read
+SETTLE_SECONDS = 5
+
+PROJECTION = {'company_name': 1, 'company_url': 1, 'jobs': 1, 'updated_at': 1, 'status': 1}
+
+
+def tokenize(text):
+    return re.findall(r'[^\W_]+', (text or '').lower())
+
+
+class JobIndex:
+    """Posting sets over job titles, company names and normalised locations
+
+    Safe to query from many threads while another thread refreshes it.
+    """
+
+    def __init__(self):
+        self.jobs = {}  # job id -> indexed job
+        self.company_jobs = {}  # company_url -> job ids
+        self.company_updated_at = {}  # company_url -> updated_at of the indexed document
+        self.terms = defaultdict(set)  # title/company token -> job ids
+        self.facets = defaultdict(set)  # (facet, value) -> job ids
+        self.vocabulary = []  # sorted terms, for prefix matching the last query word
+        self.watermark = None  # newest updated_at seen
+        self.last_refresh = None
+        self._next_id = 0
+        self._vocabulary_dirty = False
+        self._lock = threading.RLock()
+
+    # --- Building ---
+    def _remove_company(self, company_url):
+        for job_id in self.company_jobs.pop(company_url, []):
+            job = self.jobs.pop(job_id)
+            for term in job['terms']:
+                postings = self.terms[term]
+                postings.discard(job_id)
+                if not postings:
+                    del self.terms[term]
+                    self._vocabulary_dirty = True
+            for key in job['facet_keys']:
+                postings = self.facets[key]
+                postings.discard(job_id)
+                if not postings:
+                    del self.facets[key]
+
+    def _add_job(self, document, job):
+        # Jobs saved before lib.locations existed have no location_info yet
+        location = job.get('location_info') or parse_location(job.get('location')).to_document()
+        indexed = {
+            'company_name': document.get('company_name') or '',
+            'company_url': document['company_url'],
+            'job_title': job.get('job_title') or '',
+            'url': job.get('url'),
+            'location': job.get('location'),
+            'countries': location['countries'],
+            'regions': location['regions'],
+            'remote': location['remote'],
+            'role_tags': job.get('role_tags') or [],
+            'is_target_role': bool(job.get('is_target_role')),
+            'updated_at': document.get('updated_at'),
+        }
+        job_id = self._next_id
+        self._next_id += 1
+
+        terms = set(tokenize(indexed['job_title'])) | set(tokenize(indexed['company_name']))
+        facet_keys = {(facet, value) for facet, values_of in FACETS.items() for value in values_of(indexed)}
+        for term in terms:
+            if term not in self.terms:
+                self._vocabulary_dirty = True
+            self.terms[term].add(job_id)
+        for key in facet_keys:
+            self.facets[key].add(job_id)
+
+        indexed['terms'] = terms
+        indexed['facet_keys'] = facet_keys
+        self.jobs[job_id] = indexed
+        self.company_jobs.setdefault(document['company_url'], []).append(job_id)
+
+    def upsert_company(self, document):
+        """Replace all indexed jobs of one company document"""
+        with self._lock:
+            self._remove_company(document['company_url'])
+            for job in document.get('jobs') or []:
+                self._add_job(document, job)
+            updated_at = document.get('updated_at')
+            self.company_updated_at[document['company_url']] = updated_at
+            if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+
+    def refresh(self, collection, batch_size=1000):
+        """Index companies saved since the last refresh; returns how many were (re)indexed
+
+        Reads from SETTLE_SECONDS before the watermark; companies in that overlap
+        whose indexed version is unchanged are skipped.
+        """
+        query = {}
+        if self.watermark is not None:
+            query = {'updated_at': {'$gte': self.watermark - timedelta(seconds=SETTLE_SECONDS)}}
+        count = 0
+        for document in collection.find(query, PROJECTION, batch_size=batch_size):
+            company_url = document.get('company_url')
+            if not company_url:
+                continue
+            indexed = company_url in self.company_updated_at
+            if indexed and self.company_updated_at[company_url] == document.get('updated_at'):
+                continue
+            self.upsert_company(document)
+            count += 1
+        self.last_refresh = time.time()
+        return count
+
+    # --- Querying ---
+    def _prefix_matches(self, prefix):
+        with self._lock:
+            if self._vocabulary_dirty:
+                self.vocabulary = sorted(self.terms)
+                self._vocabulary_dirty = False
+            start = bisect.bisect_left(self.vocabulary, prefix)
+            matches = set()
+            for term in self.vocabulary[start:]:
+                if not term.startswith(prefix):
+                    break
+                matches |= self.terms.get(term, set())
+            return matches
+
+    def match(self, query='', filters=None):
+        """Job ids whose title/company contain every query word (the last one as a prefix)
+
+        `filters` maps facet -> value or list of values; values of one facet are
+        OR-ed, facets are AND-ed.
+        """
+        candidates = []
+        words = tokenize(query)
+        with self._lock:
+            for index, word in enumerate(words):
+                if index == len(words) - 1 and word not in self.terms:
+                    candidates.append(self._prefix_matches(word))
+                else:
+                    candidates.append(self.terms.get(word, set()))
+            for facet, values in (filters or {}).items():
+                if facet not in FACETS:
+                    raise ValueError(f'Unknown facet {facet!r}, expected one of {sorted(FACETS)}')
+                values = values if isinstance(values, (list, tuple, set)) else [values]
+                candidates.append(set().union(*(self.facets.get((facet, value), set()) for value in values)))
+
+            if not candidates:
+                return set(self.jobs)
+            # Intersect smallest first so the work is bounded by the rarest term
+            candidates.sort(key=len)
+            result = set(candidates[0])
+            for postings in candidates[1:]:
+                if not result:
+                    break
+                result &= postings
+            return result
+
+    def facet_counts(self, job_ids, facets=FACETS, limit=20):
+        with self._lock:
+            counts = {}
+            for facet in facets:
+                counter = Counter()
+                for job_id in job_ids:
+                    counter.update(FACETS[facet](self.jobs[job_id]))
+                counts[facet] = dict(counter.most_common(limit))
+            return counts
+
+    def search(self, query='', filters=None, limit=20, offset=0, facets=()):
+        """Matching jobs, target roles and newest first, plus optional facet counts"""
+        start = time.perf_counter()
+        # One acquisition for match, ranking and facets: a refresh in between could drop matched ids
+        with self._lock:
+            job_ids = self.match(query, filters)
+            # Only the requested page is ranked, not every match
+            ranked = heapq.nsmallest(offset + limit, job_ids,
+                                     key=lambda job_id: (not self.jobs[job_id]['is_target_role'], -job_id))
+            page = [{key: value for key, value in self.jobs[job_id].items() if key not in ('terms', 'facet_keys')}
+                    for job_id in ranked[offset:]]
+            result = {'total': len(job_ids), 'jobs': page}
+            if facets:
+                result['facets'] = self.facet_counts(job_ids, facets)
+        result['took_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'jobs': len(self.jobs),
+                'companies': len(self.company_jobs),
+                'terms': len(self.terms),
+                'watermark': self.watermark.isoformat() if hasattr(self.watermark, 'isoformat') else self.watermark,
+                'last_refresh': self.last_refresh,
+            }
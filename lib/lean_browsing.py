@@ -0,0 +1,196 @@
+"""Lean browsing: block heavy resources and trackers, and measure what each page load costs.
+
+The agents only read text and links, so images, media, fonts and third-party
+analytics/chat widgets are aborted at the network layer via Playwright request
+interception. Page-load statistics are collected whether or not lean mode is
+on, so the two can be compared per company in company_jobs.fetch_stats.
+
+More tracker domains can be blocked without a code change: point
+LEAN_BROWSING_BLOCKLIST at a file with one domain per line ('#' comments
+allowed) and they are added to DEFAULT_BLOCKED_DOMAINS.
+"""
+import time
+
+from pydantic import BaseModel
+
+DEFAULT_BLOCKED_RESOURCE_TYPES = ['image', 'media', 'font', 'texttrack', 'manifest']
+
+# Third-party hosts only: tracker subdomains rather than vendor apexes, so a vendor's
+# own careers site (HubSpot, Segment, Hotjar, ...) still loads
+DEFAULT_BLOCKED_DOMAINS = [
+    # analytics / tag managers
+    'google-analytics.com', 'googletagmanager.com', 'googleadservices.com', 'doubleclick.net',
+    'googlesyndication.com', 'cdn.segment.com', 'api.segment.io', 'cdn.mxpnl.com', 'api-js.mixpanel.com',
+    'cdn.amplitude.com', 'api.amplitude.com', 'cdn.heapanalytics.com', 'edge.fullstory.com',
+    'static.hotjar.com', 'script.hotjar.com', 'clarity.ms', 'js-agent.newrelic.com', 'nr-data.net',
+    'quantserve.com', 'scorecardresearch.com', 'cdn.optimizely.com',
+    # ads / social pixels
+    'connect.facebook.net', 'static.ads-twitter.com', 'snap.licdn.com', 'px.ads.linkedin.com',
+    'bat.bing.com', 'adroll.com', 'taboola.com', 'outbrain.com', 'criteo.com',
+    # chat widgets / marketing automation
+    'widget.intercom.io', 'js.intercomcdn.com', 'js.driftt.com', 'static.zdassets.com',
+    'client.crisp.chat', 'embed.tawk.to', 'cdn.livechatinc.com', 'js.hs-scripts.com',
+    'js.hs-analytics.net', 'js.hsforms.net', 'js.hs-banner.com', 'munchkin.marketo.net', 'pi.pardot.com',
+]
+
+# Chromium flags that help on top of request interception
+LEAN_BROWSER_ARGS = [
+    '--blink-settings=imagesEnabled=false',
+    '--force-prefers-reduced-motion',
+    '--autoplay-policy=user-gesture-required',
+    '--mute-audio',
+]
+
+# Kills CSS animations/transitions so the DOM settles immediately
+DISABLE_ANIMATIONS_SCRIPT = """
+document.addEventListener('DOMContentLoaded', () => {
+    const style = document.createElement('style');
+    style.textContent = '*, *::before, *::after { animation: none !important; transition: none !important; scroll-behavior: auto !important; }';
+    document.head.appendChild(style);
+});
+"""
+
+NAVIGATION_TIMING_SCRIPT = """
+() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    return nav ? {dom_ready_ms: nav.domContentLoadedEventEnd, load_ms: nav.loadEventEnd} : null;
+}
+"""
+
+
+class LeanBrowsingConfig(BaseModel):
+    blocked_resource_types: list[str] = DEFAULT_BLOCKED_RESOURCE_TYPES
+    blocked_domains: list[str] = DEFAULT_BLOCKED_DOMAINS
+    disable_animations: bool = True
+    # Page-settle waits browser_use applies after each navigation (its defaults are 0.25 / 0.5 / 5.0)
+    minimum_wait_page_load_time: float = 0.1
+    wait_for_network_idle_page_load_time: float = 0.1
+    maximum_wait_page_load_time: float = 2.0
+
+    def profile_kwargs(self):
+        """BrowserProfile overrides for lean mode"""
+        return {
+            'minimum_wait_page_load_time': self.minimum_wait_page_load_time,
+            'wait_for_network_idle_page_load_time': self.wait_for_network_idle_page_load_time,
+            'maximum_wait_page_load_time': self.maximum_wait_page_load_time,
+        }
+
+
+def load_blocklist(path):
+    """Read extra blocked domains from a file, one per line, '#' comments allowed"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return [line.split('#')[0].strip().lower() for line in file if line.split('#')[0].strip()]
+
+
+def config_with_blocklist(path=None):
+    """Default LeanBrowsingConfig, plus the domains listed in the blocklist file at `path` if given"""
+    config = LeanBrowsingConfig()
+    if not path:
+        return config
+    try:
+        extra = load_blocklist(path)
+    except OSError as e:
+        print(f"⚠️  Could not read blocklist {path}, using the default blocked domains: {e}")
+        return config
+    config.blocked_domains = list(dict.fromkeys(config.blocked_domains + extra))
+    return config
+
+
+def _host(url):
+    start = url.find('://')
+    host = url[start + 3:] if start >= 0 else url
+    return host.split('/', 1)[0].split(':', 1)[0].lower()
+
+
+def is_blocked_host(host, blocked_domains):
+    """True if host or any parent domain is in the blocklist set"""
+    labels = host.split('.')
+    return any('.'.join(labels[i:]) in blocked_domains for i in range(len(labels) - 1))
+
+
+class PageLoadStats:
+    """Bytes, requests and DOM-ready timings observed by one browser context"""
+
+    def __init__(self):
+        self.requests = 0
+        self.failed_requests = 0
+        self.blocked_requests = 0
+        self.blocked_by_type = {}
+        self.bytes_transferred = 0
+        self.page_loads = []
+        self.started_at = time.monotonic()
+
+    def record_blocked(self, reason):
+        self.blocked_requests += 1
+        self.blocked_by_type[reason] = self.blocked_by_type.get(reason, 0) + 1
+
+    def summary(self):
+        dom_ready = [load['dom_ready_ms'] for load in self.page_loads if load.get('dom_ready_ms')]
+        return {
+            'requests': self.requests,
+            'failed_requests': self.failed_requests,
+            'blocked_requests': self.blocked_requests,
+            'blocked_by_type': dict(self.blocked_by_type),
+            'bytes_transferred': self.bytes_transferred,
+            'pages_loaded': len(self.page_loads),
+            'first_dom_ready_ms': round(dom_ready[0], 1) if dom_ready else None,
+            'mean_dom_ready_ms': round(sum(dom_ready) / len(dom_ready), 1) if dom_ready else None,
+            'session_s': round(time.monotonic() - self.started_at, 1),
+        }
+
+
+async def attach_page_load_stats(context, stats):
+    """Record transfer sizes and navigation timings for every page in a Playwright context"""
+
+    async def on_request_finished(request):
+        stats.requests += 1
+        try:
+            sizes = await request.sizes()
+            stats.bytes_transferred += sizes['responseBodySize'] + sizes['responseHeadersSize']
+        except Exception:
+            pass
+
+    def on_request_failed(request):
+        # Requests aborted by enable_lean_browsing are counted as blocked, not failed
+        if 'BLOCKED_BY_CLIENT' not in (request.failure or ''):
+            stats.failed_requests += 1
+
+    async def on_dom_content_loaded(page):
+        try:
+            timing = await page.evaluate(NAVIGATION_TIMING_SCRIPT)
+        except Exception:
+            return
+        if timing:
+            stats.page_loads.append({'url': page.url, **timing})
+
+    def on_page(page):
+        page.on('domcontentloaded', on_dom_content_loaded)
+
+    context.on('requestfinished', on_request_finished)
+    context.on('requestfailed', on_request_failed)
+    context.on('page', on_page)
+    for page in context.pages:
+        on_page(page)
+
+
+async def enable_lean_browsing(context, config, stats=None):
+    """Install request interception and the animation kill-switch on a Playwright context"""
+    blocked_types = set(config.blocked_resource_types)
+    blocked_domains = set(config.blocked_domains)
+
+    async def handle_route(route):
+        request = route.request
+        if request.resource_type in blocked_types:
+            reason = request.resource_type
+        elif request.resource_type != 'document' and is_blocked_host(_host(request.url), blocked_domains):
+            reason = 'tracker'
+        else:
+            await route.continue_()
+            return
+        if stats is not None:
+            stats.record_blocked(reason)
+        await route.abort('blockedbyclient')
+
+    await context.route('**/*', handle_route)
+    if config.disable_animations:
+        await context.add_init_script(DISABLE_ANIMATIONS_SCRIPT)
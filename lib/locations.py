@@ -0,0 +1,294 @@
+"""Offline location normaliser: free-text locations -> countries, regions, remote flag, UTC range.
+
+Job locations ("Remote - EMEA", "Berlin, DE", "Worldwide") and the company
+list's Region column ("CET -4 / CET +4", "Germany, Austria, Slovakia") are
+parsed against the bundled gazetteer (lib/gazetteer.json). Multi-word names
+are matched longest-first through a token trie built once per process, and
+parses are memoised since the same strings repeat across thousands of jobs.
+The structured result is stored next to the raw text, so location queries hit
+indexed fields instead of regex scans:
+
+    python -m lib.locations --text "Remote (US or Canada)"
+    python -m lib.locations --backfill      # annotate stored jobs + create indexes
+"""
+import argparse
+import json
+import os
+import re
+import time
+from functools import lru_cache
+
+from pydantic import BaseModel, ConfigDict
+
+# Bump when a change to the parser or gazetteer changes the location_info of existing jobs;
+# cached scraper output (eval_parallel_main.py) is keyed on it
+LOCATION_TAGGING_VERSION = 1
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.json')
+
+REMOTE_PATTERN = re.compile(r'\b(remote(ly)?|anywhere|distributed|work from home|wfh|home[\s-]based|telecommute)\b',
+                            re.IGNORECASE)
+HYBRID_PATTERN = re.compile(r'\bhybrid\b', re.IGNORECASE)
+ONSITE_PATTERN = re.compile(r'\b(on[\s-]?site|in[\s-]office|office[\s-]based)\b', re.IGNORECASE)
+WORLDWIDE_PATTERN = re.compile(r'\b(world\s?wide|global(ly)?|anywhere in the world|international)\b', re.IGNORECASE)
+
+# Short aliases that are also ordinary words; they only match when written in capitals
+CASE_SENSITIVE_ALIASES = {'sea', 'amer', 'apj', 'gcc', 'cee', 'eea', 'prc', 'ksa'}
+
+# MongoDB fields worth indexing for location queries
+INDEXED_FIELDS = ('jobs.location_info.countries', 'jobs.location_info.regions', 'jobs.location_info.remote',
+                  'region_info.countries', 'region_info.regions')
+
+
+class Location(BaseModel):
+    """Structured form of one free-text location; instances are shared by the memo, so frozen"""
+    model_config = ConfigDict(frozen=True)
+
+    raw: str = ''
+    countries: tuple[str, ...] = ()  # ISO 3166-1 alpha-2, in order of appearance
+    regions: tuple[str, ...] = ()  # named and implied regions, e.g. ('Europe', 'EMEA')
+    cities: tuple[str, ...] = ()
+    remote: bool | None = None  # None when the text doesn't say
+    hybrid: bool = False
+    worldwide: bool = False
+    utc_min: float | None = None
+    utc_max: float | None = None
+
+    def to_document(self):
+        """Fields stored in MongoDB (the raw text already lives next to it)"""
+        document = self.model_dump(exclude={'raw'})
+        for key in ('countries', 'regions', 'cities'):
+            document[key] = list(document[key])
+        return document
+
+
+def _tokens(text):
+    """(lowercase, original) word tokens; dots are dropped so 'U.S.A.' == 'USA'"""
+    return [(token.lower(), token) for token in re.findall(r"[^\W_]+(?:[&'][^\W_]+)*", text.replace('.', ''))]
+
+
+class Gazetteer:
+    """Bundled place names indexed as a token trie for longest-match lookups"""
+
+    def __init__(self, data):
+        self.countries = data['countries']
+        self.regions = data['regions']
+        self.country_groups = data['country_groups']
+        self.us_states = set(data['us_states'])
+        self.timezones = data['timezones']
+        self.trie = {}
+
+        for iso, country in self.countries.items():
+            self._add(country['name'], ('country', iso))
+            self._add(iso, ('country', iso))
+            if country.get('alpha3'):
+                self._add(country['alpha3'], ('country', iso))
+            for alias in country['aliases']:
+                self._add(alias, ('country', iso))
+        for region, info in self.regions.items():
+            for alias in info['aliases']:
+                self._add(alias, ('region', region))
+        for group in self.country_groups:
+            self._add(group, ('group', group))
+        for city, iso in data['cities'].items():
+            self._add(city, ('city', iso))
+        for state in data['us_state_names']:
+            self._add(state, ('state', 'US'))
+
+        self.region_of = {iso: country['region'] for iso, country in self.countries.items()}
+        self.parent_regions = {}
+        for region, info in self.regions.items():
+            for child in info.get('includes', []):
+                self.parent_regions.setdefault(child, []).append(region)
+        self.timezone_pattern = self._timezone_pattern()
+
+    def _add(self, name, entry):
+        node = self.trie
+        for token, _ in _tokens(name):
+            node = node.setdefault(token, {})
+        node.setdefault(None, []).append(entry)
+
+    def _timezone_pattern(self):
+        # UTC/GMT in any case, the rest (EST, PT, IST, ...) only in capitals
+        names = sorted(self.timezones, key=len, reverse=True)
+        upper = '|'.join(name.upper() for name in names if name not in ('utc', 'gmt'))
+        return re.compile(r'\b((?i:utc|gmt)|' + upper + r')\b\s*(?:([+\-−])\s*(\d{1,2})(?::?(\d{2}))?)?')
+
+    def match(self, tokens, start):
+        """Longest gazetteer entry starting at tokens[start]: (entries, end) or (None, start + 1)"""
+        node = self.trie
+        best, end = None, start + 1
+        for index in range(start, len(tokens)):
+            node = node.get(tokens[index][0])
+            if node is None:
+                break
+            if None in node:
+                best, end = node[None], index + 1
+        if best is not None and end == start + 1:
+            lower, original = tokens[start]
+            short = len(lower) <= 2 or lower in CASE_SENSITIVE_ALIASES
+            if short and not original.isupper():
+                return None, start + 1
+        return best, end
+
+    def with_parents(self, regions):
+        expanded = list(regions)
+        for region in regions:
+            for parent in self.parent_regions.get(region, []):
+                if parent not in expanded:
+                    expanded.append(parent)
+        return expanded
+
+
+_gazetteer = None
+
+
+def get_gazetteer():
+    global _gazetteer
+    if _gazetteer is None:
+        with open(GAZETTEER_PATH, 'r', encoding='utf-8') as file:
+            _gazetteer = Gazetteer(json.load(file))
+    return _gazetteer
+
+
+def _utc_range(text, gazetteer):
+    """Smallest/largest UTC offset mentioned, e.g. 'UTC-8 to UTC+1' or 'CET -4 / CET +4'"""
+    offsets = []
+    last_base = None
+    for match in gazetteer.timezone_pattern.finditer(text):
+        base = gazetteer.timezones[match.group(1).lower()]
+        last_base = base
+        offset = base
+        if match.group(3):
+            sign = -1 if match.group(2) in '-−' else 1
+            offset += sign * (int(match.group(3)) + int(match.group(4) or 0) / 60)
+        offsets.append(offset)
+    if last_base is None:
+        return None, None
+
+    # "UTC -3 to -5": a bare offset after a timezone is relative to it
+    for match in re.finditer(r'\bto\s*([+\-−])\s*(\d{1,2})\b', text):
+        offsets.append(last_base + (-1 if match.group(1) in '-−' else 1) * int(match.group(2)))
+    # "UTC+2 +/- 2" / "± 2": a tolerance around the last offset
+    tolerance = re.search(r'(\+\s*[\\/]?\s*-|±)\s*(\d{1,2})\s*(h|hours?)?\s*$', text)
+    if tolerance:
+        centre = offsets[-1]
+        offsets.extend([centre - int(tolerance.group(2)), centre + int(tolerance.group(2))])
+    return min(offsets), max(offsets)
+
+
+@lru_cache(maxsize=65536)
+def parse_location(text):
+    """Parse a free-text location into a (shared, immutable) Location"""
+    text = (text or '').strip()
+    if not text:
+        return Location()
+    gazetteer = get_gazetteer()
+
+    countries, regions, cities = [], [], []
+    tokens = _tokens(text)
+    previous_kind = None
+    index = 0
+    while index < len(tokens):
+        entries, end = gazetteer.match(tokens, index)
+        original = tokens[index][1]
+        # "San Francisco, CA": a state code right after a US city is the state, not Canada
+        if end == index + 1 and original in gazetteer.us_states and original.isupper() and (
+                previous_kind == 'us_city' or entries is None):
+            entries = [('state', 'US')]
+        if entries:
+            previous_kind = None
+            for kind, value in entries:
+                if kind == 'country':
+                    countries.append(value)
+                elif kind == 'region':
+                    regions.append(value)
+                elif kind == 'state':
+                    countries.append(value)
+                elif kind == 'group':
+                    countries.extend(gazetteer.country_groups[value])
+                elif kind == 'city':
+                    countries.append(value)
+                    cities.append(' '.join(token for _, token in tokens[index:end]))
+                    previous_kind = 'us_city' if value == 'US' else None
+        index = end
+
+    countries = list(dict.fromkeys(countries))
+    implied = [gazetteer.region_of[iso] for iso in countries]
+    regions = gazetteer.with_parents(list(dict.fromkeys(regions + implied)))
+
+    remote = True if REMOTE_PATTERN.search(text) else (False if ONSITE_PATTERN.search(text) else None)
+    utc_min, utc_max = _utc_range(text, gazetteer)
+    return Location(
+        raw=text,
+        countries=tuple(countries),
+        regions=tuple(regions),
+        cities=tuple(dict.fromkeys(cities)),
+        remote=remote,
+        hybrid=bool(HYBRID_PATTERN.search(text)),
+        worldwide=bool(WORLDWIDE_PATTERN.search(text)),
+        utc_min=utc_min,
+        utc_max=utc_max,
+    )
+
+
+def tag_locations(jobs):
+    """Add `location_info` to job dicts (in place) and return them"""
+    for job in jobs:
+        job['location_info'] = parse_location(job.get('location')).to_document()
+    return jobs
+
+
+def ensure_location_indexes(collection):
+    for field in INDEXED_FIELDS:
+        collection.create_index(field)
+
+
+def backfill_collection(collection, batch_size=1000):
+    """Annotate every stored job and company region in place; returns (documents, jobs) updated"""
+    from pymongo import UpdateOne
+
+    documents = 0
+    jobs_tagged = 0
+    operations = []
+    query = {'$or': [{'jobs.0': {'$exists': True}}, {'region': {'$type': 'string'}}]}
+    for document in collection.find(query, {'jobs': 1, 'region': 1}, batch_size=batch_size):
+        update = {'jobs': tag_locations(document.get('jobs') or [])}
+        if document.get('region'):
+            update['region_info'] = parse_location(document['region']).to_document()
+        operations.append(UpdateOne({'_id': document['_id']}, {'$set': update}))
+        documents += 1
+        jobs_tagged += len(update['jobs'])
+        if len(operations) >= batch_size:
+            collection.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+    return documents, jobs_tagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalise free-text locations offline")
+    parser.add_argument('--text', action='append', help='Parse a location and print the result')
+    parser.add_argument('--backfill', action='store_true',
+                        help='Annotate every job stored in company_jobs and create the location indexes')
+    args = parser.parse_args()
+
+    for text in args.text or []:
+        print(f"{text!r}: {parse_location(text).to_document()}")
+
+    if args.backfill:
+        from lib.runtime import get_runtime
+
+        collection = get_runtime().collection
+        if collection is None:
+            print("MongoDB collection not available")
+            return
+        start = time.monotonic()
+        ensure_location_indexes(collection)
+        documents, jobs = backfill_collection(collection)
+        print(f"✅ Annotated {jobs} jobs in {documents} companies in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,28 @@
 import json
-from browser_use import Agent, BrowserSession, Controller
-from browser_use.browser import BrowserProfile
 import asyncio
-from browser_use.llm import ChatOpenRouter
-from pydantic import SecretStr, BaseModel
+from pydantic import BaseModel
 import os
-from dotenv import load_dotenv
 import re
-from lmnr import Laminar, Instruments
-from pymongo import MongoClient
 from datetime import datetime
 import traceback
 import logging
 import uuid
 
-from sentry_sdk.utils import json_dumps
-logging.getLogger('pymongo').setLevel(logging.WARNING)
-
-# Set the environment variable so Playwright uses your custom browser path
-os.environ["PLAYWRIGHT_BROWSERS_PATH"] = "/media/mats/3c24094c-800b-4576-a390-d23a6d7a02291/workspace/test_ai_gen/browser_use/.playwright-browsers"
-# Read environment variables
-load_dotenv()
-
-headless=True
-# this line auto-instruments Browser Use and any browser you use (local or remote)
-# Laminar.initialize(project_api_key=os.getenv('LMNR_PROJECT_API_KEY'), disable_batch=True, disabled_instruments={Instruments.BROWSER_USE})
-
-# Initialize OpenRouter with any model available on their platform
-llm = ChatOpenRouter(
-    # model='mistralai/mistral-small-3.2-24b-instruct:free',
-    model='deepseek/deepseek-r1:free',
-    api_key=os.getenv('OPENROUTER_API_KEY'),
-    temperature=0.7,
-)
-
-def find_chrome():
-    base_dir = os.environ["PLAYWRIGHT_BROWSERS_PATH"]
-    for name in os.listdir(base_dir):
-        if name.startswith("chromium-"):
-            chrome_path = os.path.join(base_dir, name, 'chrome-linux', 'chrome')
-            if os.path.exists(chrome_path):
-                return chrome_path
-    return None
+from lib.runtime import get_runtime
+from lib.mongo_pool import close_mongo_pool, get_mongo_pool
+from lib.preflight import run_preflight
+from lib.scheduler import STATE_COLLECTION, CrawlScheduler
+from lib.autoscaler import Autoscaler, AutoscalerConfig
+from lib.prefetcher import Prefetcher
+from lib.result_recovery import recover_result
+from lib.agent_checkpoint import CheckpointRecorder
+from lib.role_classifier import tag_jobs
+from lib.locations import parse_location, tag_locations
+from lib.lean_browsing import LEAN_BROWSER_ARGS, PageLoadStats, attach_page_load_stats, enable_lean_browsing
 
-CHROME_BIN = find_chrome()
+logging.getLogger('pymongo').setLevel(logging.WARNING)
 
-# --- Structured output schema & controller ---
+# --- Structured output schema ---
 class ResultJob(BaseModel):
     job_title: str
     url: str
@@ -62,22 +39,49 @@ class FindJobPage(BaseModel):
 class AgentOutput(BaseModel):
     results: list[ResultJob]
 
-controller = Controller()
+# --- Agent prompts ---
+FIND_JOBS_PAGE_TASK = '''
+            Goal: find if {url} has open job listings page
+            - Navigate to the careers/jobs/join-us page via header/footer/nav or search.
+            - Confirm it's a jobs page (scroll if needed). you should see a list of job listings
+            - if it exisits return the url of the jobs page
+            '''
+
+EXTRACT_JOB_LISTINGS_TASK = '''
+            Goal: find if {url} 
+            - Confirm it's a jobs page (scroll if needed).
+            - Extract all job listings, whatever the role (roles are filtered locally afterwards).
+            - Look for job titles, locations, and URLs.
+            - Complete the task when you find job listings or confirm none exist.
+        '''
+
+# Used without an agent, on page text the tiered fetcher already retrieved
+EXTRACT_JOB_LISTINGS_FROM_TEXT_PROMPT = '''
+            Goal: find if {url} lists open jobs and extract them from the page text below.
+            - Links are written as [text](url).
+            - Extract all job listings, whatever the role (roles are filtered locally afterwards).
+            - For each job return the job title, location and the job url.
+            - Return an empty list if there are no jobs.
+
+            Page text:
+            {page_text}
+        '''
+
+# Wall-clock limit for one agent run; an interrupted run resumes from its checkpoint on retry
+AGENT_RUN_TIMEOUT_S = 900
+# Agent runs per stage when one is interrupted and leaves a checkpoint behind
+AGENT_ATTEMPTS = 2
 
 # --- MongoDB setup ---
-def init_mongodb():
-    """Initialize MongoDB connection and return collection"""
+def init_mongodb(collection_name='company_jobs'):
+    """Collection from the process-wide connection pool (eval runs pass their own collection name)"""
     try:
-        # Connect to MongoDB (adjust connection string as needed)
-        client = MongoClient(os.getenv('MONGO_DB_URI'))
-        db = client['job_scraper']
-        collection = db['company_jobs']
-        return collection
+        return get_mongo_pool().collection(collection_name)
     except Exception as e:
         print(f"Error connecting to MongoDB: {e}")
         return None
 
-def save_company_result(collection, company_name, company_url, status, jobs=None, error_message=None, has_job_page=None, jobs_page_url=None):
+def save_company_result(collection, company_name, company_url, status, jobs=None, error_message=None, has_job_page=None, jobs_page_url=None, fetch_stats=None, region=None):
     """Save company processing result to MongoDB"""
     if collection is None:
         print("MongoDB collection not available, skipping save")
@@ -91,6 +95,7 @@ def save_company_result(collection, company_name, company_url, status, jobs=None
             'status': status,  # 'in_progress', 'complete', 'failed'
             'jobs': jobs if jobs else [],
             'job_count': len(jobs) if jobs else 0,
+            'target_job_count': sum(1 for job in jobs if job.get('is_target_role')) if jobs else 0,
             'updated_at': datetime.utcnow()
         }
         
@@ -101,6 +106,11 @@ def save_company_result(collection, company_name, company_url, status, jobs=None
             document['has_job_page'] = has_job_page
         if jobs_page_url is not None:
             document['jobs_page_url'] = jobs_page_url
+        if fetch_stats is not None:
+            document['fetch_stats'] = fetch_stats
+        if region is not None:
+            document['region'] = region
+            document['region_info'] = parse_location(region).to_document()
             
         # Set processed_at only on first insert
         update_operations = {'$set': document}
@@ -117,6 +127,10 @@ def save_company_result(collection, company_name, company_url, status, jobs=None
     except Exception as e:
         print(f"Error saving to MongoDB: {e}")
 
+async def asave_company_result(collection, *args, **kwargs):
+    """save_company_result on the Mongo pool's executor, so concurrent companies don't block the event loop"""
+    await get_mongo_pool().run(save_company_result, collection, *args, **kwargs)
+
 def read_companies_list():
     """Read the companies list and extract company names and URLs"""
     companies = []
@@ -145,7 +159,8 @@ def read_companies_list():
                     company_name = match.group(1)
                     companies.append({
                         'name': company_name,
-                        'url': url_part
+                        'url': url_part,
+                        'region': parts[2].strip() if len(parts) >= 3 and parts[2].strip() else None
                     })
                     
     except FileNotFoundError:
@@ -155,54 +170,91 @@ def read_companies_list():
         
     return companies
 
-async def extract_job_listings(url, return_string=False):
-    task = f'''
-            Goal: find if {url} 
-            - Confirm it's a jobs page (scroll if needed).
-            - Extract all matching roles: Web, Fullstack, Backend, Software (Engineer or Developer).
-            - Look for job titles, locations, and URLs.
-            - Complete the task when you find job listings or confirm none exist.
-        '''
-    print("Current task: ", task)
-    
-    # Define initial actions to navigate to Google first
-    initial_actions = [
-        {'go_to_url': {'url': url, 'new_tab': True}},
-    ]
-    
+async def create_browser_session(runtime, profile_prefix, stats=None):
+    """Start a browser for one agent run, with lean browsing if the runtime enables it"""
+    from browser_use import BrowserSession
+    from browser_use.browser import BrowserProfile
+
     # Create unique profile directory for this operation
-    unique_profile = f"./profiles/extract-{uuid.uuid4().hex[:8]}"
+    unique_profile = f"./profiles/{profile_prefix}-{uuid.uuid4().hex[:8]}"
     os.makedirs(os.path.dirname(unique_profile), exist_ok=True)
+
+    lean = runtime.lean_browsing
     
     # Create working profile
     bp = BrowserProfile(
         viewport_size={'width': 1280, 'height': 720},
         user_data_dir=unique_profile,
-        executable_path=CHROME_BIN,
-        headless=headless,  # Let's see what's happening
+        executable_path=runtime.chrome_bin,
+        headless=runtime.headless,  # Let's see what's happening
         chromium_sandbox=False,
-        args=[
-            "--no-sandbox",
-            "--disable-dev-shm-usage",
-            "--disable-gpu",
-        ],
+        args=runtime.browser_args + (LEAN_BROWSER_ARGS if lean else []),
+        # Agent.run() would stop the browser when it finishes; callers read the final page first, then kill()
+        keep_alive=True,
+        **(lean.profile_kwargs() if lean else {}),
     )
+
+    browser_session = BrowserSession(browser_profile=bp)
+    await browser_session.start()
+    if stats is not None:
+        await attach_page_load_stats(browser_session.browser_context, stats)
+    if lean:
+        await enable_lean_browsing(browser_session.browser_context, lean, stats)
+    return browser_session
+
+async def archive_page(runtime, company, page_url, final_url, html, tier):
+    """Keep the jobs page for offline reprocessing if the runtime archives pages
+
+    Compression and the sqlite insert run on the pool executor, not the event loop.
+    """
+    if company is None or not html or runtime.archive is None or final_url in (None, '', 'about:blank'):
+        return
+    try:
+        await get_mongo_pool().run(runtime.archive.put, company['name'], company['url'], page_url, final_url, html,
+                                   tier=tier)
+    except Exception as e:
+        print(f"Could not archive {final_url}: {e}")
+
+async def extract_job_listings(url, return_string=False, runtime=None, stats=None, company=None, checkpoint=None):
+    from browser_use import Agent
+
+    runtime = runtime or get_runtime()
+    checkpoint = checkpoint or await CheckpointRecorder.open(runtime, url, 'extract', ExtractJobListingsOp)
+    task = EXTRACT_JOB_LISTINGS_TASK.format(url=url) + checkpoint.resume_note()
+    print("Current task: ", task)
     
-    agent = Agent(
-        task=task,
-        llm=llm,
-        browser_profile=bp,
-        initial_actions=initial_actions,
-        controller=controller,
-        output_model_schema=ExtractJobListingsOp,
-        llm_timeout=120
-    )
+    # Define initial actions to navigate to Google first (or back to where an interrupted run stopped)
+    initial_actions = [
+        {'go_to_url': {'url': checkpoint.start_url or url, 'new_tab': True}},
+    ]
+    
+    browser_session = await create_browser_session(runtime, 'extract', stats)
 
     try:
-        history = await agent.run()
-        result = history.final_result()
-        if result:
-            parsed: ExtractJobListingsOp = ExtractJobListingsOp.model_validate_json(result)
+        agent = Agent(
+            task=task,
+            llm=runtime.llm,
+            browser_session=browser_session,
+            initial_actions=initial_actions,
+            controller=runtime.controller,
+            output_model_schema=ExtractJobListingsOp,
+            llm_timeout=120
+        )
+
+        history = await asyncio.wait_for(agent.run(on_step_end=checkpoint.on_step_end), AGENT_RUN_TIMEOUT_S)
+        if company is not None and runtime.archive is not None:
+            try:
+                page = await browser_session.get_current_page()
+                await archive_page(runtime, company, url, page.url, await page.content(), 'agent')
+            except Exception as e:
+                print(f"Could not snapshot the agent's page: {e}")
+        parsed = await recover_result(history, ExtractJobListingsOp, url, runtime, browser_session)
+        # The run finished: nothing to resume, whatever it found
+        await checkpoint.clear()
+        if parsed is not None:
+            # Jobs collected before an earlier interruption (or in extractions the final answer left out)
+            earlier = checkpoint.earlier_jobs([job.model_dump() for job in parsed.results])
+            parsed.results.extend(ResultJob(**job) for job in earlier)
 
             for job in parsed.results:
                 print('\n\n--------------------------------')
@@ -220,57 +272,45 @@ async def extract_job_listings(url, return_string=False):
 
         return parsed.results
     except Exception as e:
+        # Crash or timeout: the checkpoint stays for a retry to resume
+        checkpoint.interrupted = True
         print(f"Agent failed with error: {e}")
         traceback.print_exc()
         return []
+    finally:
+        await browser_session.kill()
 
-async def find_jobs_page(url, return_string=False):
-    task = f'''
-            Goal: find if {url} has open job listings page
-            - Navigate to the careers/jobs/join-us page via header/footer/nav or search.
-            - Confirm it's a jobs page (scroll if needed). you should see a list of job listings
-            - if it exisits return the url of the jobs page
-            '''
+async def find_jobs_page(url, return_string=False, runtime=None, stats=None, checkpoint=None):
+    from browser_use import Agent
+
+    runtime = runtime or get_runtime()
+    checkpoint = checkpoint or await CheckpointRecorder.open(runtime, url, 'find', FindJobPage)
+    task = FIND_JOBS_PAGE_TASK.format(url=url) + checkpoint.resume_note()
     print("Current task: ", task)
     
-    # Define initial actions to navigate to Google first
+    # Define initial actions to navigate to Google first (or back to where an interrupted run stopped)
     initial_actions = [
-        {'go_to_url': {'url': url, 'new_tab': True}},
+        {'go_to_url': {'url': checkpoint.start_url or url, 'new_tab': True}},
     ]
     
-    # Create unique profile directory for this operation
-    unique_profile = f"./profiles/find-{uuid.uuid4().hex[:8]}"
-    os.makedirs(os.path.dirname(unique_profile), exist_ok=True)
-    
-    # Create working profile
-    bp = BrowserProfile(
-        viewport_size={'width': 1280, 'height': 720},
-        user_data_dir=unique_profile,
-        executable_path=CHROME_BIN,
-        headless=headless,  # Let's see what's happening
-        chromium_sandbox=False,
-        args=[
-            "--no-sandbox",
-            "--disable-dev-shm-usage",
-            "--disable-gpu",
-        ],
-    )
-    
-    agent = Agent(
-        task=task,
-        llm=llm,
-        browser_profile=bp,
-        initial_actions=initial_actions,
-        controller=controller,
-        output_model_schema=FindJobPage,
-        llm_timeout=120
-    )
+    browser_session = await create_browser_session(runtime, 'find', stats)
 
     try:
-        history = await agent.run()
-        result = history.final_result()
-        if result:
-            parsed: FindJobPage = FindJobPage.model_validate_json(result)
+        agent = Agent(
+            task=task,
+            llm=runtime.llm,
+            browser_session=browser_session,
+            initial_actions=initial_actions,
+            controller=runtime.controller,
+            output_model_schema=FindJobPage,
+            llm_timeout=120
+        )
+
+        history = await asyncio.wait_for(agent.run(on_step_end=checkpoint.on_step_end), AGENT_RUN_TIMEOUT_S)
+        parsed = await recover_result(history, FindJobPage, url, runtime, browser_session)
+        # The run finished: nothing to resume, whatever it found
+        await checkpoint.clear()
+        if parsed is not None:
 
             print('\n\n----------find jobs page------------')
             print(f'has_job_page:            {parsed.has_jobs_page}')
@@ -285,68 +325,176 @@ async def find_jobs_page(url, return_string=False):
 
         return parsed
     except Exception as e:
+        # Crash or timeout: the checkpoint stays for a retry to resume
+        checkpoint.interrupted = True
         print(f"Agent failed with error: {e}")
         traceback.print_exc()
         return None
+    finally:
+        await browser_session.kill()
+
+async def run_agent_stage(agent_function, stage, url, runtime, **kwargs):
+    """Run an agent stage, retrying (from its checkpoint, if one was saved) only after a crash or timeout
+
+    Raises RuntimeError when every attempt was interrupted, so the company is
+    saved as failed rather than as having no jobs page or no jobs.
+    """
+    output_model = ExtractJobListingsOp if stage == 'extract' else FindJobPage
+    for attempt in range(1, AGENT_ATTEMPTS + 1):
+        checkpoint = await CheckpointRecorder.open(runtime, url, stage, output_model)
+        result = await agent_function(url, runtime=runtime, checkpoint=checkpoint, **kwargs)
+        if not checkpoint.interrupted:
+            return result
+        if attempt < AGENT_ATTEMPTS:
+            print(f"🔁 Retrying {stage} for {url} after an interrupted run (attempt {attempt + 1}/{AGENT_ATTEMPTS})")
+    raise RuntimeError(f"{stage} agent for {url} was interrupted on all {AGENT_ATTEMPTS} attempts")
+
+async def find_jobs_page_without_agent(url, runtime=None, max_pages=5):
+    """Find the jobs page from fetched HTML and careers-link heuristics, or None to fall back to the agent"""
+    runtime = runtime or get_runtime()
+    to_visit = [url]
+    visited = set()
+    while to_visit and len(visited) < max_pages:
+        page_url = to_visit.pop(0)
+        if page_url in visited:
+            continue
+        visited.add(page_url)
+
+        page = await runtime.prefetcher.take(page_url) if runtime.prefetcher is not None else None
+        if page is None:
+            page = await runtime.fetcher.fetch(page_url)
+        if page is None or not page.html or (page.status or 0) >= 400:
+            continue
+        content = page.content()
+        if content.looks_like_jobs_page(min_postings=3):
+            print(f"Found jobs page without agent: {page.final_url} (via {page.tier})")
+            return FindJobPage(has_jobs_page=True, jobs_page_url=page.final_url)
+        to_visit.extend(link for link in content.careers_links(limit=3) if link not in visited)
+    return None
+
+async def extract_job_listings_from_text(url, page_text, runtime=None):
+    """One structured-output LLM call over already fetched page text"""
+    from browser_use.llm.messages import UserMessage
 
-async def process_single_company(collection, company):
+    runtime = runtime or get_runtime()
+    prompt = EXTRACT_JOB_LISTINGS_FROM_TEXT_PROMPT.format(url=url, page_text=page_text)
+    response = await runtime.llm.ainvoke([UserMessage(content=prompt)], output_format=ExtractJobListingsOp)
+    return response.completion.results
+
+async def extract_job_listings_without_agent(url, runtime=None, company=None):
+    """Extract jobs from the fetched jobs page, or None to fall back to the agent"""
+    runtime = runtime or get_runtime()
+    page = await runtime.fetcher.fetch(url)
+    if page is None or not page.html or (page.status or 0) >= 400:
+        return None
+    await archive_page(runtime, company, url, page.final_url, page.html, page.tier)
+    content = page.content()
+    if not content.job_posting_links():
+        return None  # listings behind clicks/pagination need the agent
+    if runtime.batch_extractor is not None:
+        results = await runtime.batch_extractor.extract(page.final_url, content.pruned_text())
+    else:
+        results = await extract_job_listings_from_text(page.final_url, content.pruned_text(), runtime)
+    print(f"Extracted {len(results)} jobs without agent from {page.final_url} (via {page.tier})")
+    return results or None
+
+async def process_single_company(collection, company, runtime=None):
     """Process a single company with both steps"""
+    runtime = runtime or get_runtime()
     company_name = company['name']
     url = company['url']
+    # Canonical URL from the pre-flight pass, if it ran; `url` stays the DB key
+    start_url = company.get('fetch_url') or url
     
     print(f"Starting processing for {company_name}")
+    if runtime.prefetcher is not None:
+        runtime.prefetcher.advance(company)
     
     # Mark as in_progress before starting
-    save_company_result(collection, company_name, url, 'in_progress')
+    await asave_company_result(collection, company_name, url, 'in_progress', region=company.get('region'))
+
+    # Bytes transferred and page-load times per stage
+    fetch_stats = {}
 
     # Step 1: Find jobs page
     try:
-        save_company_result(collection, company_name, url, 'find_jobs_page_progress')
-        result = await find_jobs_page(url)
+        await asave_company_result(collection, company_name, url, 'find_jobs_page_progress')
+        result = None
+        if runtime.tiered_fetch:
+            try:
+                result = await find_jobs_page_without_agent(start_url, runtime)
+            except Exception as e:
+                print(f"Fetcher could not find jobs page for {company_name}, using agent: {e}")
+        if result is not None:
+            fetch_stats['find_jobs_page'] = {'method': 'fetcher'}
+        else:
+            find_stats = PageLoadStats()
+            try:
+                result = await run_agent_stage(find_jobs_page, 'find', start_url, runtime, stats=find_stats)
+            finally:
+                fetch_stats['find_jobs_page'] = {'method': 'agent', **find_stats.summary()}
 
         if result != None and result.has_jobs_page:
             print(f"Found jobs page for {company_name}")
-            save_company_result(collection, company_name, url, 'find_jobs_page_complete', 
+            await asave_company_result(collection, company_name, url, 'find_jobs_page_complete', 
                               jobs=[], 
                               has_job_page=result.has_jobs_page, 
-                              jobs_page_url=result.jobs_page_url)
+                              jobs_page_url=result.jobs_page_url,
+                              fetch_stats=fetch_stats)
         else:
             print(f"No jobs page found for {company_name}")
-            save_company_result(collection, company_name, url, 'find_jobs_page_not_found', 
+            await asave_company_result(collection, company_name, url, 'find_jobs_page_not_found', 
                               jobs=[], 
                               has_job_page=result.has_jobs_page if result else False, 
-                              error_message='No jobs page found')
+                              error_message='No jobs page found',
+                              fetch_stats=fetch_stats)
             return  # Exit early if no jobs page
 
     except Exception as e:
         print(f"Failed to find jobs page for {company_name}: {e}")
         traceback.print_exc()
-        save_company_result(collection, company_name, url, 'find_jobs_page_failed', error_message=str(e))
+        await asave_company_result(collection, company_name, url, 'find_jobs_page_failed', error_message=str(e),
+                            fetch_stats=fetch_stats)
         return
 
     # Step 2: Extract job listings (only if jobs page found)
     if result != None and result.has_jobs_page and result.jobs_page_url:
         try:
-            save_company_result(collection, company_name, url, 'extract_job_listings_progress')
-            job_results = await extract_job_listings(result.jobs_page_url)
+            await asave_company_result(collection, company_name, url, 'extract_job_listings_progress')
+            job_results = None
+            if runtime.tiered_fetch:
+                try:
+                    job_results = await extract_job_listings_without_agent(result.jobs_page_url, runtime,
+                                                                           company=company)
+                except Exception as e:
+                    print(f"Fetcher could not extract jobs for {company_name}, using agent: {e}")
+            if job_results is not None:
+                fetch_stats['extract_job_listings'] = {'method': 'fetcher'}
+            else:
+                extract_stats = PageLoadStats()
+                try:
+                    job_results = await run_agent_stage(extract_job_listings, 'extract', result.jobs_page_url,
+                                                        runtime, stats=extract_stats, company=company)
+                finally:
+                    fetch_stats['extract_job_listings'] = {'method': 'agent', **extract_stats.summary()}
 
             if job_results != None and len(job_results) > 0:
                 print(f"Found {len(job_results)} jobs for {company_name}")
-                save_company_result(collection, company_name, url, 'extract_job_listings_complete', 
-                                  [job.model_dump() for job in job_results])
+                await asave_company_result(collection, company_name, url, 'extract_job_listings_complete', 
+                                  tag_locations(tag_jobs([job.model_dump() for job in job_results])), fetch_stats=fetch_stats)
             else:
                 print(f"No job listings found for {company_name}")
-                save_company_result(collection, company_name, url, 'extract_job_listings_no_jobs_found', 
-                                  [], 'No jobs found')
+                await asave_company_result(collection, company_name, url, 'extract_job_listings_no_jobs_found', 
+                                  [], 'No jobs found', fetch_stats=fetch_stats)
 
         except Exception as e:
             print(f"Failed to extract job listings for {company_name}: {e}")
             traceback.print_exc()
-            save_company_result(collection, company_name, url, 'extract_job_listings_failed', 
-                              error_message=str(e))
+            await asave_company_result(collection, company_name, url, 'extract_job_listings_failed', 
+                              error_message=str(e), fetch_stats=fetch_stats)
 
-async def process_batch(collection, batch, batch_num, total_batches):
-    """Process a batch of companies"""
+async def process_batch(collection, batch, batch_num, total_batches, runtime=None, limiter=None):
+    """Process a batch of companies, `limiter` (an autoscaled ConcurrencyLimiter) bounding concurrency"""
     print(f"\n{'='*80}")
     print(f"Processing batch {batch_num}/{total_batches} with {len(batch)} companies")
     print(f"{'='*80}")
@@ -356,8 +504,8 @@ async def process_batch(collection, batch, batch_num, total_batches):
     semaphore = asyncio.Semaphore(max_concurrent_per_batch)
     
     async def process_with_semaphore(company):
-        async with semaphore:
-            return await process_single_company(collection, company)
+        async with (limiter.slot() if limiter is not None else semaphore):
+            return await process_single_company(collection, company, runtime=runtime)
     
     tasks = []
     for company in batch:
@@ -380,10 +528,29 @@ async def process_batch(collection, batch, batch_num, total_batches):
     print(f"\nBatch {batch_num} completed: ✅ {successful} successful, ❌ {failed} failed")
     return successful, failed
 
+async def record_crawl_results(scheduler, collection, companies):
+    """Update crawl state from company_jobs; a failure here never stops the run"""
+    if scheduler is None or collection is None or not companies:
+        return
+    try:
+        await get_mongo_pool().run(scheduler.record_results, collection, companies)
+    except Exception as e:
+        print(f"Could not record crawl state for {len(companies)} companies: {e}")
+
 async def main():
     """Main function to orchestrate batch processing"""
-    # Initialize MongoDB
-    collection = init_mongodb()
+    # Initialize MongoDB: one pooled client, checked and indexed before any work starts
+    collection = get_runtime().collection
+    if collection is not None:
+        health = get_mongo_pool().health()
+        if health['ok']:
+            print(f"✅ MongoDB reachable in {health['latency_ms']} ms (pool up to {health['max_pool_size']})")
+            try:
+                get_mongo_pool().ensure_indexes()
+            except Exception as e:
+                print(f"Could not create MongoDB indexes: {e}")
+        else:
+            print(f"⚠️  MongoDB health check failed, results will not be saved reliably: {health['error']}")
     
     # Read companies list
     print("Reading companies list...")
@@ -393,9 +560,59 @@ async def main():
     if not companies:
         print("No companies found to process.")
         return
+
+    # Only crawl companies whose jobs are likely to have changed, best bets first
+    use_scheduler = True
+    crawl_budget = None  # max companies this run, None for every due company
+    scheduler = CrawlScheduler(init_mongodb(STATE_COLLECTION)) if use_scheduler else None
+
+    # Skip dead and duplicate companies before spending agent time on them
+    run_preflight_check = True
+    if run_preflight_check:
+        try:
+            companies, newly_dead = await run_preflight(companies, collection=collection)
+            # Dead companies back off like failed crawls (run_preflight stored them as preflight_dead);
+            # ones still dead from the pre-flight cache were recorded when they were checked
+            await record_crawl_results(scheduler, collection, newly_dead)
+        except Exception as e:
+            print(f"⚠️  Pre-flight check failed, crawling all {len(companies)} companies: {e}")
+        if not companies:
+            print("No live companies to process.")
+            return
+
+    if scheduler is not None:
+        try:
+            companies = await get_mongo_pool().run(scheduler.plan, companies, crawl_budget)
+        except Exception as e:
+            # Without crawl state every company is due; scraping goes on, as it did before the scheduler
+            print(f"⚠️  Crawl scheduler unavailable, crawling all {len(companies)} companies in list order: {e}")
+            scheduler = None
+        if not companies:
+            print("No companies due for a crawl.")
+            return
     
+    # Fetch homepages/careers pages of the next companies while the current ones run
+    runtime = get_runtime()
+    use_prefetch = True
+    if use_prefetch and runtime.tiered_fetch:
+        runtime.prefetcher = Prefetcher(runtime, companies)
+
+    # Share LLM calls between companies whose jobs pages came from the fetcher
+    use_batch_extraction = True
+    if use_batch_extraction and runtime.tiered_fetch:
+        from lib.batch_extraction import BatchExtractor
+
+        runtime.batch_extractor = BatchExtractor(runtime)
+
+    # Size concurrency from CPU/memory pressure instead of fixed constants
+    use_autoscaler = True
+    autoscaler = Autoscaler(AutoscalerConfig()) if use_autoscaler else None
+
     # Process in batches
     batch_size = 1  # Adjust based on your system resources
+    if autoscaler is not None:
+        # Batches only group scheduler bookkeeping; the autoscaler decides how many run at once
+        batch_size = autoscaler.config.max_workers * 4
     batches = [companies[i:i + batch_size] for i in range(0, len(companies), batch_size)]
     total_batches = len(batches)
     
@@ -408,11 +625,15 @@ async def main():
     total_failed = 0
     
     start_time = datetime.utcnow()
+    if autoscaler is not None:
+        autoscaler.start()
     
     for i, batch in enumerate(batches, 1):
         batch_start = datetime.utcnow()
-        successful, failed = await process_batch(collection, batch, i, total_batches)
+        successful, failed = await process_batch(collection, batch, i, total_batches,
+                                                 limiter=autoscaler.limiter if autoscaler else None)
         batch_end = datetime.utcnow()
+        await record_crawl_results(scheduler, collection, batch)
         
         total_successful += successful
         total_failed += failed
@@ -426,6 +647,8 @@ async def main():
             print(f"⏸️  Waiting {delay} seconds before next batch...")
             await asyncio.sleep(delay)
     
+    if autoscaler is not None:
+        await autoscaler.stop()
     end_time = datetime.utcnow()
     total_duration = (end_time - start_time).total_seconds()
     
@@ -439,6 +662,19 @@ async def main():
     print(f"   ⏱️  Total time: {total_duration:.1f} seconds")
     print(f"   🚀 Average per company: {total_duration/len(companies):.1f} seconds")
 
+    if runtime.tiered_fetch:
+        print(f"   🌐 Fetch tiers: {runtime.fetcher.counters}")
+    if runtime.prefetcher is not None:
+        print(f"   🔮 Prefetch: {runtime.prefetcher.counters}")
+    if runtime.batch_extractor is not None:
+        print(f"   📚 Batched extraction: {runtime.batch_extractor.counters}")
+    if autoscaler is not None and autoscaler.history:
+        limits = [limit for limit, _ in autoscaler.history]
+        print(f"   ⚖️  Workers: min {min(limits)}, max {max(limits)}, avg {sum(limits) / len(limits):.1f}")
+    # Release pooled HTTP connections, the shared render browser and the Mongo pool
+    await runtime.aclose()
+    close_mongo_pool()
+
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
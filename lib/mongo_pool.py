@@ -0,0 +1,189 @@
+"""One pooled MongoDB client per process, with an async path for the pipeline.
+
+Every collection handed out by init_mongodb comes from the same MongoClient,
+so the pipeline, scheduler and evaluators share one connection pool instead
+of opening a client each. pymongo is blocking; async code runs its calls on a
+thread pool sized like the connection pool, so concurrent companies use
+separate connections instead of stalling the event loop one write at a time:
+
+    pool = get_mongo_pool()
+    await pool.run(collection.update_one, query, update, upsert=True)
+
+Pool size and timeouts come from MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE and
+MONGO_SERVER_SELECTION_TIMEOUT_MS. Startup check and index creation:
+
+    python -m lib.mongo_pool --health --ensure-indexes
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+DEFAULT_DATABASE = 'job_scraper'
+DEFAULT_MAX_POOL_SIZE = 32
+DEFAULT_MIN_POOL_SIZE = 2
+DEFAULT_SERVER_SELECTION_TIMEOUT_MS = 5000
+MAX_IDLE_TIME_MS = 60000
+
+# Fields the pipeline filters and sorts on, per collection
+INDEXES = {
+    'company_jobs': [
+        [('company_name', 1), ('company_url', 1)],  # save_company_result upserts
+        [('company_url', 1)],
+        [('status', 1)],
+        [('updated_at', 1)],  # exporter / job index watermarks
+    ],
+    'crawl_state': [
+        [('company_url', 1)],
+        [('next_due_at', 1)],
+    ],
+    'agent_checkpoints': [
+        [('company_url', 1), ('stage', 1)],
+    ],
+}
+
+
+class MongoPool:
+    """Shared MongoClient plus the executor its blocking calls run on from async code"""
+
+    def __init__(self, uri=None, database=DEFAULT_DATABASE, max_pool_size=None, min_pool_size=None,
+                 server_selection_timeout_ms=None):
+        self.uri = uri or os.getenv('MONGO_DB_URI')
+        self.database = database
+        self.max_pool_size = max_pool_size or int(os.getenv('MONGO_MAX_POOL_SIZE', DEFAULT_MAX_POOL_SIZE))
+        self.min_pool_size = min_pool_size or int(os.getenv('MONGO_MIN_POOL_SIZE', DEFAULT_MIN_POOL_SIZE))
+        self.server_selection_timeout_ms = server_selection_timeout_ms or int(
+            os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', DEFAULT_SERVER_SELECTION_TIMEOUT_MS))
+        self._client = None
+        self._executor = None
+        self._reachable = None  # answer of the last health check
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from pymongo import MongoClient
+
+                    self._client = MongoClient(
+                        self.uri,
+                        maxPoolSize=self.max_pool_size,
+                        minPoolSize=self.min_pool_size,
+                        maxIdleTimeMS=MAX_IDLE_TIME_MS,
+                        serverSelectionTimeoutMS=self.server_selection_timeout_ms,
+                        retryWrites=True,
+                    )
+        return self._client
+
+    def collection(self, name):
+        return self.client[self.database][name]
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # One thread per pooled connection: more would only queue inside pymongo
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_pool_size,
+                                                        thread_name_prefix='mongo')
+        return self._executor
+
+    async def run(self, function, *args, **kwargs):
+        """Blocking database call, awaited without holding up the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(function, *args, **kwargs))
+
+    def health(self):
+        """{'ok', 'latency_ms', 'error', and pool settings}; never raises"""
+        start = time.monotonic()
+        try:
+            self.client.admin.command('ping')
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        self._reachable = ok
+        return {'ok': ok, 'latency_ms': round((time.monotonic() - start) * 1000, 1), 'error': error,
+                'max_pool_size': self.max_pool_size, 'min_pool_size': self.min_pool_size}
+
+    def reachable(self):
+        """Whether the server answered the last health check, checking once if none ran yet"""
+        if self._reachable is None:
+            self.health()
+        return self._reachable
+
+    def ensure_indexes(self):
+        """Create the pipeline's indexes (a no-op for the ones that exist); returns names created"""
+        from lib.locations import ensure_location_indexes
+
+        created = []
+        for name, indexes in INDEXES.items():
+            collection = self.collection(name)
+            for keys in indexes:
+                created.append(f'{name}.{collection.create_index(keys)}')
+        ensure_location_indexes(self.collection('company_jobs'))
+        return created
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_mongo_pool():
+    """Process-wide pool, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from lib.runtime import load_environment
+
+                load_environment()
+                _pool = MongoPool()
+    return _pool
+
+
+def close_mongo_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def main():
+    from lib.runtime import load_environment
+
+    load_environment()
+    parser = argparse.ArgumentParser(description="Check the MongoDB connection pool")
+    parser.add_argument('--health', action='store_true', help='Ping the server through the pool')
+    parser.add_argument('--ensure-indexes', action='store_true', help='Create the pipeline indexes')
+    args = parser.parse_args()
+
+    pool = get_mongo_pool()
+    try:
+        if args.health:
+            health = pool.health()
+            status = '✅' if health['ok'] else '❌'
+            print(f"{status} MongoDB ping {health['latency_ms']} ms, pool {health['min_pool_size']}-"
+                  f"{health['max_pool_size']}" + (f": {health['error']}" if health['error'] else ''))
+        if args.ensure_indexes:
+            for name in pool.ensure_indexes():
+                print(f"🗂️  {name}")
+    finally:
+        close_mongo_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Cheap, dependency-free analysis of fetched HTML.
+
+Used by the tiered fetcher to decide whether a page needs JavaScript, to find
+careers links without an agent, and to prune pages down to the text + links
+an extraction prompt needs.
+"""
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+# Elements whose content is never visible text
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'head', 'iframe', 'canvas'}
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'li', 'tr', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+              'header', 'footer', 'nav', 'ul', 'ol', 'table', 'main', 'aside', 'form'}
+
+CAREERS_TEXT = re.compile(
+    r'\b(careers?|jobs?|join (us|our team|the team)|work (with|for) us|open (positions|roles)|'
+    r'vacanc(y|ies)|we\'?re hiring|hiring|opportunities)\b', re.IGNORECASE)
+CAREERS_PATH = re.compile(r'/(careers?|jobs?|join(-us)?|work-with-us|open-positions|vacancies|hiring)(/|$|\.)',
+                          re.IGNORECASE)
+
+# Hosted applicant tracking systems; a link here is almost always the real job board
+ATS_HOSTS = ('greenhouse.io', 'lever.co', 'ashbyhq.com', 'workable.com', 'smartrecruiters.com',
+             'recruitee.com', 'personio.de', 'personio.com', 'bamboohr.com', 'teamtailor.com',
+             'myworkdayjobs.com', 'breezy.hr', 'jobvite.com', 'icims.com', 'jazzhr.com', 'homerun.co',
+             'join.com', 'welcometothejungle.com', 'workatastartup.com', 'rippling-ats.com')
+
+JOB_POSTING_PATH = re.compile(
+    r'(/jobs?/[\w-]*\d|/positions?/[\w-]+|/openings?/[\w-]+|/vacanc(y|ies)/[\w-]+|/o/[\w-]+|/j/[\w]+|'
+    r'/careers?/[\w-]+/[\w-]+|/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})', re.IGNORECASE)
+
+NOSCRIPT_MARKERS = re.compile(
+    r'(enable javascript|javascript (is )?(required|disabled)|requires javascript|you need to enable javascript|'
+    r'please turn on javascript)', re.IGNORECASE)
+SPA_ROOT = re.compile(
+    r'<div[^>]+id=["\'](root|app|__next|__nuxt|svelte|main-app)["\'][^>]*>\s*</div>|<app-root[^>]*>\s*</app-root>|'
+    r'\bng-app\b|data-reactroot', re.IGNORECASE)
+# Job boards rendered client-side by an embedded ATS script
+ATS_EMBED = re.compile(
+    r'(boards\.greenhouse\.io/embed|grnhse_app|jobs\.lever\.co/.+\?mode=json|ashbyhq\.com/.+embed|'
+    r'smartrecruiters\.com/.+widget|workable\.com/assets/embed|personio\.\w+/.+embed)', re.IGNORECASE)
+
+MIN_VISIBLE_TEXT = 300
+
+
+class _PageParser(HTMLParser):
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.skip_depth = 0
+        self.chunks = []
+        self.links = []
+        self._link_href = None
+        self._link_text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if tag in BLOCK_TAGS:
+            self.chunks.append('\n')
+        if tag == 'a' and self.skip_depth == 0:
+            href = dict(attrs).get('href')
+            if href and not href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                self._link_href = urljoin(self.base_url, href)
+                self._link_text = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if tag == 'a' and self._link_href is not None:
+            text = ' '.join(''.join(self._link_text).split())
+            self.links.append((self._link_href, text))
+            if text:
+                self.chunks.append(f' [{text}]({self._link_href}) ')
+            self._link_href = None
+        if tag in BLOCK_TAGS:
+            self.chunks.append('\n')
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self._link_href is not None:
+            self._link_text.append(data)
+        else:
+            self.chunks.append(data)
+
+
+class PageContent:
+    """Visible text (with inline markdown links) and the links of one HTML page"""
+
+    def __init__(self, html, base_url):
+        parser = _PageParser(base_url)
+        try:
+            parser.feed(html)
+            parser.close()
+        except Exception:
+            pass
+        self.html = html
+        self.base_url = base_url
+        self.links = parser.links
+        lines = (' '.join(line.split()) for line in ''.join(parser.chunks).splitlines())
+        self.text = '\n'.join(line for line in lines if line)
+
+    @property
+    def visible_text_length(self):
+        """Length of the text without link targets"""
+        return len(re.sub(r'\]\([^)]*\)', ']', self.text))
+
+    def needs_javascript(self):
+        """Reason the page has to be rendered in a browser, or None if the HTML is enough"""
+        if self.visible_text_length < MIN_VISIBLE_TEXT:
+            if SPA_ROOT.search(self.html):
+                return 'spa_root'
+            if NOSCRIPT_MARKERS.search(self.html):
+                return 'noscript'
+            return 'empty_body'
+        if ATS_EMBED.search(self.html):
+            return 'ats_embed'
+        return None
+
+    def careers_links(self, limit=5):
+        """Links that most likely lead to the careers/jobs page, best first"""
+        own_host = _site(self.base_url)
+        scored = {}
+        for url, text in self.links:
+            score = 0
+            if is_ats_url(url):
+                score += 5
+            if CAREERS_PATH.search(urlparse(url).path):
+                score += 3
+            if CAREERS_TEXT.search(text):
+                score += 2
+            if _site(url) not in (own_host, '') and not is_ats_url(url):
+                score -= 2
+            if score > 1:
+                scored[url] = max(score, scored.get(url, 0))
+        return [url for url, _ in sorted(scored.items(), key=lambda item: -item[1])][:limit]
+
+    def job_posting_links(self):
+        """Links that look like individual job postings"""
+        postings = []
+        for url, text in self.links:
+            path = urlparse(url).path
+            if not text or len(text) > 120:
+                continue
+            if JOB_POSTING_PATH.search(path) or (is_ats_url(url) and path.count('/') >= 2):
+                postings.append((url, text))
+        return postings
+
+    def looks_like_jobs_page(self, min_postings=2):
+        return len(self.job_posting_links()) >= min_postings
+
+    def pruned_text(self, max_chars=40000):
+        """Text for an extraction prompt, trimmed to a character budget"""
+        return self.text[:max_chars]
+
+
+def _site(url):
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def is_ats_url(url):
+    host = (urlparse(url).hostname or '').lower()
+    return any(host == ats or host.endswith('.' + ats) for ats in ATS_HOSTS)
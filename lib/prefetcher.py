@@ -0,0 +1,113 @@
+"""Lookahead prefetch of upcoming companies while the current ones are being processed.
+
+Agents spend most of their time waiting on the LLM, so the network is idle.
+When a company starts, the next `lookahead` companies in the queue get their
+host resolved, a pooled connection warmed by fetching the homepage over plain
+HTTP, and the best careers link (from the cheap heuristics) fetched too. The
+pages land in a bounded LRU cache that find_jobs_page_without_agent reads
+before going to the network; each entry is handed out once and then dropped.
+
+    runtime.prefetcher = Prefetcher(runtime, companies)
+"""
+import asyncio
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from lib.fetcher import ESCALATE_STATUSES
+from lib.preflight import resolve_host
+
+DEFAULT_LOOKAHEAD = 4
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+
+class Prefetcher:
+    """Warms DNS, connections and pages for the companies after the ones currently running"""
+
+    def __init__(self, runtime, companies, lookahead=DEFAULT_LOOKAHEAD, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, careers_links=1):
+        self.runtime = runtime
+        self.queue = [company.get('fetch_url') or company['url'] for company in companies]
+        self.position = {url: index for index, url in enumerate(self.queue)}
+        self.lookahead = lookahead
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.careers_links = careers_links
+        self.cache = OrderedDict()  # url -> FetchResult, least recently added first
+        self.cache_bytes = 0
+        self.inflight = {}  # url -> task fetching it
+        self.counters = {'prefetched': 0, 'hits': 0, 'misses': 0, 'evicted': 0, 'errors': 0}
+        self._started = set()
+
+    def advance(self, company):
+        """A company is starting: prefetch the ones after it"""
+        index = self.position.get(company.get('fetch_url') or company['url'])
+        if index is None:
+            return
+        for url in self.queue[index + 1:index + 1 + self.lookahead]:
+            if url not in self._started:
+                self._started.add(url)
+                self.inflight[url] = asyncio.create_task(self._prefetch_company(url))
+
+    async def _prefetch_company(self, url):
+        try:
+            host = urlparse(url).hostname
+            if not host or not await resolve_host(host):
+                return
+            page = await self._prefetch_page(url)
+            if page is None or not page.html or (page.status or 0) >= 400:
+                return
+            for link in page.content().careers_links(limit=self.careers_links):
+                await self._prefetch_page(link)
+        except Exception as e:
+            self.counters['errors'] += 1
+            print(f"Prefetch failed for {url}: {e}")
+        finally:
+            self.inflight.pop(url, None)
+
+    async def _prefetch_page(self, url):
+        if url in self.cache:
+            return self.cache[url]
+        # HTTP only: rendering is left to the company's own turn
+        page = await self.runtime.fetcher.fetch(url, allow_browser=False)
+        if page is None:
+            return None
+        self._store(url, page)
+        self.counters['prefetched'] += 1
+        return page
+
+    def _store(self, url, page):
+        self.cache[url] = page
+        self.cache_bytes += page.bytes
+        while self.cache and (len(self.cache) > self.max_entries or self.cache_bytes > self.max_bytes):
+            _, evicted = self.cache.popitem(last=False)
+            self.cache_bytes -= evicted.bytes
+            self.counters['evicted'] += 1
+
+    async def take(self, url):
+        """Prefetched page for a url (waiting for an in-flight prefetch), or None to fetch it normally
+
+        Pages that turned out to need JavaScript (or hit bot protection) are
+        not returned, so the caller's fetch can escalate them to the browser.
+        """
+        task = self.inflight.get(url)
+        if task is not None:
+            await asyncio.shield(task)
+        page = self.cache.pop(url, None)
+        if page is None:
+            self.counters['misses'] += 1
+            return None
+        self.cache_bytes -= page.bytes
+        if page.status in ESCALATE_STATUSES or (page.html and page.content().needs_javascript() is not None):
+            self.counters['misses'] += 1
+            return None
+        self.counters['hits'] += 1
+        return page
+
+    async def aclose(self):
+        for task in list(self.inflight.values()):
+            task.cancel()
+        await asyncio.gather(*self.inflight.values(), return_exceptions=True)
+        self.inflight.clear()
+        self.cache.clear()
+        self.cache_bytes = 0
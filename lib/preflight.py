@@ -0,0 +1,198 @@
+"""Pre-flight pass over the company list: DNS, redirects and HTTP status before any agent runs.
+
+Dead domains cost a full browser + LLM session before failing, and acquired
+companies redirect to the acquirer's site, so several list entries can end up
+scraping the same careers page. This stage checks every company with high
+concurrency over the fetcher's pooled client, caches the canonical final URL,
+marks dead companies in MongoDB and drops duplicates by canonical host.
+
+    python -m lib.preflight            # report only, nothing is saved
+"""
+import asyncio
+import json
+import os
+import socket
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+import httpx
+from pydantic import BaseModel
+
+from lib.fetcher import domain_of
+
+DEFAULT_CACHE_PATH = '.cache/preflight.json'
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+# Dead results are re-checked sooner, a timeout may have been transient
+DEAD_CACHE_TTL_SECONDS = 24 * 3600
+DEFAULT_CONCURRENCY = 100
+# Usually bot protection in front of a live site, not a dead one
+BLOCKED_STATUSES = {401, 403, 429, 503}
+
+
+class PreflightResult(BaseModel):
+    name: str
+    url: str
+    status: str  # 'alive', 'dead' or 'duplicate'
+    final_url: str | None = None
+    canonical_host: str | None = None
+    http_status: int | None = None
+    redirected_offsite: bool = False
+    error: str | None = None
+    duplicate_of: str | None = None
+    checked_at: float = 0.0
+    from_cache: bool = False  # reused from an earlier run rather than checked in this one
+
+
+def _load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(cache, file, indent=2, sort_keys=True)
+
+
+async def resolve_host(host):
+    """True if the host has at least one address"""
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+        return True
+    except socket.gaierror:
+        return False
+
+
+async def check_company(client, company):
+    """DNS + redirect-following GET (headers only) for one company"""
+    name, url = company['name'], company['url']
+    result = PreflightResult(name=name, url=url, status='dead', checked_at=time.time())
+
+    host = urlparse(url).hostname
+    if not host or not await resolve_host(host):
+        result.error = 'dns_failed'
+        return result
+
+    try:
+        async with client.stream('GET', url) as response:
+            result.http_status = response.status_code
+            result.final_url = str(response.url)
+    except httpx.HTTPError as e:
+        result.error = f'{type(e).__name__}: {e}'[:200]
+        return result
+
+    result.canonical_host = domain_of(result.final_url)
+    result.redirected_offsite = result.canonical_host != domain_of(url)
+    if result.http_status < 400 or result.http_status in BLOCKED_STATUSES:
+        result.status = 'alive'
+    else:
+        result.error = f'http_status_{result.http_status}'
+    return result
+
+
+def mark_duplicates(results):
+    """Keep the first company per canonical host, mark the rest as duplicates of it"""
+    first_by_host = {}
+    for result in results:
+        if result.status != 'alive':
+            continue
+        first = first_by_host.setdefault(result.canonical_host, result)
+        if first is not result:
+            result.status = 'duplicate'
+            result.duplicate_of = first.name
+    return results
+
+
+async def preflight_companies(companies, client, cache_path=DEFAULT_CACHE_PATH, concurrency=DEFAULT_CONCURRENCY,
+                              ttl_seconds=CACHE_TTL_SECONDS):
+    """Check every company (reusing fresh cache entries) and return PreflightResults in list order"""
+    cache = _load_cache(cache_path) if cache_path else {}
+    semaphore = asyncio.Semaphore(concurrency)
+    now = time.time()
+
+    async def check(company):
+        cached = cache.get(company['url'])
+        max_age = ttl_seconds if cached and cached['status'] != 'dead' else min(ttl_seconds, DEAD_CACHE_TTL_SECONDS)
+        if cached and now - cached['checked_at'] < max_age:
+            return PreflightResult.model_validate({**cached, 'name': company['name'], 'duplicate_of': None,
+                                                   'from_cache': True})
+        async with semaphore:
+            try:
+                return await check_company(client, company)
+            except Exception as e:
+                # A malformed url or host (e.g. an overlong IDNA label) must not abort the whole pass
+                return PreflightResult(name=company['name'], url=company['url'], status='dead',
+                                       error=f'{type(e).__name__}: {e}'[:200], checked_at=time.time())
+
+    results = await asyncio.gather(*(check(company) for company in companies))
+    # Cache before de-duplication: duplicates depend on the list, liveness doesn't
+    if cache_path:
+        for result in results:
+            cache[result.url] = result.model_dump(exclude={'duplicate_of', 'from_cache'})
+        _save_cache(cache_path, cache)
+    return mark_duplicates(results)
+
+
+async def run_preflight(companies, runtime=None, collection=None, **kwargs):
+    """Filter the company list down to live, unique companies, recording the rest in MongoDB
+
+    Returns (live companies, companies found dead by a check in this run).
+    Live companies get `fetch_url` set to their canonical final URL so the agent
+    starts there without redirect hops; `url` stays the DB key. Dead results
+    reused from the cache are left out of the second list, so callers that
+    count failures don't count the same one again on every run.
+    """
+    from lib.main import asave_company_result
+    from lib.runtime import get_runtime
+
+    runtime = runtime or get_runtime()
+    start = datetime.utcnow()
+    print(f"\n🛫 Pre-flight check of {len(companies)} companies...")
+    results = await preflight_companies(companies, runtime.fetcher.client, **kwargs)
+
+    live = []
+    newly_dead = []
+    counts = {'alive': 0, 'dead': 0, 'duplicate': 0}
+    for company, result in zip(companies, results):
+        counts[result.status] += 1
+        if result.status == 'alive':
+            live.append({**company, 'fetch_url': result.final_url})
+        elif result.status == 'dead':
+            if not result.from_cache:
+                newly_dead.append(company)
+            await asave_company_result(collection, company['name'], company['url'], 'preflight_dead',
+                                      error_message=result.error)
+        else:
+            await asave_company_result(collection, company['name'], company['url'], 'preflight_duplicate',
+                                      error_message=f"Same site as {result.duplicate_of} ({result.canonical_host})")
+
+    duration = (datetime.utcnow() - start).total_seconds()
+    print(f"🛬 Pre-flight done in {duration:.1f}s: ✅ {counts['alive']} alive, "
+          f"💀 {counts['dead']} dead, 👯 {counts['duplicate']} duplicates")
+    return live, newly_dead
+
+
+async def main():
+    from lib.main import read_companies_list
+    from lib.runtime import get_runtime
+
+    companies = read_companies_list()
+    runtime = get_runtime()
+    try:
+        results = await preflight_companies(companies, runtime.fetcher.client)
+    finally:
+        await runtime.aclose()
+
+    for result in results:
+        if result.status != 'alive' or result.redirected_offsite:
+            detail = result.error or result.duplicate_of or f"-> {result.final_url}"
+            print(f"{result.status:>9}  {result.name:<40} {result.url:<45} {detail}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
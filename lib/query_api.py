@@ -0,0 +1,143 @@
+"""Read-side HTTP/JSON API over the scraped jobs, served from an in-memory JobIndex.
+
+    python -m lib.query_api --port 8080 --refresh-interval 30
+
+    GET /search?q=backend eng&country=DE&region=Europe&remote=true&role=backend&limit=20&offset=0&facets=country,role
+    GET /facets?q=...&<filters>&facets=region      counts only
+    GET /health                                    index size and refresh watermark
+
+Filters can be repeated (`country=DE&country=AT`) to OR values of one facet.
+A background thread refreshes the index from `updated_at` every interval.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from lib.job_index import FACETS, JobIndex
+
+MAX_LIMIT = 200
+
+
+class _QueryHandler(BaseHTTPRequestHandler):
+    index = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _search_args(self, params):
+        filters = {facet: params[facet] for facet in FACETS if facet in params}
+        facets = [f for value in params.get('facets', []) for f in value.split(',') if f]
+        unknown = [f for f in facets if f not in FACETS]
+        if unknown:
+            raise ValueError(f'Unknown facets {unknown}, expected some of {sorted(FACETS)}')
+        return {
+            'query': ' '.join(params.get('q', [])),
+            'filters': filters,
+            'limit': min(int(params.get('limit', ['20'])[0]), MAX_LIMIT),
+            'offset': int(params.get('offset', ['0'])[0]),
+            'facets': facets,
+        }
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        try:
+            if parsed.path == '/search':
+                self._send_json(200, self.index.search(**self._search_args(params)))
+            elif parsed.path == '/facets':
+                args = self._search_args(params)
+                result = self.index.search(args['query'], args['filters'], limit=0, facets=args['facets'] or FACETS)
+                self._send_json(200, {key: value for key, value in result.items() if key != 'jobs'})
+            elif parsed.path == '/health':
+                self._send_json(200, self.index.stats())
+            else:
+                self._send_json(404, {'error': f'Unknown path {parsed.path}'})
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': f'{type(e).__name__}: {e}'})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryServer:
+    """Serves a JobIndex over HTTP and keeps it refreshed from a collection in a background thread"""
+
+    def __init__(self, index, collection=None, host='127.0.0.1', port=8080, refresh_interval=30.0):
+        handler = type('QueryHandler', (_QueryHandler,), {'index': index})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.index = index
+        self.collection = collection
+        self.refresh_interval = refresh_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f'{host}:{port}'
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                updated = self.index.refresh(self.collection)
+                if updated:
+                    print(f"🔄 Re-indexed {updated} companies")
+            except Exception as e:
+                print(f"Index refresh failed: {e}")
+
+    def __enter__(self):
+        self._threads = [threading.Thread(target=self.httpd.serve_forever, daemon=True)]
+        if self.collection is not None and self.refresh_interval:
+            self._threads.append(threading.Thread(target=self._refresh_loop, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    from lib.runtime import get_runtime
+
+    parser = argparse.ArgumentParser(description="Serve search over scraped jobs")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--refresh-interval', type=float, default=30.0,
+                        help='Seconds between incremental refreshes from updated_at (0 disables)')
+    args = parser.parse_args()
+
+    collection = get_runtime().collection
+    if collection is None:
+        print("MongoDB collection not available")
+        return
+
+    index = JobIndex()
+    start = time.monotonic()
+    companies = index.refresh(collection)
+    stats = index.stats()
+    print(f"📇 Indexed {stats['jobs']} jobs from {companies} companies in {time.monotonic() - start:.1f}s")
+
+    with QueryServer(index, collection, args.host, args.port, args.refresh_interval) as server:
+        print(f"🔎 Serving on http://{server.address}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Offline replay helpers: recorded site snapshots and recorded LLM responses.
+
+Recording layout (one directory per recording):
+
+    <recording>/manifest.json        {"companies": [{"name": ..., "url": ...}, ...]}
+    <recording>/sites/<host>/...     page snapshots, "/careers/" -> careers/index.html
+    <recording>/llm_responses.jsonl  {"key": <task url>, "completion": <text>, "latency_s": <float>}
+
+The snapshot server answers by Host header, so pointing Chromium at it with
+``--host-resolver-rules`` (and httpx at it with ``http_transport()``) makes
+every recorded site resolve locally and every other host (analytics, CDNs, ...)
+fail fast instead of touching the network.
+"""
+import json
+import mimetypes
+import os
+import re
+import threading
+import time
+import asyncio
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+
+# Both agent prompts in lib.main start with "Goal: find if <url>", which is what
+# ties an LLM call back to the company/page it was recorded for.
+TASK_KEY_PATTERN = re.compile(r'Goal: find if (\S+)')
+
+
+def load_manifest(recording_dir):
+    """Load the list of recorded companies"""
+    with open(os.path.join(recording_dir, 'manifest.json'), 'r', encoding='utf-8') as file:
+        return json.load(file)['companies']
+
+
+def normalize_key(url):
+    """Make recorded keys independent of scheme and trailing slashes"""
+    parsed = urlparse(url)
+    return f"{parsed.netloc.lower()}{parsed.path.rstrip('/')}"
+
+
+def _message_text(message):
+    content = getattr(message, 'content', '')
+    if isinstance(content, str):
+        return content
+    return ' '.join(getattr(part, 'text', '') or '' for part in content or [])
+
+
+def task_key(messages):
+    """Find the task url an agent conversation is about"""
+    for message in messages:
+        match = TASK_KEY_PATTERN.search(_message_text(message))
+        if match:
+            return normalize_key(match.group(1))
+    return None
+
+
+# --- Snapshot server ---
+class _SnapshotHandler(BaseHTTPRequestHandler):
+    sites_dir = None
+
+    def _resolve(self):
+        host = (self.headers.get('Host') or '').split(':')[0].lower()
+        path = unquote(urlparse(self.path).path).lstrip('/')
+        base = os.path.realpath(os.path.join(self.sites_dir, host))
+        candidates = [
+            os.path.join(base, path),
+            os.path.join(base, path, 'index.html'),
+            os.path.join(base, path.rstrip('/') + '.html'),
+        ]
+        for candidate in candidates:
+            candidate = os.path.realpath(candidate)
+            if candidate.startswith(base) and os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def do_GET(self):
+        file_path = self._resolve()
+        if file_path is None:
+            self.send_error(404)
+            return
+        with open(file_path, 'rb') as file:
+            body = file.read()
+        content_type = mimetypes.guess_type(file_path)[0] or 'text/html'
+        if content_type == 'text/html':
+            # Snapshots were fetched over https, the replay server only speaks http
+            body = body.replace(b'https://', b'http://')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SnapshotServer:
+    """Serves recorded site snapshots from a local HTTP server in a background thread"""
+
+    def __init__(self, recording_dir, host='127.0.0.1', port=0):
+        handler = type('SnapshotHandler', (_SnapshotHandler,), {'sites_dir': os.path.join(recording_dir, 'sites')})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f'{host}:{port}'
+
+    def browser_args(self):
+        """Chromium flags that send every hostname to this server"""
+        return [f'--host-resolver-rules=MAP * {self.address}, EXCLUDE localhost']
+
+    def http_transport(self):
+        """httpx transport that sends every request to this server, keeping the original Host"""
+        import httpx
+
+        host, port = self.httpd.server_address[:2]
+
+        class SnapshotTransport(httpx.AsyncHTTPTransport):
+            async def handle_async_request(self, request):
+                original_url = request.url
+                request.headers['Host'] = original_url.host
+                request.url = original_url.copy_with(scheme='http', host=host, port=port)
+                try:
+                    return await super().handle_async_request(request)
+                finally:
+                    # Response.url comes from the request, so callers still see the recorded url
+                    request.url = original_url
+
+        return SnapshotTransport()
+
+    def local_url(self, url):
+        """Rewrite a recorded https url to the plain http url served locally"""
+        return url.replace('https://', 'http://', 1)
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# --- Fake chat models ---
+class ReplayChatModel:
+    """Chat model that replays recorded completions instead of calling a provider
+
+    Implements the browser_use ``BaseChatModel`` protocol. Completions are
+    replayed in recorded order per task url; once a task runs out of recorded
+    responses its last one (normally the ``done`` action) is repeated.
+    """
+
+    # Responses are keyed on the task url of a prompt; a batched prompt has several
+    batch_prompts = False
+
+    def __init__(self, recording_dir, latency_scale=1.0):
+        self.model = 'replay'
+        self.latency_scale = latency_scale
+        self.responses = defaultdict(list)
+        self.cursors = defaultdict(int)
+        self.calls = 0
+        path = os.path.join(recording_dir, 'llm_responses.jsonl')
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    self.responses[record['key']].append(record)
+
+    @property
+    def provider(self):
+        return 'replay'
+
+    @property
+    def name(self):
+        return self.model
+
+    @property
+    def model_name(self):
+        return self.model
+
+    async def ainvoke(self, messages, output_format=None):
+        from browser_use.llm.views import ChatInvokeCompletion
+
+        key = task_key(messages)
+        recorded = self.responses.get(key)
+        if not recorded:
+            raise KeyError(f'No recorded LLM responses for task {key}')
+
+        index = min(self.cursors[key], len(recorded) - 1)
+        self.cursors[key] += 1
+        self.calls += 1
+        record = recorded[index]
+
+        if self.latency_scale and record.get('latency_s'):
+            await asyncio.sleep(record['latency_s'] * self.latency_scale)
+
+        text = record['completion'].replace('https://', 'http://')
+        completion = output_format.model_validate_json(text) if output_format is not None else text
+        return ChatInvokeCompletion(completion=completion, usage=None)
+
+
+class RecordingChatModel:
+    """Wraps a real chat model and appends every completion to llm_responses.jsonl"""
+
+    # Record the single-page prompts ReplayChatModel can answer
+    batch_prompts = False
+
+    def __init__(self, llm, recording_dir):
+        self.llm = llm
+        self.model = llm.model
+        self.path = os.path.join(recording_dir, 'llm_responses.jsonl')
+        os.makedirs(recording_dir, exist_ok=True)
+        self._lock = asyncio.Lock()
+
+    @property
+    def provider(self):
+        return self.llm.provider
+
+    @property
+    def name(self):
+        return self.llm.name
+
+    @property
+    def model_name(self):
+        return self.llm.model_name
+
+    async def ainvoke(self, messages, output_format=None):
+        start = time.perf_counter()
+        response = await self.llm.ainvoke(messages, output_format)
+        latency = time.perf_counter() - start
+
+        completion = response.completion
+        text = completion if isinstance(completion, str) else completion.model_dump_json()
+        record = {'key': task_key(messages), 'completion': text, 'latency_s': round(latency, 3)}
+        async with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record) + '\n')
+        return response
+
+
+def recorded_urls(recording_dir):
+    """Every url mentioned in recorded completions, used to snapshot the visited pages"""
+    urls = set()
+    path = os.path.join(recording_dir, 'llm_responses.jsonl')
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                urls.update(re.findall(r'https?://[^\s"\'<>\\]+', json.loads(line)['completion']))
+    return urls
+
+
+def snapshot_path(recording_dir, url):
+    """Where the snapshot for a url lives inside a recording"""
+    parsed = urlparse(url)
+    path = parsed.path.strip('/')
+    if not path or not os.path.splitext(path)[1]:
+        path = os.path.join(path, 'index.html')
+    return os.path.join(recording_dir, 'sites', parsed.netloc.lower(), path)
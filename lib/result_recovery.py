@@ -0,0 +1,229 @@
+"""Recover a structured result from an agent run instead of discarding it.
+
+An agent run that ends without a parseable final answer still has useful
+material: content extracted along the way, the pages it visited, the page it
+ended on. Recovery tries, cheapest first:
+
+1. the final result, parsed strictly and then repaired (markdown fences,
+   trailing commas, truncated output) and validated item by item
+2. every extracted content in the history, newest first, the same way
+3. for FindJobPage, a visited url that looks like a careers page or ATS board
+4. one short re-prompt over the notes and the current page text, no browsing
+"""
+import json
+import re
+
+from pydantic import ValidationError
+
+from lib.page_content import CAREERS_PATH, PageContent, is_ats_url
+
+FENCE_PATTERN = re.compile(r'```(?:json|JSON)?\s*(.*?)(?:```|$)', re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+# Truncated output is cut back to one of the last N closing brackets before giving up
+MAX_TRUNCATION_CUTS = 50
+
+REPROMPT_TEMPLATE = """
+            Goal: find if {url} {goal}
+            A browsing run over this site ended without a valid final answer.
+            Answer from the notes and page text below only, in the required format.
+
+            Notes from the run:
+            {notes}
+
+            Text of the last page ({page_url}):
+            {page_text}
+            """
+
+GOALS = {
+    'FindJobPage': 'has a jobs page and return its url (has_jobs_page, jobs_page_url).',
+    'ExtractJobListingsOp': 'lists open jobs and return every job with its title, location and url.',
+}
+
+
+def _bracket_closers(text):
+    """Closing brackets needed for text, and whether it ends inside a string"""
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+    return ''.join(reversed(stack)), in_string
+
+
+def _loads(text):
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+
+def repair_json(text):
+    """Best-effort parse of near-valid JSON from an LLM; None if nothing parses"""
+    if not text:
+        return None
+    fenced = FENCE_PATTERN.search(text)
+    if fenced and fenced.group(1).strip():
+        text = fenced.group(1)
+    starts = [index for index in (text.find('{'), text.find('[')) if index >= 0]
+    if not starts:
+        return None
+    text = TRAILING_COMMA_PATTERN.sub(r'\1', text[min(starts):].strip())
+
+    parsed = _loads(text)
+    if parsed is not None:
+        return parsed
+    # Trailing prose after the JSON
+    end = max(text.rfind('}'), text.rfind(']'))
+    parsed = _loads(text[:end + 1]) if end >= 0 else None
+    if parsed is not None:
+        return parsed
+
+    # Truncated output: close what is open, cutting back to earlier complete elements if needed
+    closers, in_string = _bracket_closers(text)
+    parsed = _loads(text + ('"' if in_string else '') + closers)
+    if parsed is not None:
+        return parsed
+    cut = len(text)
+    for _ in range(MAX_TRUNCATION_CUTS):
+        cut = max(text.rfind('}', 0, cut), text.rfind(']', 0, cut))
+        if cut <= 0:
+            break
+        candidate = text[:cut + 1].rstrip().rstrip(',')
+        closers, in_string = _bracket_closers(candidate)
+        if in_string:
+            continue
+        parsed = _loads(TRAILING_COMMA_PATTERN.sub(r'\1', candidate + closers))
+        if parsed is not None:
+            return parsed
+    return None
+
+
+def has_answer(instance):
+    """Whether a validated result actually answers something: some field it was given is not None
+
+    Every FindJobPage field is optional, so any JSON object validates; without
+    this check `{"jobs": [...]}` would pass as a FindJobPage with nothing set.
+    """
+    return any(getattr(instance, name) is not None for name in instance.model_fields_set)
+
+
+def validate(data, model):
+    """Model instance from parsed JSON, dropping invalid list items rather than the whole result"""
+    if isinstance(data, list) and 'results' in model.model_fields:
+        data = {'results': data}
+    if not isinstance(data, dict):
+        return None
+    try:
+        parsed = model.model_validate(data)
+        return parsed if has_answer(parsed) else None
+    except ValidationError:
+        pass
+    items = data.get('results')
+    if not isinstance(items, list):
+        return None
+    valid = []
+    for item in items:
+        try:
+            model.model_validate({**data, 'results': [item]})
+            valid.append(item)
+        except ValidationError:
+            continue
+    if not valid:
+        return None
+    try:
+        return model.model_validate({**data, 'results': valid})
+    except ValidationError:
+        return None
+
+
+def parse_result(text, model):
+    """(instance, how) from raw agent output: 'strict', 'repaired' or (None, None)"""
+    if not text:
+        return None, None
+    try:
+        parsed = model.model_validate_json(text)
+        if has_answer(parsed):
+            return parsed, 'strict'
+    except (ValidationError, ValueError):
+        pass
+    parsed = validate(repair_json(text), model)
+    return (parsed, 'repaired') if parsed is not None else (None, None)
+
+
+def careers_url_from_history(urls):
+    """Last visited url that looks like a careers page or hosted job board"""
+    for url in reversed([url for url in urls or [] if url]):
+        if is_ats_url(url) or CAREERS_PATH.search(url):
+            return url
+    return None
+
+
+def salvage_result(history, model):
+    """(instance, source) recovered from an agent history without any LLM call"""
+    parsed, how = parse_result(history.final_result(), model)
+    if parsed is not None:
+        return parsed, f'final_result_{how}'
+    for content in reversed(history.extracted_content() or []):
+        parsed, how = parse_result(content, model)
+        if parsed is not None:
+            return parsed, f'history_{how}'
+    if model.__name__ == 'FindJobPage':
+        url = careers_url_from_history(history.urls())
+        if url:
+            return model(has_jobs_page=True, jobs_page_url=url), 'visited_url'
+    return None, None
+
+
+async def current_page(browser_session, max_chars=20000):
+    """(url, pruned text) of the page the agent ended on, or (None, '')
+
+    Needs the session still running (agent browsers are created with
+    keep_alive); a blank page means it was restarted and has nothing to offer.
+    """
+    try:
+        page = await browser_session.get_current_page()
+        if page.url in ('', 'about:blank'):
+            return None, ''
+        return page.url, PageContent(await page.content(), page.url).pruned_text(max_chars)
+    except Exception:
+        return None, ''
+
+
+async def reprompt_result(url, model, history, runtime, page_url=None, page_text='', max_note_chars=8000):
+    """One short structured-output call over what the run left behind; None if there is nothing to go on"""
+    from browser_use.llm.messages import UserMessage
+
+    notes = [note for note in [history.final_result()] + list(reversed(history.extracted_content() or [])) if note]
+    notes_text = '\n---\n'.join(notes)[:max_note_chars]
+    if not notes_text and not page_text:
+        return None
+    prompt = REPROMPT_TEMPLATE.format(url=url, goal=GOALS.get(model.__name__, ''), notes=notes_text or '(none)',
+                                      page_url=page_url or url, page_text=page_text or '(not available)')
+    response = await runtime.llm.ainvoke([UserMessage(content=prompt)], output_format=model)
+    return response.completion
+
+
+async def recover_result(history, model, url, runtime, browser_session=None):
+    """Structured result of an agent run, salvaged or re-prompted; None when nothing can be recovered"""
+    parsed, source = salvage_result(history, model)
+    if parsed is None:
+        page_url, page_text = await current_page(browser_session) if browser_session is not None else (None, '')
+        try:
+            parsed = await reprompt_result(url, model, history, runtime, page_url, page_text)
+            source = 'reprompt' if parsed is not None else None
+        except Exception as e:
+            print(f"Re-prompt for {url} failed: {e}")
+    if source and source != 'final_result_strict':
+        print(f"🩹 Recovered {model.__name__} for {url} from {source}")
+    return parsed
@@ -0,0 +1,59 @@
+"""Result stores that can stand in for the live company_jobs collection"""
+import copy
+import uuid
+from datetime import datetime
+
+
+def new_run_id():
+    """Sortable, unique id for one eval run"""
+    return f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def eval_collection_name(run_id):
+    return f'company_jobs_eval_{run_id}'
+
+
+def _matches(document, query):
+    return all(document.get(field) == value for field, value in query.items())
+
+
+class InMemoryCollection:
+    """The subset of pymongo's Collection API used by the pipeline and the evaluators
+
+    Supports equality filters and the $set / $setOnInsert update operators that
+    save_company_result issues. Nothing is shared between instances, so each
+    eval run gets its own namespace without touching MongoDB at all.
+    """
+
+    def __init__(self, name='in_memory'):
+        self.name = name
+        self.documents = []
+
+    def update_one(self, query, update, upsert=False):
+        for document in self.documents:
+            if _matches(document, query):
+                document.update(copy.deepcopy(update.get('$set', {})))
+                return
+        if upsert:
+            document = dict(query)
+            document.update(copy.deepcopy(update.get('$setOnInsert', {})))
+            document.update(copy.deepcopy(update.get('$set', {})))
+            self.documents.append(document)
+
+    def find_one(self, query=None):
+        for document in self.documents:
+            if _matches(document, query or {}):
+                return copy.deepcopy(document)
+        return None
+
+    def find(self, query=None):
+        return [copy.deepcopy(d) for d in self.documents if _matches(d, query or {})]
+
+    def count_documents(self, query):
+        return sum(1 for d in self.documents if _matches(d, query))
+
+    def delete_many(self, query):
+        self.documents = [d for d in self.documents if not _matches(d, query)]
+
+    def drop(self):
+        self.documents = []
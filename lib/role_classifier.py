@@ -0,0 +1,174 @@
+"""Local job-title classifier that replaces asking the LLM to filter roles.
+
+Extraction keeps every listing; roles are tagged here with keyword/regex rules
+and, optionally, TF-IDF similarity to a few prototype titles (needs
+scikit-learn). Titles are de-duplicated before classification, so re-tagging
+every stored job after the target roles change takes seconds and no LLM calls:
+
+    python -m lib.role_classifier --title "Senior Back-End Engineer (Go)"
+    python -m lib.role_classifier --refilter --roles backend fullstack
+"""
+import argparse
+import re
+import time
+from functools import lru_cache
+
+# Bump when a change to the patterns or target roles changes the tags of existing titles;
+# cached scraper output (eval_parallel_main.py) is keyed on it
+ROLE_TAGGING_VERSION = 2
+
+# role -> pattern a title must match to get the tag
+ROLE_PATTERNS = {
+    # `.net` starts with a non-word character, so it gets a lookbehind instead of \b
+    # api/platform are too generic on their own ("Platform Operations Specialist"), so like the
+    # languages they only count right before engineer/developer
+    'backend': r'\b(back[\s-]?end|server[\s-]?side|distributed systems)\b|'
+               r'(\b(api|platform|python|java|golang|go|ruby|rails|node(\.?js)?|php|scala|kotlin|elixir|rust|c#|'
+               r'django|laravel)|(?<!\w)(asp)?\.net)\s+(software\s+)?(engineer|developer|dev)\b',
+    'fullstack': r'\bfull[\s-]?stack\b',
+    'web': r'\b(front[\s-]?end|web\s+(engineer|developer|dev)|(react|angular|vue(\.?js)?|javascript|typescript|'
+           r'ui|wordpress)\s+(engineer|developer|dev))\b',
+    'software_engineer': r'\b(software|application|applications|product)\s+(development\s+)?(engineer|developer)\b|'
+                         r'\b(sde|swe)\b|\bprogrammer\b|\bdeveloper\b',
+}
+
+# Titles that mention the keywords but are not the role itself
+EXCLUDE_PATTERN = (r'\b(manager|director|head of|vp|vice president|chief|recruit(er|ing)|talent|sales|account executive|'
+                   r'marketing|designer|developer relations|devrel|advocate|evangelist|support|writer|'
+                   r'business\s+develop(er|ment))\b')
+
+# Roles the pipeline wants; change these and --refilter instead of re-scraping
+TARGET_ROLES = ('backend', 'fullstack', 'web', 'software_engineer')
+
+# Prototype titles for the optional TF-IDF pass
+ROLE_PROTOTYPES = {
+    'backend': ['backend engineer', 'back end developer', 'server engineer', 'api engineer', 'platform engineer'],
+    'fullstack': ['full stack engineer', 'fullstack developer', 'full-stack software engineer'],
+    'web': ['frontend engineer', 'front end developer', 'web developer', 'react engineer', 'javascript developer'],
+    'software_engineer': ['software engineer', 'software developer', 'application developer', 'sde'],
+}
+
+
+class RoleClassifier:
+    """Tags job titles with roles; `tfidf_threshold` enables the TF-IDF fallback for unmatched titles"""
+
+    def __init__(self, target_roles=TARGET_ROLES, role_patterns=ROLE_PATTERNS, exclude_pattern=EXCLUDE_PATTERN,
+                 tfidf_threshold=None):
+        self.target_roles = set(target_roles)
+        self.patterns = {role: re.compile(pattern, re.IGNORECASE) for role, pattern in role_patterns.items()}
+        self.exclude = re.compile(exclude_pattern, re.IGNORECASE) if exclude_pattern else None
+        self.tfidf_threshold = tfidf_threshold
+        self._tfidf = None
+        # Per-instance memo: titles repeat a lot across companies
+        self.classify = lru_cache(maxsize=65536)(self._classify)
+
+    def _classify(self, title):
+        title = title or ''
+        if self.exclude is not None and self.exclude.search(title):
+            return ()
+        return tuple(role for role, pattern in self.patterns.items() if pattern.search(title))
+
+    def _tfidf_model(self):
+        if self._tfidf is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            roles, prototypes = [], []
+            for role, titles in ROLE_PROTOTYPES.items():
+                roles.extend([role] * len(titles))
+                prototypes.extend(titles)
+            vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4), lowercase=True)
+            self._tfidf = (vectorizer, vectorizer.fit_transform(prototypes), roles)
+        return self._tfidf
+
+    def classify_titles(self, titles):
+        """Role tags for many titles at once, classifying each distinct title only once"""
+        unique = list(dict.fromkeys(t or '' for t in titles))
+        tags = {title: self.classify(title) for title in unique}
+
+        if self.tfidf_threshold is not None:
+            unmatched = [t for t in unique if not tags[t] and t and not (self.exclude and self.exclude.search(t))]
+            if unmatched:
+                vectorizer, prototype_matrix, roles = self._tfidf_model()
+                # TF-IDF rows are L2-normalised, so the dot product is the cosine similarity
+                similarity = (vectorizer.transform(unmatched) @ prototype_matrix.T).toarray()
+                for title, row in zip(unmatched, similarity):
+                    best = row.argmax()
+                    if row[best] >= self.tfidf_threshold:
+                        tags[title] = (roles[best],)
+
+        return [tags[t or ''] for t in titles]
+
+    def tag_jobs(self, jobs):
+        """Add `role_tags` and `is_target_role` to job dicts (in place) and return them"""
+        for job, tags in zip(jobs, self.classify_titles([job.get('job_title') for job in jobs])):
+            job['role_tags'] = list(tags)
+            job['is_target_role'] = bool(self.target_roles.intersection(tags))
+        return jobs
+
+
+_default_classifier = None
+
+
+def get_classifier():
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = RoleClassifier()
+    return _default_classifier
+
+
+def tag_jobs(jobs):
+    """Tag job dicts with the default classifier"""
+    return get_classifier().tag_jobs(jobs)
+
+
+def refilter_collection(collection, classifier, batch_size=1000):
+    """Re-tag every stored job in place with bulk updates; returns (documents, jobs) updated"""
+    from pymongo import UpdateOne
+
+    documents = 0
+    jobs_tagged = 0
+    operations = []
+    cursor = collection.find({'jobs.0': {'$exists': True}}, {'jobs': 1}, batch_size=batch_size)
+    for document in cursor:
+        jobs = classifier.tag_jobs(document['jobs'])
+        operations.append(UpdateOne({'_id': document['_id']}, {'$set': {
+            'jobs': jobs,
+            'target_job_count': sum(1 for job in jobs if job['is_target_role']),
+        }}))
+        documents += 1
+        jobs_tagged += len(jobs)
+        if len(operations) >= batch_size:
+            collection.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+    return documents, jobs_tagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tag job titles with roles locally")
+    parser.add_argument('--title', action='append', help='Classify a title and print its tags')
+    parser.add_argument('--refilter', action='store_true', help='Re-tag every job stored in company_jobs')
+    parser.add_argument('--roles', nargs='+', default=list(TARGET_ROLES), help='Target roles')
+    parser.add_argument('--tfidf-threshold', type=float, default=None,
+                        help='Enable the TF-IDF fallback (requires scikit-learn), e.g. 0.5')
+    args = parser.parse_args()
+
+    classifier = RoleClassifier(target_roles=args.roles, tfidf_threshold=args.tfidf_threshold)
+    for title, tags in zip(args.title or [], classifier.classify_titles(args.title or [])):
+        print(f"{title!r}: {list(tags)} target={bool(classifier.target_roles.intersection(tags))}")
+
+    if args.refilter:
+        from lib.runtime import get_runtime
+
+        collection = get_runtime().collection
+        if collection is None:
+            print("MongoDB collection not available")
+            return
+        start = time.monotonic()
+        documents, jobs = refilter_collection(collection, classifier)
+        print(f"✅ Re-tagged {jobs} jobs in {documents} companies in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
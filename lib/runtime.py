@@ -0,0 +1,201 @@
+"""Lazily-initialised runtime context for the scraping pipeline.
+
+Nothing here touches the network, the browser install or heavy imports until
+the corresponding attribute is first used, so `import lib.main` stays cheap
+and tests/workers can inject their own LLM, browser binary, controller or DB.
+
+    runtime = Runtime(llm=my_fake_llm, chrome_bin='/usr/bin/chromium')
+    set_runtime(runtime)            # process-wide default
+    await find_jobs_page(url, runtime=runtime)   # or per call
+"""
+import os
+
+from dotenv import load_dotenv
+
+from lib.lean_browsing import config_with_blocklist
+
+# Used when PLAYWRIGHT_BROWSERS_PATH is not set in the environment
+DEFAULT_PLAYWRIGHT_BROWSERS_PATH = "/media/mats/3c24094c-800b-4576-a390-d23a6d7a02291/workspace/test_ai_gen/browser_use/.playwright-browsers"
+
+DEFAULT_LLM_MODEL = 'deepseek/deepseek-r1:free'
+# DEFAULT_LLM_MODEL = 'mistralai/mistral-small-3.2-24b-instruct:free'
+
+DEFAULT_BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+]
+
+_env_loaded = False
+
+
+def load_environment():
+    """Read .env once per process"""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+
+def find_chrome(base_dir=None):
+    """Chromium binary inside a Playwright browsers directory, or None to let browser_use pick one"""
+    base_dir = base_dir or os.environ.get("PLAYWRIGHT_BROWSERS_PATH")
+    if not base_dir or not os.path.isdir(base_dir):
+        return None
+    for name in os.listdir(base_dir):
+        if name.startswith("chromium-"):
+            chrome_path = os.path.join(base_dir, name, 'chrome-linux', 'chrome')
+            if os.path.exists(chrome_path):
+                return chrome_path
+    return None
+
+
+_UNSET = object()
+
+
+class Runtime:
+    """LLM, browser binary, controller and result collection, each created on first use"""
+
+    def __init__(self, llm=None, chrome_bin=_UNSET, controller=None, collection=_UNSET,
+                 llm_model=DEFAULT_LLM_MODEL, headless=True, browser_args=None, lean_browsing=_UNSET,
+                 tiered_fetch=True, fetcher=None, archive_dir=_UNSET, prefetcher=None,
+                 batch_extractor=None, checkpoints=_UNSET):
+        self.llm_model = getattr(llm, 'model', None) or llm_model
+        self.headless = headless
+        # Extra flags can be appended by callers (e.g. the replay benchmark maps hosts to a local server)
+        self.browser_args = list(browser_args if browser_args is not None else DEFAULT_BROWSER_ARGS)
+        # Request interception profile for agent browsers; None loads every resource
+        self._lean_browsing = lean_browsing
+        # Try plain HTTP + heuristics before starting an agent
+        self.tiered_fetch = tiered_fetch
+        self._fetcher = fetcher
+        # Lookahead page cache for upcoming companies (lib.prefetcher), set once the queue is known
+        self.prefetcher = prefetcher
+        # Packs fetcher-path extractions of concurrent companies into shared LLM calls (lib.batch_extraction)
+        self.batch_extractor = batch_extractor
+        # Where fetched jobs pages are archived for reprocessing; None disables archiving
+        self._archive_dir = archive_dir
+        self._archive = None
+        # Agent progress store for resuming interrupted runs (lib.agent_checkpoint); None disables it
+        self._checkpoints = checkpoints
+        self._llm = llm
+        self._chrome_bin = chrome_bin
+        self._controller = controller
+        self._collection = collection
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            load_environment()
+            from browser_use.llm import ChatOpenRouter
+
+            # this line auto-instruments Browser Use and any browser you use (local or remote)
+            # Laminar.initialize(project_api_key=os.getenv('LMNR_PROJECT_API_KEY'), disable_batch=True, disabled_instruments={Instruments.BROWSER_USE})
+
+            # Initialize OpenRouter with any model available on their platform
+            self._llm = ChatOpenRouter(
+                model=self.llm_model,
+                api_key=os.getenv('OPENROUTER_API_KEY'),
+                temperature=0.7,
+            )
+        return self._llm
+
+    @property
+    def chrome_bin(self):
+        if self._chrome_bin is _UNSET:
+            load_environment()
+            # Playwright reads this too, so it must be set before the first browser launch
+            os.environ.setdefault("PLAYWRIGHT_BROWSERS_PATH", DEFAULT_PLAYWRIGHT_BROWSERS_PATH)
+            self._chrome_bin = find_chrome()
+        return self._chrome_bin
+
+    @property
+    def controller(self):
+        if self._controller is None:
+            from browser_use import Controller
+
+            self._controller = Controller()
+        return self._controller
+
+    @property
+    def lean_browsing(self):
+        """Request interception profile, with the extra domains of LEAN_BROWSING_BLOCKLIST if set"""
+        if self._lean_browsing is _UNSET:
+            load_environment()
+            self._lean_browsing = config_with_blocklist(os.getenv('LEAN_BROWSING_BLOCKLIST'))
+        return self._lean_browsing
+
+    @property
+    def fetcher(self):
+        if self._fetcher is None:
+            from lib.fetcher import TieredFetcher
+
+            self._fetcher = TieredFetcher(self)
+        return self._fetcher
+
+    @fetcher.setter
+    def fetcher(self, fetcher):
+        self._fetcher = fetcher
+
+    @property
+    def archive(self):
+        """SnapshotArchive for fetched jobs pages, or None when archiving is off"""
+        if self._archive_dir is _UNSET:
+            load_environment()
+            self._archive_dir = os.getenv('SNAPSHOT_ARCHIVE_DIR')
+        if self._archive is None and self._archive_dir:
+            from lib.snapshot_archive import SnapshotArchive
+
+            self._archive = SnapshotArchive(self._archive_dir)
+        return self._archive
+
+    @property
+    def checkpoints(self):
+        """Where agent runs checkpoint their progress, or None when checkpointing is off"""
+        if self._checkpoints is _UNSET:
+            load_environment()
+            from lib.agent_checkpoint import open_checkpoint_store
+
+            self._checkpoints = open_checkpoint_store()
+        return self._checkpoints
+
+    async def aclose(self):
+        """Finish batched extractions, release prefetches, pooled connections, the render browser and archive"""
+        if self.batch_extractor is not None:
+            await self.batch_extractor.aclose()
+            self.batch_extractor = None
+        if self.prefetcher is not None:
+            await self.prefetcher.aclose()
+            self.prefetcher = None
+        if self._fetcher is not None:
+            await self._fetcher.aclose()
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    @property
+    def collection(self):
+        if self._collection is _UNSET:
+            load_environment()
+            from lib.main import init_mongodb
+
+            self._collection = init_mongodb()
+        return self._collection
+
+
+_runtime = None
+
+
+def get_runtime():
+    """Process-wide runtime, created on first use"""
+    global _runtime
+    if _runtime is None:
+        _runtime = Runtime()
+    return _runtime
+
+
+def set_runtime(runtime):
+    """Replace the process-wide runtime (tests, benchmarks, workers)"""
+    global _runtime
+    _runtime = runtime
+    return runtime
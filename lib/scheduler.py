@@ -0,0 +1,311 @@
+"""Adaptive recrawl scheduler: spend a fixed crawl budget on the sites most likely to have changed.
+
+Each company's crawl state lives in the `crawl_state` collection: when it was
+last crawled/succeeded, a fingerprint of its jobs, how often crawls saw a
+change and its failure streak. Job postings are modelled as a Poisson process,
+so the change rate is estimated from "crawls that saw a change / crawls" over
+the average crawl interval (Cho & Garcia-Molina's estimator, exponentially
+weighted so rates can drift). From the rate follow:
+
+    next_due = last crawl + ln(1 / (1 - TARGET)) / rate    -> when a change is likely enough to revisit
+    priority = elapsed * sqrt(rate)                        -> who gets the budget among due companies
+
+Revisit intervals proportional to 1/sqrt(rate) minimise the mean delay before
+a new posting is seen for a fixed number of crawls; pure "most likely changed"
+ordering spends the whole budget on sites that change constantly.
+
+Failures back off exponentially instead. Policies can be compared offline on
+the change history in the snapshot archive, or on synthetic sites:
+
+    python -m lib.scheduler --plan --budget 100
+    python -m lib.scheduler --simulate --archive .cache/snapshots --budget-per-day 50
+    python -m lib.scheduler --simulate --synthetic 500 --days 60 --budget-per-day 50
+"""
+import argparse
+import hashlib
+import heapq
+import math
+import random
+from datetime import datetime, timedelta
+
+STATE_COLLECTION = 'crawl_state'
+
+# Prior for companies never seen change: about one change a week
+DEFAULT_CHANGE_RATE = 1 / (7 * 86400)
+MIN_INTERVAL = timedelta(hours=6)
+MAX_INTERVAL = timedelta(days=30)
+# Revisit once the chance of a change since the last crawl reaches this
+TARGET_CHANGE_PROBABILITY = 0.5
+# Weight of older observations, applied once per new observation
+OBSERVATION_DECAY = 0.9
+FAILURE_BACKOFF = timedelta(hours=12)
+
+SUCCESS_STATUSES = {'extract_job_listings_complete', 'extract_job_listings_no_jobs_found', 'find_jobs_page_not_found'}
+FAILURE_STATUSES = {'find_jobs_page_failed', 'extract_job_listings_failed', 'preflight_dead'}
+
+
+def jobs_fingerprint(jobs):
+    """Order-independent hash of the postings, so re-ordering a page is not a change"""
+    keys = sorted(f"{job.get('url') or ''}|{job.get('job_title') or ''}" for job in jobs or [])
+    return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+
+
+def new_state(company):
+    return {
+        'company_name': company['name'],
+        'company_url': company['url'],
+        'last_crawled_at': None,
+        'last_success_at': None,
+        'last_change_at': None,
+        'jobs_fingerprint': None,
+        'observations': 0.0,  # decayed count of crawls that could have seen a change
+        'changes': 0.0,  # decayed count of those that did
+        'observed_seconds': 0.0,  # decayed total interval those crawls covered
+        'change_rate': DEFAULT_CHANGE_RATE,  # changes per second
+        'consecutive_failures': 0,
+        'total_crawls': 0,
+        'next_due_at': None,
+    }
+
+
+def estimate_change_rate(observations, changes, observed_seconds):
+    """Poisson change rate from crawls with/without a detected change (bias-reduced MLE)
+
+    The +1 in the denominator keeps the estimate above zero for sites not yet
+    seen changing; otherwise they would never be crawled again.
+    """
+    if observations <= 0 or observed_seconds <= 0:
+        return DEFAULT_CHANGE_RATE
+    mean_interval = observed_seconds / observations
+    unchanged = max(observations - changes, 0.0)
+    return -math.log((unchanged + 0.5) / (observations + 1)) / mean_interval
+
+
+def update_state(state, success, fingerprint=None, now=None):
+    """Fold one crawl outcome into a company's state (in place) and schedule its next visit"""
+    now = now or datetime.utcnow()
+    state['total_crawls'] += 1
+
+    if not success:
+        state['consecutive_failures'] += 1
+        backoff = FAILURE_BACKOFF * 2 ** (state['consecutive_failures'] - 1)
+        state['last_crawled_at'] = now
+        state['next_due_at'] = now + min(backoff, MAX_INTERVAL)
+        return state
+
+    previous = state['last_success_at']
+    if previous is not None and state['jobs_fingerprint'] is not None:
+        changed = fingerprint != state['jobs_fingerprint']
+        state['observations'] = state['observations'] * OBSERVATION_DECAY + 1
+        state['changes'] = state['changes'] * OBSERVATION_DECAY + (1 if changed else 0)
+        state['observed_seconds'] = (state['observed_seconds'] * OBSERVATION_DECAY
+                                     + (now - previous).total_seconds())
+        state['change_rate'] = estimate_change_rate(state['observations'], state['changes'],
+                                                    state['observed_seconds'])
+        if changed:
+            state['last_change_at'] = now
+
+    state['jobs_fingerprint'] = fingerprint
+    state['last_crawled_at'] = state['last_success_at'] = now
+    state['consecutive_failures'] = 0
+    interval = timedelta(seconds=math.log(1 / (1 - TARGET_CHANGE_PROBABILITY)) / state['change_rate'])
+    state['next_due_at'] = now + min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+    return state
+
+
+def crawl_priority(state, now):
+    """Square-root rule: never-crawled companies first, then elapsed time scaled by sqrt(rate)"""
+    if state['last_success_at'] is None:
+        return math.inf
+    return max((now - state['last_success_at']).total_seconds(), 0.0) * math.sqrt(state['change_rate'])
+
+
+def is_due(state, now):
+    return state['next_due_at'] is None or state['next_due_at'] <= now
+
+
+def plan_crawl(states, budget=None, now=None):
+    """Due states, highest priority first, cut to the budget"""
+    now = now or datetime.utcnow()
+    # (-priority, list position) keeps the heap stable for equal priorities
+    heap = [(-crawl_priority(state, now), index, state) for index, state in enumerate(states)
+            if is_due(state, now)]
+    heapq.heapify(heap)
+    count = len(heap) if budget is None else min(budget, len(heap))
+    return [heapq.heappop(heap)[2] for _ in range(count)]
+
+
+class CrawlScheduler:
+    """Crawl state kept in MongoDB, one document per company_url"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def load(self, companies):
+        urls = [company['url'] for company in companies]
+        stored = {document['company_url']: document
+                  for document in self.collection.find({'company_url': {'$in': urls}}, {'_id': 0})}
+        return [stored.get(company['url']) or new_state(company) for company in companies]
+
+    def plan(self, companies, budget=None, now=None):
+        """Companies to crawl this run, in priority order"""
+        by_url = {company['url']: company for company in companies}
+        due = plan_crawl(self.load(companies), budget, now)
+        print(f"🗓️  {len(due)} of {len(companies)} companies due"
+              + (f" (budget {budget})" if budget is not None else ""))
+        return [by_url[state['company_url']] for state in due]
+
+    def record(self, company, status, jobs=None, now=None):
+        """Update a company's state from the final status save_company_result stored"""
+        if status not in SUCCESS_STATUSES and status not in FAILURE_STATUSES:
+            return None  # still in progress or skipped (e.g. duplicate), nothing learned
+        state = self.load([company])[0]
+        update_state(state, status in SUCCESS_STATUSES, jobs_fingerprint(jobs), now)
+        self.collection.update_one({'company_url': company['url']}, {'$set': state}, upsert=True)
+        return state
+
+    def record_results(self, results_collection, companies):
+        """Record the outcome of every company of a batch from company_jobs"""
+        for company in companies:
+            document = results_collection.find_one({'company_name': company['name'], 'company_url': company['url']})
+            if document is not None:
+                self.record(company, document.get('status'), document.get('jobs'), document.get('updated_at'))
+
+
+# --- Simulation ---
+def synthetic_history(count, days, seed=0):
+    """Companies whose jobs change as Poisson processes with log-normally spread rates"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    history = {}
+    for index in range(count):
+        rate_per_day = math.exp(rng.gauss(math.log(1 / 10), 1.5))
+        changes, t = [], 0.0
+        while True:
+            t += rng.expovariate(rate_per_day)
+            if t >= days:
+                break
+            changes.append(start + timedelta(days=t))
+        history[f'https://company{index}.example'] = changes
+    return start, history
+
+
+def archive_history(archive):
+    """Change times per company from consecutive differing snapshots in the archive"""
+    history = {}
+    start = None
+    previous = {}
+    for row in archive.timeline():
+        company_url, sha256 = row['company_url'], row['sha256']
+        fetched_at = datetime.fromisoformat(row['fetched_at'])
+        start = fetched_at if start is None else min(start, fetched_at)
+        history.setdefault(company_url, [])
+        if company_url in previous and previous[company_url] != sha256:
+            history[company_url].append(fetched_at)
+        previous[company_url] = sha256
+    return start, history
+
+
+def simulate(history, start, days, budget_per_day, policy='adaptive', step=timedelta(hours=6)):
+    """Replay change history against a crawl policy with a fixed budget
+
+    Returns detected changes, mean detection delay (hours, undetected changes
+    count until the end) and the share of crawls that found nothing new.
+    """
+    urls = list(history)
+    states = {url: new_state({'name': url, 'url': url}) for url in urls}
+    versions = {url: 0 for url in urls}
+    seen_versions = {url: None for url in urls}
+    pending = {url: list(changes) for url, changes in history.items()}
+    delays, crawls, wasted, detected = [], 0, 0, 0
+    round_robin = 0
+    end = start + timedelta(days=days)
+    per_step = max(1, round(budget_per_day * step / timedelta(days=1)))
+
+    now = start
+    while now < end:
+        # Apply the changes that happened by now
+        for url in urls:
+            while pending[url] and pending[url][0] <= now:
+                pending[url].pop(0)
+                versions[url] += 1
+
+        if policy == 'round_robin':
+            chosen = [urls[(round_robin + i) % len(urls)] for i in range(min(per_step, len(urls)))]
+            round_robin += len(chosen)
+        elif policy == 'oldest_first':
+            chosen = heapq.nsmallest(per_step, urls, key=lambda url: states[url]['last_success_at'] or start)
+        else:
+            chosen = [state['company_url'] for state in plan_crawl([states[url] for url in urls], per_step, now)]
+
+        for url in chosen:
+            crawls += 1
+            version = versions[url]
+            if version == seen_versions[url]:
+                wasted += 1
+            # Every change since the last crawl is detected now
+            last = states[url]['last_success_at'] or start
+            for change in history[url]:
+                if last < change <= now:
+                    detected += 1
+                    delays.append((now - change).total_seconds() / 3600)
+            seen_versions[url] = version
+            update_state(states[url], True, str(version), now)
+        now += step
+
+    for url in urls:
+        last = states[url]['last_success_at'] or start
+        for change in history[url]:
+            if last < change < end:
+                delays.append((end - change).total_seconds() / 3600)
+
+    total_changes = sum(1 for changes in history.values() for change in changes if change < end)
+    return {
+        'policy': policy,
+        'crawls': crawls,
+        'changes': total_changes,
+        'detected': detected,
+        'mean_delay_hours': round(sum(delays) / len(delays), 1) if delays else 0.0,
+        'wasted_crawl_share': round(wasted / crawls, 3) if crawls else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan crawls or compare scheduling policies")
+    parser.add_argument('--plan', action='store_true', help='Print the companies due now')
+    parser.add_argument('--budget', type=int, default=None, help='Companies to crawl this run')
+    parser.add_argument('--simulate', action='store_true', help='Compare policies on historical/synthetic data')
+    parser.add_argument('--archive', help='Snapshot archive to read change history from')
+    parser.add_argument('--synthetic', type=int, default=500, help='Synthetic companies when no archive is given')
+    parser.add_argument('--days', type=float, default=60)
+    parser.add_argument('--budget-per-day', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.plan:
+        from lib.main import init_mongodb, read_companies_list
+
+        scheduler = CrawlScheduler(init_mongodb(STATE_COLLECTION))
+        for company in scheduler.plan(read_companies_list(), args.budget):
+            print(f"  {company['name']:<40} {company['url']}")
+
+    if args.simulate:
+        if args.archive:
+            from lib.snapshot_archive import SnapshotArchive
+
+            start, history = archive_history(SnapshotArchive(args.archive))
+            if start is None:
+                print("Archive has no snapshots")
+                return
+        else:
+            start, history = synthetic_history(args.synthetic, args.days, args.seed)
+        print(f"Simulating {len(history)} companies over {args.days:g} days, {args.budget_per_day} crawls/day")
+        for policy in ('round_robin', 'oldest_first', 'adaptive'):
+            result = simulate(history, start, args.days, args.budget_per_day, policy)
+            print(f"  {policy:<13} detected {result['detected']}/{result['changes']} changes, "
+                  f"mean delay {result['mean_delay_hours']}h, "
+                  f"{result['wasted_crawl_share']:.0%} of {result['crawls']} crawls found nothing new")
+
+
+if __name__ == "__main__":
+    main()
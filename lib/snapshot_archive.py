@@ -0,0 +1,258 @@
+"""Content-addressed, compressed archive of fetched jobs pages for offline reprocessing.
+
+When the extraction prompt or schema changes, jobs can be re-derived from the
+archive instead of re-crawling every site. Layout:
+
+    <root>/objects/ab/cdef....html.zst   page HTML, named by its sha256 (identical pages stored once)
+    <root>/index.sqlite                  one row per snapshot: company, page url, fetch time, tier, hash
+
+Blobs are zstd-compressed when `zstandard` is installed and gzip-compressed
+otherwise. The pipeline archives pages when the runtime has an archive
+directory (SNAPSHOT_ARCHIVE_DIR); reprocessing needs no browser at all:
+
+    python -m lib.snapshot_archive --stats
+    python -m lib.snapshot_archive --reprocess --mode deterministic --concurrency 8
+    python -m lib.snapshot_archive --reprocess --mode llm --save
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+DEFAULT_ARCHIVE_DIR = '.cache/snapshots'
+ZSTD_LEVEL = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_name TEXT NOT NULL,
+    company_url TEXT NOT NULL,
+    page_url TEXT NOT NULL,
+    final_url TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    tier TEXT,
+    fetched_at TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    compressed_bytes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_company ON snapshots (company_url, fetched_at);
+CREATE INDEX IF NOT EXISTS snapshots_fetched_at ON snapshots (fetched_at);
+"""
+
+
+def _compress(data):
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data), '.zst'
+    return gzip.compress(data, compresslevel=6), '.gz'
+
+
+def _decompress(data, suffix):
+    if suffix == '.zst':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _blob_path(root, sha256, suffix):
+    return os.path.join(root, 'objects', sha256[:2], f'{sha256[2:]}.html{suffix}')
+
+
+def _find_blob(root, sha256):
+    for suffix in ('.zst', '.gz'):
+        path = _blob_path(root, sha256, suffix)
+        if os.path.exists(path):
+            return path, suffix
+    return None, None
+
+
+def read_blob(root, sha256):
+    """HTML of an archived page, read without touching the index"""
+    path, suffix = _find_blob(root, sha256)
+    if path is None:
+        raise KeyError(f'No archived page {sha256}')
+    with open(path, 'rb') as file:
+        return _decompress(file.read(), suffix).decode('utf-8')
+
+
+class SnapshotArchive:
+    """Stores page HTML once per content hash and indexes every fetch of it"""
+
+    def __init__(self, root=DEFAULT_ARCHIVE_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def put(self, company_name, company_url, page_url, final_url, html, stage='jobs_page', tier=None):
+        """Archive one fetched page; returns its content hash"""
+        data = html.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        path, _ = _find_blob(self.root, sha256)
+        if path is None:
+            compressed, suffix = _compress(data)
+            path = _blob_path(self.root, sha256, suffix)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as file:
+                file.write(compressed)
+            os.replace(path + '.tmp', path)
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT INTO snapshots (company_name, company_url, page_url, final_url, stage, tier, fetched_at, '
+                'sha256, bytes, compressed_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (company_name, company_url, page_url, final_url, stage, tier, datetime.utcnow().isoformat(),
+                 sha256, len(data), os.path.getsize(path)))
+        return sha256
+
+    def get(self, sha256):
+        return read_blob(self.root, sha256)
+
+    def latest(self, stage='jobs_page', since=None):
+        """Newest snapshot per company, optionally only those fetched after `since` (ISO timestamp)"""
+        query = ('SELECT * FROM snapshots WHERE id IN (SELECT MAX(id) FROM snapshots WHERE stage = ? '
+                 'GROUP BY company_url)')
+        params = [stage]
+        if since:
+            query += ' AND fetched_at >= ?'
+            params.append(since)
+        with self._lock:
+            return [dict(row) for row in self._db.execute(query + ' ORDER BY company_name', params)]
+
+    def history(self, company_url):
+        with self._lock:
+            rows = self._db.execute('SELECT * FROM snapshots WHERE company_url = ? ORDER BY fetched_at',
+                                    (company_url,))
+            return [dict(row) for row in rows]
+
+    def timeline(self, stage='jobs_page'):
+        """Every snapshot, grouped by company and in fetch order"""
+        with self._lock:
+            rows = self._db.execute('SELECT company_url, fetched_at, sha256 FROM snapshots WHERE stage = ? '
+                                    'ORDER BY company_url, fetched_at', (stage,))
+            return [dict(row) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT COUNT(*) AS snapshots, COUNT(DISTINCT company_url) AS companies, '
+                'COUNT(DISTINCT sha256) AS blobs, SUM(bytes) AS bytes FROM snapshots').fetchone()
+            stored = self._db.execute(
+                'SELECT SUM(compressed_bytes) FROM (SELECT DISTINCT sha256, compressed_bytes FROM snapshots)'
+            ).fetchone()[0]
+        return {**dict(row), 'stored_bytes': stored or 0}
+
+    def close(self):
+        self._db.close()
+
+
+def extract_jobs_deterministic(html, final_url):
+    """Job postings straight from the page's links, no LLM: title = link text"""
+    from lib.page_content import PageContent
+
+    return [{'job_title': text, 'url': url, 'location': None}
+            for url, text in PageContent(html, final_url).job_posting_links()]
+
+
+def _extract_from_archive(root, sha256, final_url):
+    # Runs in a worker process: decompress + parse off the event loop
+    return extract_jobs_deterministic(read_blob(root, sha256), final_url)
+
+
+async def reprocess(archive, mode='deterministic', concurrency=8, since=None, collection=None, runtime=None):
+    """Re-run extraction over the newest archived jobs page of every company
+
+    Returns {company_url: jobs}; with a collection the jobs are also saved
+    like a normal extraction (fetch_stats.method == 'archive').
+    """
+    from lib.batch_extraction import BatchExtractor
+    from lib.locations import tag_locations
+    from lib.main import asave_company_result
+    from lib.page_content import PageContent
+    from lib.role_classifier import tag_jobs
+
+    snapshots = archive.latest(since=since)
+    print(f"♻️  Reprocessing {len(snapshots)} archived jobs pages ({mode})")
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    results = {}
+    # Pages waiting on the semaphore's other slots are extracted in shared LLM calls
+    extractor = BatchExtractor(runtime, max_pages=concurrency) if mode == 'llm' else None
+
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        async def run(snapshot):
+            async with semaphore:
+                try:
+                    if mode == 'deterministic':
+                        jobs = await loop.run_in_executor(pool, _extract_from_archive, archive.root,
+                                                          snapshot['sha256'], snapshot['final_url'])
+                    else:
+                        content = PageContent(archive.get(snapshot['sha256']), snapshot['final_url'])
+                        extracted = await extractor.extract(snapshot['final_url'], content.pruned_text())
+                        jobs = [job.model_dump() for job in extracted]
+                except Exception as e:
+                    print(f"Reprocessing failed for {snapshot['company_name']}: {e}")
+                    return
+            jobs = tag_locations(tag_jobs(jobs))
+            results[snapshot['company_url']] = jobs
+            if collection is not None:
+                status = 'extract_job_listings_complete' if jobs else 'extract_job_listings_no_jobs_found'
+                await asave_company_result(collection, snapshot['company_name'], snapshot['company_url'], status,
+                                          jobs, fetch_stats={'extract_job_listings': {
+                                              'method': 'archive', 'mode': mode, 'snapshot': snapshot['sha256'],
+                                              'fetched_at': snapshot['fetched_at']}})
+
+        await asyncio.gather(*(run(snapshot) for snapshot in snapshots))
+    if extractor is not None:
+        await extractor.aclose()
+        print(f"📚 Batched extraction: {extractor.counters}")
+    return results
+
+
+async def main():
+    from lib.runtime import get_runtime, load_environment
+
+    load_environment()
+    parser = argparse.ArgumentParser(description="Inspect or reprocess the jobs page archive")
+    parser.add_argument('--archive', default=os.getenv('SNAPSHOT_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+    parser.add_argument('--stats', action='store_true', help='Print archive size and dedup ratio')
+    parser.add_argument('--reprocess', action='store_true', help='Re-extract jobs from the newest snapshots')
+    parser.add_argument('--mode', choices=['deterministic', 'llm'], default='deterministic')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--since', help='Only snapshots fetched at or after this ISO timestamp')
+    parser.add_argument('--save', action='store_true', help='Save re-extracted jobs to company_jobs')
+    args = parser.parse_args()
+
+    archive = SnapshotArchive(args.archive)
+    try:
+        if args.stats:
+            stats = archive.stats()
+            ratio = (stats['bytes'] or 0) / stats['stored_bytes'] if stats['stored_bytes'] else 0
+            print(f"📦 {stats['snapshots']} snapshots of {stats['companies']} companies in {stats['blobs']} blobs, "
+                  f"{stats['stored_bytes'] / 1e6:.1f} MB on disk ({ratio:.1f}x smaller than raw)")
+        if args.reprocess:
+            runtime = get_runtime()
+            collection = runtime.collection if args.save else None
+            start = time.monotonic()
+            results = await reprocess(archive, args.mode, args.concurrency, args.since, collection, runtime)
+            jobs = sum(len(company_jobs) for company_jobs in results.values())
+            print(f"✅ Re-extracted {jobs} jobs for {len(results)} companies in {time.monotonic() - start:.1f}s")
+            await runtime.aclose()
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+import asyncio
+import types
+
+import pytest
+
+from lib.agent_checkpoint import CheckpointRecorder, FileCheckpointStore
+from lib.main import ExtractJobListingsOp, run_agent_stage
+
+URL = 'https://example.com/careers'
+
+
+class FakeHistory:
+    def __init__(self, urls, extracted):
+        self.history = list(range(len(urls)))
+        self._urls = urls
+        self._extracted = extracted
+
+    def urls(self):
+        return self._urls
+
+    def extracted_content(self):
+        return self._extracted
+
+
+def fake_agent(current_url, history):
+    page = types.SimpleNamespace(url=current_url)
+
+    async def get_current_page():
+        return page
+
+    session = types.SimpleNamespace(get_current_page=get_current_page)
+    return types.SimpleNamespace(state=types.SimpleNamespace(history=history), browser_session=session)
+
+
+def test_interrupted_run_resumes_on_its_last_page_with_earlier_jobs(tmp_path):
+    runtime = types.SimpleNamespace(checkpoints=FileCheckpointStore(str(tmp_path)))
+
+    async def scenario():
+        first = await CheckpointRecorder.open(runtime, URL, 'extract', ExtractJobListingsOp)
+        assert first.resumed is None and first.resume_note() == ''
+        history = FakeHistory([URL, URL + '?page=2'],
+                              ['```json\n{"results": [{"job_title": "A", "url": "https://example.com/j/1"}]}\n```'])
+        await first.on_step_end(fake_agent(URL + '?page=2', history))
+
+        second = await CheckpointRecorder.open(runtime, URL, 'extract', ExtractJobListingsOp)
+        assert second.start_url == URL + '?page=2'
+        assert second.checkpoint.attempts == 2
+        assert '1 jobs were already collected' in second.resume_note()
+        assert [job['url'] for job in second.earlier_jobs([{'url': 'https://example.com/j/2'}])] == [
+            'https://example.com/j/1']
+
+        await second.clear()
+        third = await CheckpointRecorder.open(runtime, URL, 'extract', ExtractJobListingsOp)
+        assert third.resumed is None
+
+    asyncio.run(scenario())
+
+
+def test_checkpointing_off_without_a_store():
+    runtime = types.SimpleNamespace(checkpoints=None)
+
+    async def scenario():
+        recorder = await CheckpointRecorder.open(runtime, URL, 'find')
+        await recorder.on_step_end(fake_agent(URL, FakeHistory([URL], [])))
+        await recorder.clear()
+        return recorder
+
+    assert asyncio.run(scenario()).resumed is None
+
+
+def test_stage_is_retried_only_after_an_interruption(tmp_path):
+    runtime = types.SimpleNamespace(checkpoints=FileCheckpointStore(str(tmp_path)))
+    calls = []
+
+    async def finds_nothing(url, runtime=None, checkpoint=None):
+        calls.append(checkpoint)
+        return []
+
+    async def crashes_once(url, runtime=None, checkpoint=None):
+        calls.append(checkpoint)
+        if len(calls) == 1:
+            await checkpoint.on_step_end(fake_agent(url + '/page-2', FakeHistory([url], [])))
+            checkpoint.interrupted = True
+            return []
+        return ['job']
+
+    assert asyncio.run(run_agent_stage(finds_nothing, 'extract', URL, runtime)) == []
+    assert len(calls) == 1
+
+    calls.clear()
+    assert asyncio.run(run_agent_stage(crashes_once, 'extract', URL, runtime)) == ['job']
+    assert len(calls) == 2
+    assert calls[1].start_url == URL + '/page-2'
+
+
+def test_stage_that_is_always_interrupted_fails_instead_of_finding_nothing(tmp_path):
+    runtime = types.SimpleNamespace(checkpoints=FileCheckpointStore(str(tmp_path)))
+
+    async def always_crashes(url, runtime=None, checkpoint=None):
+        checkpoint.interrupted = True
+        return None
+
+    with pytest.raises(RuntimeError, match='interrupted'):
+        asyncio.run(run_agent_stage(always_crashes, 'find', URL, runtime))
@@ -0,0 +1,67 @@
+import asyncio
+
+from lib.autoscaler import Autoscaler, AutoscalerConfig, ConcurrencyLimiter, ResourceSample
+
+CONFIG = AutoscalerConfig(min_workers=1, max_workers=4, initial_workers=2, cooldown_samples=2)
+
+
+def sample(cpu=20.0, free_mb=8000.0):
+    return ResourceSample(cpu_percent=cpu, available_memory_mb=free_mb)
+
+
+def saturated_autoscaler(samples):
+    """Autoscaler whose limiter has every slot busy and work waiting"""
+    samples = iter(samples)
+    autoscaler = Autoscaler(CONFIG, sampler=lambda: next(samples))
+    autoscaler.limiter.active = autoscaler.limiter.limit
+    autoscaler.limiter.waiting = 3
+    return autoscaler
+
+
+def test_decisions_follow_memory_and_cpu_pressure():
+    autoscaler = saturated_autoscaler([])
+    assert autoscaler.decide(sample(free_mb=500)) == (1, 'draining, memory low')
+    assert autoscaler.decide(sample(cpu=95)) == (1, 'under pressure')
+    assert autoscaler.decide(sample(free_mb=CONFIG.drain_memory_mb + 100)) == (1, 'under pressure')
+    assert autoscaler.decide(sample()) == (3, 'spare capacity')
+
+    autoscaler.limiter.waiting = 0
+    assert autoscaler.decide(sample()) == (2, None)
+
+
+def test_scaling_up_waits_for_the_cooldown_and_stops_at_max_workers():
+    autoscaler = saturated_autoscaler([sample()] * 10)
+
+    async def run():
+        limits = []
+        for _ in range(10):
+            limits.append(await autoscaler.step())
+            autoscaler.limiter.active = autoscaler.limiter.limit
+        return limits
+
+    assert asyncio.run(run()) == [3, 3, 3, 4, 4, 4, 4, 4, 4, 4]
+
+
+def test_lowering_the_limit_lets_running_tasks_finish():
+    async def run():
+        limiter = ConcurrencyLimiter(2)
+        release = asyncio.Event()
+        started = []
+
+        async def task(name):
+            async with limiter.slot():
+                started.append(name)
+                await release.wait()
+
+        tasks = [asyncio.create_task(task(name)) for name in 'abc']
+        await asyncio.sleep(0)
+        await limiter.set_limit(1)
+        await asyncio.sleep(0)
+        running = list(started)
+        release.set()
+        await asyncio.gather(*tasks)
+        return running, started
+
+    running, started = asyncio.run(run())
+    assert running == ['a', 'b']
+    assert started == ['a', 'b', 'c']
@@ -0,0 +1,68 @@
+import asyncio
+import types
+
+import lib.batch_extraction as batch_extraction
+from lib.batch_extraction import BatchExtractor, clean_jobs
+from lib.main import ResultJob
+
+
+def job(title, url):
+    return ResultJob(job_title=title, url=url, location=None)
+
+
+def fake_llm_calls(monkeypatch, answered_pages=None):
+    """Record batched and single-page calls; the batch answers only `answered_pages` (default all)"""
+    calls = []
+
+    async def extract_batch(pages, runtime):
+        calls.append([url for url, _ in pages])
+        indexes = range(len(pages)) if answered_pages is None else answered_pages
+        return {index: [job('Batched', pages[index][0] + '/job')] for index in indexes}
+
+    async def extract_job_listings_from_text(url, page_text, runtime):
+        calls.append(url)
+        return [job('Single', url + '/job')]
+
+    monkeypatch.setattr(batch_extraction, 'extract_batch', extract_batch)
+    monkeypatch.setattr(batch_extraction, 'extract_job_listings_from_text', extract_job_listings_from_text)
+    return calls
+
+
+def extract_all(extractor, urls):
+    async def scenario():
+        results = await asyncio.gather(*(extractor.extract(url, 'text') for url in urls))
+        await extractor.aclose()
+        return results
+
+    return asyncio.run(scenario())
+
+
+def test_clean_jobs_resolves_urls_and_drops_incomplete_and_duplicate_jobs():
+    jobs = [job(' Engineer ', '/jobs/1'), job('Engineer', 'https://a.com/jobs/1'), job('', '/jobs/2'), job('PM', ' ')]
+    assert [(j.job_title, j.url) for j in clean_jobs('https://a.com/careers', jobs)] == [
+        ('Engineer', 'https://a.com/jobs/1')]
+
+
+def test_concurrent_pages_share_one_call(monkeypatch):
+    calls = fake_llm_calls(monkeypatch)
+    extractor = BatchExtractor(types.SimpleNamespace(llm=object()), max_pages=3, max_wait_s=0.01)
+    results = extract_all(extractor, ['https://a.com', 'https://b.com', 'https://c.com'])
+    assert calls == [['https://a.com', 'https://b.com', 'https://c.com']]
+    assert [jobs[0].url for jobs in results] == ['https://a.com/job', 'https://b.com/job', 'https://c.com/job']
+
+
+def test_pages_missing_from_the_answer_fall_back_to_the_single_page_prompt(monkeypatch):
+    calls = fake_llm_calls(monkeypatch, answered_pages=[0])
+    extractor = BatchExtractor(types.SimpleNamespace(llm=object()), max_pages=2, max_wait_s=0.01)
+    results = extract_all(extractor, ['https://a.com', 'https://b.com'])
+    assert calls == [['https://a.com', 'https://b.com'], 'https://b.com']
+    assert [jobs[0].job_title for jobs in results] == ['Batched', 'Single']
+    assert extractor.counters['fallbacks'] == 1
+
+
+def test_models_that_cannot_replay_batches_get_one_prompt_per_page(monkeypatch):
+    calls = fake_llm_calls(monkeypatch)
+    llm = types.SimpleNamespace(batch_prompts=False)
+    extractor = BatchExtractor(types.SimpleNamespace(llm=llm), max_pages=3, max_wait_s=0.01)
+    extract_all(extractor, ['https://a.com', 'https://b.com'])
+    assert sorted(calls) == ['https://a.com', 'https://b.com']
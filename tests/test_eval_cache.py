@@ -0,0 +1,36 @@
+import asyncio
+
+from lib.eval_cache import JsonCache, RateLimiter, fingerprint
+
+
+def test_fingerprint_is_stable_and_order_insensitive_for_dict_keys():
+    assert fingerprint({'a': 1, 'b': 2}, 'x') == fingerprint({'b': 2, 'a': 1}, 'x')
+    assert fingerprint('a', 'b') != fingerprint('b', 'a')
+
+
+def test_json_cache_round_trip_and_misses(tmp_path):
+    cache = JsonCache(str(tmp_path / 'cache'))
+    assert cache.get('missing') is None
+    cache.set('key', {'jobs': [1, 2]})
+    assert cache.get('key') == {'jobs': [1, 2]}
+    (tmp_path / 'cache' / 'broken.json').write_text('{')
+    assert cache.get('broken') is None
+
+
+def test_rate_limiter_caps_concurrent_calls():
+    limiter = RateLimiter(max_concurrent=2)
+    running = []
+    peak = []
+
+    async def call():
+        async with limiter:
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+    async def scenario():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(scenario())
+    assert max(peak) == 2
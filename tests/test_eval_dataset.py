@@ -0,0 +1,52 @@
+import pytest
+
+from lib.eval_dataset import iter_dataset, load_companies, write_dataset
+
+
+def records(categories):
+    return [{'name': f'{category}-{index}', 'input_url': f'https://{category}{index}.com',
+             'expected_has_jobs': True, 'category': category}
+            for category, count in categories.items() for index in range(count)]
+
+
+def test_round_trip_keeps_the_input_url_as_url(tmp_path):
+    path = str(tmp_path / 'companies.jsonl')
+    write_dataset(path, records({'ai': 2}))
+    companies = load_companies(path)
+    assert [company['url'] for company in companies] == ['https://ai0.com', 'https://ai1.com']
+
+
+def test_shards_partition_the_dataset(tmp_path):
+    path = str(tmp_path / 'companies.jsonl')
+    write_dataset(path, records({'ai': 20, 'saas': 20}))
+    shards = [{company['name'] for company in load_companies(path, index, 3)} for index in range(3)]
+    assert sum(len(names) for names in shards) == 40
+    assert set.union(*shards) == {company['name'] for company in load_companies(path)}
+
+
+def test_stratified_sample_is_bounded_per_category_and_seeded(tmp_path):
+    path = str(tmp_path / 'companies.jsonl')
+    write_dataset(path, records({'ai': 10, 'saas': 2}))
+    sample = load_companies(path, per_category=3, seed=7)
+    assert sorted(company['category'] for company in sample) == ['ai', 'ai', 'ai', 'saas', 'saas']
+    assert sample == load_companies(path, per_category=3, seed=7)
+
+
+def test_unknown_format_or_version_is_rejected(tmp_path):
+    path = tmp_path / 'companies.jsonl'
+    path.write_text('{"format": "job-scraper-eval", "version": 2}\n')
+    with pytest.raises(ValueError):
+        list(iter_dataset(str(path)))
+
+
+def test_expected_jobs_are_loaded_when_present(tmp_path):
+    path = str(tmp_path / 'companies.jsonl')
+    with_jobs = {'name': 'Acme', 'input_url': 'https://acme.com', 'expected_has_jobs': True,
+                 'expected_jobs': [{'job_title': 'Backend Engineer', 'url': 'https://acme.com/jobs/1'}]}
+    without_jobs = {'name': 'Beta', 'input_url': 'https://beta.com', 'expected_has_jobs': True}
+    write_dataset(path, [with_jobs, without_jobs])
+
+    acme, beta = load_companies(path)
+    assert acme['expected_jobs'] == [{'job_title': 'Backend Engineer', 'url': 'https://acme.com/jobs/1',
+                                      'location': None}]
+    assert beta['expected_jobs'] is None
@@ -0,0 +1,53 @@
+from lib.eval_metrics import normalize_url, score_company, summarize
+
+COMPANY = {'name': 'Acme', 'expected_has_jobs': True, 'expected_jobs_url': 'https://www.acme.com/careers/',
+           'alternate_jobs_urls': ['https://jobs.acme.com']}
+
+
+def test_normalize_url_ignores_scheme_www_slashes_and_tracking_params():
+    assert normalize_url('http://WWW.acme.com//careers/?utm_source=x&team=eng') == 'acme.com/careers?team=eng'
+    assert normalize_url('acme.com:443/careers') == 'acme.com/careers'
+    assert normalize_url(None) == ''
+
+
+def test_stage_one_matches_expected_and_alternate_urls():
+    exact = score_company(COMPANY, {'has_job_page': True, 'jobs_page_url': 'https://www.acme.com/careers/'})
+    alternate = score_company(COMPANY, {'has_job_page': True, 'jobs_page_url': 'https://jobs.acme.com/?ref=home'})
+    missing = score_company(COMPANY, None)
+
+    assert exact['find_jobs_page'] == {'has_jobs_correct': True, 'url_exact': True, 'url_match': True}
+    assert alternate['find_jobs_page'] == {'has_jobs_correct': True, 'url_exact': False, 'url_match': True}
+    assert missing['find_jobs_page']['has_jobs_correct'] is False and not missing['scraped']
+
+    summary = summarize([exact, alternate, missing])
+    assert summary['companies'] == 3 and summary['scraped'] == 2
+    assert summary['url_match_accuracy'] == 2 / 3
+
+
+def test_stage_two_is_scored_only_for_companies_with_ground_truth():
+    with_truth = {**COMPANY, 'expected_jobs': [
+        {'job_title': 'Backend Engineer', 'url': 'https://acme.com/jobs/1'},
+        {'job_title': 'Data Engineer', 'url': 'https://acme.com/jobs/2'},
+    ]}
+    without_truth = {**COMPANY, 'name': 'Beta', 'expected_jobs': None}
+    result = {'has_job_page': True, 'jobs_page_url': 'https://acme.com/careers', 'jobs': [
+        {'job_title': 'backend engineer!', 'url': 'http://www.acme.com/jobs/1/?utm_source=x'},
+        {'job_title': 'Office Manager', 'url': 'https://acme.com/jobs/3'},
+    ]}
+
+    scored = score_company(with_truth, result)['extract_job_listings']
+    assert (scored['title_precision'], scored['title_recall']) == (0.5, 0.5)
+    assert (scored['url_precision'], scored['url_recall']) == (0.5, 0.5)
+    assert score_company(without_truth, result)['extract_job_listings'] is None
+
+    summary = summarize([score_company(with_truth, result), score_company(without_truth, result)])
+    assert summary['companies_with_job_ground_truth'] == 1
+    assert summary['title_recall'] == 0.5 and summary['url_precision'] == 0.5
+
+
+def test_url_scores_are_skipped_when_expected_jobs_have_no_urls():
+    company = {**COMPANY, 'expected_jobs': [{'job_title': 'Backend Engineer'}]}
+    scored = score_company(company, {'jobs': [{'job_title': 'Backend Engineer', 'url': 'https://acme.com/j'}]})
+    assert scored['extract_job_listings']['title_f1'] == 1.0
+    assert scored['extract_job_listings']['url_precision'] is None
+    assert summarize([score_company(company, None)])['url_recall'] is None
@@ -0,0 +1,77 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from lib.exporter import export, flatten, load_watermark
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+class FakeCollection:
+    """Enough of pymongo's find() for the exporter, ignoring the query"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection=None, batch_size=None):
+        return iter(self.documents)
+
+
+def documents(count, updated_at=datetime(2026, 1, 1, 12)):
+    return [{
+        'company_name': f'Company {index}', 'company_url': f'https://c{index}.example', 'status': 'done',
+        'updated_at': updated_at, 'job_count': 2,
+        'jobs': [{'job_title': f'Engineer {index}', 'url': f'https://c{index}.example/j/{job}',
+                  'location': f'City {index}', 'location_info': {'countries': ['DE'], 'remote': False}}
+                 for job in range(2)],
+    } for index in range(count)]
+
+
+def read_parts(directory):
+    tables = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith('.parquet'):
+                tables.append(pq.read_table(path))
+            elif name.endswith('.arrows'):
+                with pa.ipc.open_stream(path) as reader:
+                    tables.append(reader.read_all())
+    return tables
+
+
+def test_flatten_gives_one_row_per_job():
+    company, jobs = flatten(documents(1)[0])
+    assert company['company_name'] == 'Company 0'
+    assert [job['countries'] for job in jobs] == [['DE'], ['DE']]
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_multi_batch_export_with_changing_dictionaries(tmp_path, file_format):
+    # batch_size=2 writes three batches per dataset, each with different dictionary values
+    rows = export(FakeCollection(documents(5)), str(tmp_path), file_format, batch_size=2, full=True)
+    assert rows == {'companies': 5, 'jobs': 10}
+
+    companies = read_parts(str(tmp_path / 'companies'))
+    jobs = read_parts(str(tmp_path / 'jobs'))
+    assert sum(table.num_rows for table in companies) == 5
+    assert sum(table.num_rows for table in jobs) == 10
+    names = sorted(name for table in companies for name in table.column('company_name').to_pylist())
+    assert names == [f'Company {index}' for index in range(5)]
+    assert os.path.isdir(tmp_path / 'jobs' / 'run_date=2026-01-01')
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith('.tmp')]
+    assert load_watermark(str(tmp_path)) is not None
+
+
+def test_failed_export_publishes_nothing_and_keeps_the_watermark(tmp_path):
+    class Failing(FakeCollection):
+        def find(self, query, projection=None, batch_size=None):
+            yield from self.documents
+            raise RuntimeError('cursor died')
+
+    with pytest.raises(RuntimeError):
+        export(Failing(documents(3)), str(tmp_path), 'arrow', batch_size=2, full=True)
+    assert read_parts(str(tmp_path)) == []
+    assert load_watermark(str(tmp_path)) is None
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import httpx
+
+from lib.fetcher import BROWSER_TIER_TTL_SECONDS, TieredFetcher
+
+SHELL = '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'
+ARTICLE = '<html><body><main>' + '<p>Backend Engineer, Berlin. We are hiring.</p>' * 20 + '</main></body></html>'
+
+
+def make_fetcher(tmp_path, pages):
+    """Fetcher over a fake site: pages maps url -> (status, html) or an exception to raise"""
+
+    def handler(request):
+        page = pages[str(request.url)]
+        if isinstance(page, Exception):
+            raise page
+        status, html = page
+        return httpx.Response(status, html=html)
+
+    fetcher = TieredFetcher(None, tiers_path=str(tmp_path / 'tiers.json'), transport=httpx.MockTransport(handler))
+    fetcher.rendered = []
+
+    async def render(url, timeout_ms=20000):
+        fetcher.rendered.append(url)
+        return url, 200, ARTICLE
+
+    fetcher.browser_pool.render = render
+    return fetcher
+
+
+def test_server_rendered_page_stays_on_http(tmp_path):
+    fetcher = make_fetcher(tmp_path, {'https://a.com/jobs': (200, ARTICLE)})
+    result = asyncio.run(fetcher.fetch('https://a.com/jobs'))
+    assert result.tier == 'http' and fetcher.rendered == []
+    assert fetcher.tiers == {}
+
+
+def test_javascript_shell_is_rendered_and_remembered_until_it_expires(tmp_path):
+    fetcher = make_fetcher(tmp_path, {'https://a.com/jobs': (200, SHELL), 'https://a.com/team': (200, SHELL)})
+    result = asyncio.run(fetcher.fetch('https://a.com/jobs'))
+    assert (result.tier, result.js_reason) == ('browser', 'spa_root')
+    assert fetcher.requires_browser('a.com')
+
+    asyncio.run(fetcher.fetch('https://a.com/team'))
+    assert fetcher.counters['http'] == 1 and fetcher.counters['needs_js'] == 2
+
+    assert not fetcher.requires_browser('a.com', now=time.time() + BROWSER_TIER_TTL_SECONDS + 1)
+    assert 'a.com' not in fetcher.tiers
+
+
+def test_error_fallbacks_are_not_remembered_or_counted_as_needing_javascript(tmp_path):
+    fetcher = make_fetcher(tmp_path, {'https://a.com/jobs': httpx.ConnectError('refused'),
+                                      'https://b.com/jobs': (403, 'Forbidden')})
+    assert asyncio.run(fetcher.fetch('https://a.com/jobs')).tier == 'browser'
+    assert asyncio.run(fetcher.fetch('https://b.com/jobs')).tier == 'browser'
+    assert fetcher.tiers == {}
+    assert fetcher.counters['needs_js'] == 0 and fetcher.counters['error_fallbacks'] == 2
+
+
+def test_only_live_entries_are_saved_and_legacy_entries_are_dropped(tmp_path):
+    fetcher = make_fetcher(tmp_path, {})
+    fetcher.remember_browser('a.com', 'spa_root')
+    fetcher.remember_browser('old.com', 'spa_root', now=time.time() - BROWSER_TIER_TTL_SECONDS - 1)
+    fetcher.save_tiers()
+    assert set(make_fetcher(tmp_path, {}).tiers) == {'a.com'}
+
+    (tmp_path / 'tiers.json').write_text('{"legacy.com": "browser"}')
+    assert make_fetcher(tmp_path, {}).tiers == {}
@@ -0,0 +1,115 @@
+import threading
+from datetime import datetime, timedelta
+
+from lib.job_index import SETTLE_SECONDS, JobIndex
+
+NOW = datetime(2025, 6, 1, 12)
+
+
+class FakeCollection:
+    """Just enough of a pymongo collection for JobIndex.refresh: find() with an updated_at $gte"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection=None, batch_size=None):
+        since = query.get('updated_at', {}).get('$gte')
+        return [dict(document) for document in self.documents if since is None or document['updated_at'] >= since]
+
+
+def company(url, name, titles, updated_at, location='Berlin, Germany'):
+    jobs = [{'job_title': title, 'url': f'{url}/{index}', 'location': location,
+             'role_tags': ['software_engineer'] if 'Engineer' in title else [], 'is_target_role': 'Engineer' in title}
+            for index, title in enumerate(titles)]
+    return {'company_url': url, 'company_name': name, 'jobs': jobs, 'updated_at': updated_at}
+
+
+def titles(result):
+    return sorted(job['job_title'] for job in result['jobs'])
+
+
+def test_search_matches_every_word_and_prefixes_the_last():
+    index = JobIndex()
+    index.upsert_company(company('https://a', 'Acme', ['Backend Engineer', 'Sales Manager'], NOW))
+    index.upsert_company(company('https://b', 'Beta', ['Frontend Engineer'], NOW, location='Remote'))
+
+    assert titles(index.search('engineer')) == ['Backend Engineer', 'Frontend Engineer']
+    assert titles(index.search('backend eng')) == ['Backend Engineer']
+    assert titles(index.search('engineer', filters={'company': 'Beta'})) == ['Frontend Engineer']
+    assert index.search('nothing')['total'] == 0
+
+
+def test_facets_count_matches_and_unknown_facets_are_rejected():
+    index = JobIndex()
+    index.upsert_company(company('https://a', 'Acme', ['Backend Engineer', 'Sales Manager'], NOW))
+    result = index.search(facets=['company', 'target'])
+    assert result['facets']['company'] == {'Acme': 2}
+    assert result['facets']['target'] == {'true': 1, 'false': 1}
+    try:
+        index.search(filters={'colour': 'red'})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('unknown facet accepted')
+
+
+def test_upsert_replaces_a_companys_jobs():
+    index = JobIndex()
+    index.upsert_company(company('https://a', 'Acme', ['Backend Engineer'], NOW))
+    index.upsert_company(company('https://a', 'Acme', ['Data Engineer'], NOW + timedelta(minutes=1)))
+    assert titles(index.search('engineer')) == ['Data Engineer']
+    assert 'backend' not in index.terms
+    assert index.stats()['jobs'] == 1
+
+
+def test_refresh_picks_up_a_late_write_older_than_the_watermark():
+    documents = [company('https://a', 'Acme', ['Backend Engineer'], NOW)]
+    collection = FakeCollection(documents)
+    index = JobIndex()
+    assert index.refresh(collection) == 1
+
+    # Stamped before the watermark, committed after the last refresh
+    documents.append(company('https://b', 'Beta', ['Frontend Engineer'], NOW - timedelta(seconds=SETTLE_SECONDS - 1)))
+    assert index.refresh(collection) == 1
+    assert titles(index.search('engineer')) == ['Backend Engineer', 'Frontend Engineer']
+    assert index.watermark == NOW
+
+
+def test_refresh_skips_unchanged_companies_in_the_overlap():
+    documents = [company('https://a', 'Acme', ['Backend Engineer'], NOW)]
+    collection = FakeCollection(documents)
+    index = JobIndex()
+    index.refresh(collection)
+    job_ids = set(index.jobs)
+
+    assert index.refresh(collection) == 0
+    assert set(index.jobs) == job_ids
+
+    documents[0] = company('https://a', 'Acme', ['Data Engineer'], NOW + timedelta(seconds=1))
+    assert index.refresh(collection) == 1
+    assert titles(index.search('engineer')) == ['Data Engineer']
+
+
+def test_a_refresh_during_a_search_waits_for_it():
+    index = JobIndex()
+    index.upsert_company(company('https://a', 'Acme', ['Backend Engineer'], NOW))
+    match = index.match
+
+    def match_then_refresh(*args, **kwargs):
+        job_ids = match(*args, **kwargs)
+        # Another thread replaces the company's jobs between matching and ranking
+        refresh = threading.Thread(target=index.upsert_company,
+                                   args=(company('https://a', 'Acme', ['Data Engineer'], NOW + timedelta(seconds=1)),))
+        refresh.start()
+        refresh.join(0.1)
+        threads.append(refresh)
+        return job_ids
+
+    threads = []
+    index.match = match_then_refresh
+    result = index.search('engineer', facets=['company'])
+    threads[0].join()
+
+    assert titles(result) == ['Backend Engineer'] and result['facets']['company'] == {'Acme': 1}
+    index.match = match
+    assert titles(index.search('engineer')) == ['Data Engineer']
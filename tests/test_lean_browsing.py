@@ -0,0 +1,23 @@
+from lib.lean_browsing import DEFAULT_BLOCKED_DOMAINS, is_blocked_host
+from lib.runtime import Runtime
+
+
+def test_blocklist_file_from_the_environment_extends_the_default_domains(monkeypatch, tmp_path):
+    blocklist = tmp_path / 'blocklist.txt'
+    blocklist.write_text('# extra trackers\nTracker.Example.com\ncdn.segment.com  # already blocked\n\n')
+    monkeypatch.setenv('LEAN_BROWSING_BLOCKLIST', str(blocklist))
+
+    blocked = set(Runtime().lean_browsing.blocked_domains)
+    assert blocked == set(DEFAULT_BLOCKED_DOMAINS) | {'tracker.example.com'}
+    assert is_blocked_host('eu.tracker.example.com', blocked)
+    assert not is_blocked_host('example.com', blocked)
+
+
+def test_missing_blocklist_falls_back_to_the_defaults(monkeypatch, tmp_path):
+    monkeypatch.setenv('LEAN_BROWSING_BLOCKLIST', str(tmp_path / 'missing.txt'))
+    assert Runtime().lean_browsing.blocked_domains == DEFAULT_BLOCKED_DOMAINS
+
+
+def test_explicit_config_wins_over_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv('LEAN_BROWSING_BLOCKLIST', str(tmp_path / 'missing.txt'))
+    assert Runtime(lean_browsing=None).lean_browsing is None
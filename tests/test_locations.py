@@ -0,0 +1,46 @@
+import pytest
+
+from lib.locations import parse_location, tag_locations
+
+
+@pytest.mark.parametrize('text, countries, regions, cities', [
+    ('Berlin, Germany', ('DE',), ('Europe', 'EMEA'), ('Berlin',)),
+    ('San Francisco, CA', ('US',), ('North America', 'Americas'), ('San Francisco',)),
+    ('Toronto, Canada', ('CA',), ('North America', 'Americas'), ('Toronto',)),
+    ('U.S.A.', ('US',), ('North America', 'Americas'), ()),
+    ('Remote - EMEA', (), ('EMEA',), ()),
+])
+def test_places_are_normalised(text, countries, regions, cities):
+    location = parse_location(text)
+    assert (location.countries, location.regions, location.cities) == (countries, regions, cities)
+
+
+def test_short_aliases_only_match_in_capitals():
+    assert parse_location('SEA').regions == ('Asia', 'APAC')
+    assert parse_location('sea').regions == ()
+    assert parse_location('Remote in ca').countries == ()
+
+
+def test_work_arrangement():
+    assert parse_location('Remote (US)').remote is True
+    assert parse_location('On-site, Paris').remote is False
+    assert parse_location('Berlin').remote is None
+    assert parse_location('Hybrid - London, UK').hybrid
+    assert parse_location('Worldwide').worldwide
+
+
+@pytest.mark.parametrize('text, utc_range', [
+    ('Remote, UTC-3 to -5', (-5, -3)),
+    ('Remote, CET +/- 2', (-1, 3)),
+    ('Remote', (None, None)),
+])
+def test_utc_ranges(text, utc_range):
+    location = parse_location(text)
+    assert (location.utc_min, location.utc_max) == utc_range
+
+
+def test_tag_locations_stores_lists_and_tolerates_missing_locations():
+    jobs = tag_locations([{'location': 'Berlin, Germany'}, {}])
+    assert jobs[0]['location_info']['countries'] == ['DE']
+    assert 'raw' not in jobs[0]['location_info']
+    assert jobs[1]['location_info']['countries'] == [] and jobs[1]['location_info']['remote'] is None
@@ -0,0 +1,75 @@
+import asyncio
+import types
+
+import lib.prefetcher as prefetcher_module
+from lib.fetcher import FetchResult
+from lib.prefetcher import Prefetcher
+
+ARTICLE = '<html><body><main>' + '<p>We build things. <a href="/careers">Careers</a></p>' * 20 + '</main></body></html>'
+SHELL = '<html><body><div id="root"></div></body></html>'
+COMPANIES = [{'name': name, 'url': f'https://{name}.com'} for name in 'abcd']
+
+
+class FakeFetcher:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    async def fetch(self, url, allow_browser=True):
+        self.fetched.append(url)
+        html = self.pages.get(url, ARTICLE)
+        return FetchResult(url=url, final_url=url, status=200, html=html, tier='http', bytes=len(html))
+
+
+def make_prefetcher(monkeypatch, pages=None, **kwargs):
+    async def resolve_host(host):
+        return True
+
+    monkeypatch.setattr(prefetcher_module, 'resolve_host', resolve_host)
+    runtime = types.SimpleNamespace(fetcher=FakeFetcher(pages or {}))
+    return Prefetcher(runtime, COMPANIES, **kwargs)
+
+
+def test_next_companies_and_their_careers_pages_are_prefetched_and_handed_out_once(monkeypatch):
+    prefetcher = make_prefetcher(monkeypatch, lookahead=2)
+
+    async def scenario():
+        prefetcher.advance(COMPANIES[0])
+        first = await prefetcher.take('https://b.com')
+        again = await prefetcher.take('https://b.com')
+        careers = await prefetcher.take('https://c.com/careers')
+        not_prefetched = await prefetcher.take('https://d.com')
+        await prefetcher.aclose()
+        return first, again, careers, not_prefetched
+
+    first, again, careers, not_prefetched = asyncio.run(scenario())
+    assert first.url == 'https://b.com' and careers.url == 'https://c.com/careers'
+    assert again is None and not_prefetched is None
+    assert 'https://d.com' not in prefetcher.runtime.fetcher.fetched
+    assert prefetcher.counters['hits'] == 2 and prefetcher.counters['misses'] == 2
+
+
+def test_javascript_shells_are_left_to_the_callers_fetch(monkeypatch):
+    prefetcher = make_prefetcher(monkeypatch, pages={'https://b.com': SHELL}, lookahead=1)
+
+    async def scenario():
+        prefetcher.advance(COMPANIES[0])
+        page = await prefetcher.take('https://b.com')
+        await prefetcher.aclose()
+        return page
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_cache_evicts_oldest_pages_over_the_entry_budget(monkeypatch):
+    prefetcher = make_prefetcher(monkeypatch, lookahead=3, max_entries=2, careers_links=0)
+
+    async def scenario():
+        prefetcher.advance(COMPANIES[0])
+        await asyncio.gather(*prefetcher.inflight.values())
+        cached = list(prefetcher.cache)
+        await prefetcher.aclose()
+        return cached
+
+    assert asyncio.run(scenario()) == ['https://c.com', 'https://d.com']
+    assert prefetcher.counters['evicted'] == 1
@@ -0,0 +1,107 @@
+import asyncio
+import types
+
+import httpx
+
+import lib.preflight as preflight
+from lib.preflight import preflight_companies, run_preflight
+from lib.result_store import InMemoryCollection
+
+COMPANIES = [
+    {'name': 'Acme', 'url': 'https://acme.com'},
+    {'name': 'Acme Labs', 'url': 'https://acmelabs.com'},  # acquired, redirects to acme.com
+    {'name': 'Gone', 'url': 'https://gone.com'},
+    {'name': 'Broken', 'url': 'https://broken.com'},
+    {'name': 'Shielded', 'url': 'https://shielded.com'},
+]
+
+
+def handler(request):
+    host = request.url.host
+    if host == 'acmelabs.com':
+        return httpx.Response(301, headers={'Location': 'https://www.acme.com/'})
+    if host == 'broken.com':
+        return httpx.Response(404)
+    if host == 'shielded.com':
+        return httpx.Response(403)
+    return httpx.Response(200, html='<html></html>')
+
+
+def run(monkeypatch, cache_path, dns_calls):
+    async def resolve_host(host):
+        dns_calls.append(host)
+        return host != 'gone.com'
+
+    monkeypatch.setattr(preflight, 'resolve_host', resolve_host)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True) as client:
+            return await preflight_companies(COMPANIES, client, cache_path=cache_path)
+
+    return asyncio.run(scenario())
+
+
+def test_dead_redirected_and_blocked_companies(monkeypatch, tmp_path):
+    results = run(monkeypatch, str(tmp_path / 'preflight.json'), [])
+    by_name = {result.name: result for result in results}
+
+    assert [result.name for result in results] == [company['name'] for company in COMPANIES]
+    assert by_name['Acme'].status == 'alive'
+    assert (by_name['Acme Labs'].status, by_name['Acme Labs'].duplicate_of) == ('duplicate', 'Acme')
+    assert by_name['Acme Labs'].redirected_offsite
+    assert (by_name['Gone'].status, by_name['Gone'].error) == ('dead', 'dns_failed')
+    assert (by_name['Broken'].status, by_name['Broken'].error) == ('dead', 'http_status_404')
+    assert by_name['Shielded'].status == 'alive'
+
+
+def test_fresh_results_come_from_the_cache(monkeypatch, tmp_path):
+    cache_path = str(tmp_path / 'preflight.json')
+    run(monkeypatch, cache_path, [])
+    dns_calls = []
+    results = run(monkeypatch, cache_path, dns_calls)
+    assert dns_calls == []
+    assert [result.status for result in results] == ['alive', 'duplicate', 'dead', 'dead', 'alive']
+
+
+def test_malformed_hosts_and_urls_are_dead_not_fatal(monkeypatch, tmp_path):
+    overlong = 'https://' + 'a' * 70 + '.com'
+    companies = [{'name': 'Overlong', 'url': overlong}, {'name': 'Bracket', 'url': 'https://[acme.com'},
+                 {'name': 'Acme', 'url': 'https://acme.com'}]
+    real_resolve_host = preflight.resolve_host
+
+    async def resolve_host(host):
+        # Real resolution for the overlong label: IDNA encoding fails before any DNS query
+        return await real_resolve_host(host) if host.startswith('aaaa') else True
+
+    monkeypatch.setattr(preflight, 'resolve_host', resolve_host)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True) as client:
+            return await preflight_companies(companies, client, cache_path=str(tmp_path / 'preflight.json'))
+
+    overlong_result, bracket, acme = asyncio.run(scenario())
+    assert overlong_result.status == 'dead' and overlong_result.error.startswith('UnicodeError')
+    assert bracket.status == 'dead' and bracket.error.startswith('ValueError')
+    assert acme.status == 'alive'
+
+
+def test_only_companies_checked_dead_in_this_run_are_reported_as_newly_dead(monkeypatch, tmp_path):
+    async def resolve_host(host):
+        return host != 'gone.com'
+
+    monkeypatch.setattr(preflight, 'resolve_host', resolve_host)
+    collection = InMemoryCollection()
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True) as client:
+            runtime = types.SimpleNamespace(fetcher=types.SimpleNamespace(client=client))
+            first = await run_preflight(COMPANIES, runtime, collection, cache_path=str(tmp_path / 'preflight.json'))
+            second = await run_preflight(COMPANIES, runtime, collection, cache_path=str(tmp_path / 'preflight.json'))
+            return first, second
+
+    (live, newly_dead), (live_again, dead_again) = asyncio.run(scenario())
+    assert [company['name'] for company in live] == ['Acme', 'Shielded']
+    assert live[0]['fetch_url'] == 'https://acme.com'
+    assert [company['name'] for company in newly_dead] == ['Gone', 'Broken']
+    assert live_again == live and dead_again == []
+    assert collection.find_one({'company_name': 'Gone'})['status'] == 'preflight_dead'
@@ -0,0 +1,43 @@
+import asyncio
+import types
+
+from lib.batch_extraction import BATCH_EXTRACT_PROMPT
+from lib.fetcher import TieredFetcher
+from lib.main import EXTRACT_JOB_LISTINGS_FROM_TEXT_PROMPT, FIND_JOBS_PAGE_TASK
+from lib.replay import SnapshotServer, snapshot_path, task_key
+
+
+def message(text):
+    return types.SimpleNamespace(content=text)
+
+
+def test_prompts_are_keyed_on_their_task_url():
+    system = message('You are a browser agent.')
+    assert task_key([system, message(FIND_JOBS_PAGE_TASK.format(url='https://Acme.com/'))]) == 'acme.com'
+    assert task_key([message(EXTRACT_JOB_LISTINGS_FROM_TEXT_PROMPT.format(
+        url='http://acme.com/careers/', page_text='...'))]) == 'acme.com/careers'
+    # A batched prompt is about several urls, so it has no single key
+    assert task_key([message(BATCH_EXTRACT_PROMPT.format(count=2, pages='...'))]) is None
+
+
+def test_snapshot_server_serves_recorded_pages_under_their_original_urls(tmp_path):
+    path = snapshot_path(str(tmp_path), 'https://acme.com/careers')
+    assert path.endswith('sites/acme.com/careers/index.html')
+    page = '<html><body>' + '<p>Backend Engineer, Berlin. We are hiring.</p>' * 20 + '</body></html>'
+    (tmp_path / 'sites' / 'acme.com' / 'careers').mkdir(parents=True)
+    (tmp_path / 'sites' / 'acme.com' / 'careers' / 'index.html').write_text(page)
+
+    with SnapshotServer(str(tmp_path)) as server:
+        fetcher = TieredFetcher(None, tiers_path=None, transport=server.http_transport())
+
+        async def fetch_all():
+            try:
+                return [await fetcher.fetch(url, allow_browser=False)
+                        for url in ('https://acme.com/careers', 'https://acme.com/missing')]
+            finally:
+                await fetcher.aclose()
+
+        found, missing = asyncio.run(fetch_all())
+
+    assert (found.status, found.final_url, found.html) == (200, 'https://acme.com/careers', page)
+    assert missing.status == 404
@@ -0,0 +1,73 @@
+from lib.main import ExtractJobListingsOp, FindJobPage
+from lib.result_recovery import parse_result, repair_json, salvage_result
+
+
+class FakeHistory:
+    def __init__(self, final=None, extracted=None, urls=None):
+        self._final = final
+        self._extracted = extracted or []
+        self._urls = urls or []
+
+    def final_result(self):
+        return self._final
+
+    def extracted_content(self):
+        return self._extracted
+
+    def urls(self):
+        return self._urls
+
+
+def test_repair_strips_fences_and_trailing_commas():
+    text = 'Here you go:\n```json\n{"results": [{"job_title": "A", "url": "https://a/1",},]}\n```\nDone.'
+    assert repair_json(text) == {'results': [{'job_title': 'A', 'url': 'https://a/1'}]}
+
+
+def test_repair_keeps_complete_items_of_truncated_output():
+    text = '{"results": [{"job_title": "A", "url": "u1"}, {"job_title": "B", "url": "u2"}, {"job_title": "C", "ur'
+    assert repair_json(text) == {'results': [{'job_title': 'A', 'url': 'u1'}, {'job_title': 'B', 'url': 'u2'}]}
+
+
+def test_repair_gives_up_on_text_without_json():
+    assert repair_json('I could not find any jobs.') is None
+
+
+def test_invalid_items_are_dropped_not_the_whole_result():
+    parsed, how = parse_result('{"results": [{"job_title": "A", "url": "x"}, {"job_title": null, "url": "y"}]}',
+                               ExtractJobListingsOp)
+    assert how == 'repaired'
+    assert [job.url for job in parsed.results] == ['x']
+
+
+def test_bare_list_is_read_as_results():
+    parsed, _ = parse_result('[{"job_title": "A", "url": "x"}]', ExtractJobListingsOp)
+    assert [job.job_title for job in parsed.results] == ['A']
+
+
+def test_empty_job_list_is_a_valid_answer():
+    parsed, how = parse_result('{"results": []}', ExtractJobListingsOp)
+    assert how == 'strict' and parsed.results == []
+
+
+def test_object_with_no_answer_fields_is_not_a_result():
+    assert parse_result('Extracted from page: {"jobs": [{"title": "A"}]}', FindJobPage) == (None, None)
+    assert parse_result('{}', FindJobPage) == (None, None)
+    parsed, _ = parse_result('{"has_jobs_page": false}', FindJobPage)
+    assert parsed.has_jobs_page is False
+
+
+def test_salvage_prefers_final_result_then_newest_extraction_then_visited_url():
+    careers = '```json\n{"has_jobs_page": true, "jobs_page_url": "https://x.com/careers"}\n```'
+    history = FakeHistory(final='not json', extracted=['{"has_jobs_page": true, "jobs_page_url": "old"}', careers])
+    parsed, source = salvage_result(history, FindJobPage)
+    assert (parsed.jobs_page_url, source) == ('https://x.com/careers', 'history_repaired')
+
+    history = FakeHistory(urls=['https://x.com', 'https://x.com/careers', 'https://x.com/about'])
+    parsed, source = salvage_result(history, FindJobPage)
+    assert (parsed.jobs_page_url, source) == ('https://x.com/careers', 'visited_url')
+
+
+def test_nothing_salvageable_leaves_it_to_the_reprompt():
+    history = FakeHistory(final='{"jobs": []}', extracted=['clicked the button'], urls=['https://x.com/about'])
+    assert salvage_result(history, FindJobPage) == (None, None)
+    assert salvage_result(history, ExtractJobListingsOp) == (None, None)
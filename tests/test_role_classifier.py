@@ -0,0 +1,46 @@
+import pytest
+
+from lib.role_classifier import RoleClassifier
+
+
+@pytest.fixture
+def classifier():
+    return RoleClassifier()
+
+
+@pytest.mark.parametrize('title, roles', [
+    ('Senior Back-End Engineer (Go)', {'backend'}),
+    ('.NET Developer', {'backend', 'software_engineer'}),
+    ('Senior .NET Software Engineer', {'backend', 'software_engineer'}),
+    ('ASP.NET Developer', {'backend', 'software_engineer'}),
+    ('Full-Stack Developer', {'fullstack', 'software_engineer'}),
+    ('React Engineer', {'web'}),
+    ('Platform Engineer', {'backend'}),
+    ('API Developer', {'backend', 'software_engineer'}),
+    ('Software Engineer II', {'software_engineer'}),
+])
+def test_engineering_titles_are_tagged(classifier, title, roles):
+    assert set(classifier.classify(title)) == roles
+
+
+@pytest.mark.parametrize('title', [
+    'Business Developer',
+    'Business Development Representative',
+    'Engineering Manager, Backend',
+    'Developer Relations Engineer',
+    'Technical Recruiter - Software Engineers',
+    'Sales Development Rep',
+    'Platform Operations Specialist',
+    'API Technical Account Lead',
+    'Data Platform Analyst',
+    'Platform Product Owner',
+])
+def test_non_engineering_titles_are_not_tagged(classifier, title):
+    assert classifier.classify(title) == ()
+
+
+def test_tag_jobs_marks_target_roles(classifier):
+    jobs = classifier.tag_jobs([{'job_title': 'Backend Engineer'}, {'job_title': 'Business Developer'},
+                                {'job_title': None}])
+    assert [job['is_target_role'] for job in jobs] == [True, False, False]
+    assert jobs[0]['role_tags'] == ['backend']
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from lib.scheduler import (DEFAULT_CHANGE_RATE, FAILURE_BACKOFF, MAX_INTERVAL, MIN_INTERVAL, estimate_change_rate,
+                           jobs_fingerprint, new_state, plan_crawl, simulate, synthetic_history, update_state)
+
+NOW = datetime(2025, 6, 1)
+
+
+def crawled_state(url, rate, hours_ago, next_due_in_hours=-1):
+    state = new_state({'name': url, 'url': url})
+    state.update(last_success_at=NOW - timedelta(hours=hours_ago), change_rate=rate,
+                 next_due_at=NOW + timedelta(hours=next_due_in_hours))
+    return state
+
+
+def test_fingerprint_ignores_job_order():
+    jobs = [{'url': 'https://a/1', 'job_title': 'A'}, {'url': 'https://a/2', 'job_title': 'B'}]
+    assert jobs_fingerprint(jobs) == jobs_fingerprint(list(reversed(jobs)))
+    assert jobs_fingerprint(jobs) != jobs_fingerprint(jobs[:1])
+
+
+def test_change_rate_stays_positive_for_sites_never_seen_changing():
+    assert estimate_change_rate(0, 0, 0) == DEFAULT_CHANGE_RATE
+    unchanged = estimate_change_rate(10, 0, 10 * 86400)
+    assert 0 < unchanged < estimate_change_rate(10, 5, 10 * 86400) < estimate_change_rate(10, 10, 10 * 86400)
+
+
+def test_failures_back_off_exponentially_up_to_the_max_interval():
+    state = new_state({'name': 'a', 'url': 'https://a'})
+    update_state(state, success=False, now=NOW)
+    assert state['next_due_at'] == NOW + FAILURE_BACKOFF
+    update_state(state, success=False, now=NOW)
+    assert state['next_due_at'] == NOW + 2 * FAILURE_BACKOFF
+    for _ in range(20):
+        update_state(state, success=False, now=NOW)
+    assert state['next_due_at'] == NOW + MAX_INTERVAL
+
+
+def test_changes_shorten_the_revisit_interval():
+    changing = new_state({'name': 'a', 'url': 'https://a'})
+    stable = new_state({'name': 'b', 'url': 'https://b'})
+    for day in range(6):
+        now = NOW + timedelta(days=day)
+        update_state(changing, True, fingerprint=f'v{day}', now=now)
+        update_state(stable, True, fingerprint='same', now=now)
+    changing_interval = changing['next_due_at'] - changing['last_success_at']
+    stable_interval = stable['next_due_at'] - stable['last_success_at']
+    assert MIN_INTERVAL <= changing_interval < stable_interval <= MAX_INTERVAL
+    assert changing['consecutive_failures'] == 0
+
+
+def test_plan_puts_new_companies_first_and_respects_due_dates_and_budget():
+    never_crawled = new_state({'name': 'new', 'url': 'https://new'})
+    fast = crawled_state('https://fast', rate=1 / 3600, hours_ago=10)
+    slow = crawled_state('https://slow', rate=1 / (30 * 86400), hours_ago=10)
+    not_due = crawled_state('https://later', rate=1 / 3600, hours_ago=10, next_due_in_hours=5)
+
+    planned = plan_crawl([slow, not_due, fast, never_crawled], now=NOW)
+    assert [state['company_url'] for state in planned] == ['https://new', 'https://fast', 'https://slow']
+    assert len(plan_crawl([slow, fast, never_crawled], budget=2, now=NOW)) == 2
+
+
+def test_adaptive_policy_beats_round_robin_on_synthetic_sites():
+    start, history = synthetic_history(100, days=30, seed=1)
+    adaptive = simulate(history, start, days=30, budget_per_day=15, policy='adaptive')
+    round_robin = simulate(history, start, days=30, budget_per_day=15, policy='round_robin')
+    assert adaptive['mean_delay_hours'] < round_robin['mean_delay_hours']
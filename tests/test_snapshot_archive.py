@@ -0,0 +1,69 @@
+import asyncio
+import os
+import threading
+import types
+
+from lib.main import archive_page
+from lib.runtime import Runtime
+from lib.snapshot_archive import SnapshotArchive, reprocess
+
+PAGE = ('<html><body><a href="/jobs/123-backend-engineer">Backend Engineer</a>'
+        '<a href="/about">About us</a></body></html>')
+
+
+def count_blobs(root):
+    return sum(len(files) for _, _, files in os.walk(os.path.join(root, 'objects')))
+
+
+def test_identical_pages_are_stored_once_and_read_back(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    first = archive.put('Acme', 'https://acme.com', 'https://acme.com/careers', 'https://acme.com/careers', PAGE)
+    second = archive.put('Beta', 'https://beta.com', 'https://beta.com/jobs', 'https://beta.com/jobs', PAGE)
+
+    assert first == second
+    assert count_blobs(str(tmp_path)) == 1
+    assert archive.get(first) == PAGE
+    stats = archive.stats()
+    assert (stats['snapshots'], stats['companies'], stats['blobs']) == (2, 2, 1)
+    archive.close()
+
+
+def test_latest_is_the_newest_snapshot_per_company(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    archive.put('Acme', 'https://acme.com', 'https://acme.com/careers', 'https://acme.com/careers', '<p>old</p>')
+    newest = archive.put('Acme', 'https://acme.com', 'https://acme.com/careers', 'https://acme.com/careers', PAGE)
+    archive.put('Acme', 'https://acme.com', 'https://acme.com', 'https://acme.com', '<p>home</p>', stage='homepage')
+
+    assert [snapshot['sha256'] for snapshot in archive.latest()] == [newest]
+    assert len(archive.history('https://acme.com')) == 3
+    archive.close()
+
+
+def test_deterministic_reprocess_extracts_job_links_without_a_browser(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    archive.put('Acme', 'https://acme.com', 'https://acme.com/careers', 'https://acme.com/careers', PAGE)
+    results = asyncio.run(reprocess(archive, concurrency=1))
+    jobs = results['https://acme.com']
+    assert [(job['job_title'], job['url']) for job in jobs] == [
+        ('Backend Engineer', 'https://acme.com/jobs/123-backend-engineer')]
+    assert 'role_tags' in jobs[0] and 'location_info' in jobs[0]
+    archive.close()
+
+
+def test_pages_are_archived_off_the_event_loop_thread():
+    calls = []
+
+    class RecordingArchive:
+        def put(self, company_name, company_url, page_url, final_url, html, tier=None):
+            calls.append((final_url, tier, threading.current_thread() is threading.main_thread()))
+
+    runtime = types.SimpleNamespace(archive=RecordingArchive())
+    company = {'name': 'Acme', 'url': 'https://acme.com'}
+    asyncio.run(archive_page(runtime, company, 'https://acme.com', 'https://acme.com/careers', PAGE, 'http'))
+    asyncio.run(archive_page(runtime, company, 'https://acme.com', 'about:blank', PAGE, 'agent'))
+    assert calls == [('https://acme.com/careers', 'http', False)]
+
+
+def test_runtimes_can_opt_out_of_the_archive(monkeypatch, tmp_path):
+    monkeypatch.setenv('SNAPSHOT_ARCHIVE_DIR', str(tmp_path))
+    assert Runtime(archive_dir=None).archive is None